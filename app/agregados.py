@@ -0,0 +1,111 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+class AgregadosStatus:
+    """Contadores do comando 'status', mantidos em O(1) a cada conclusão."""
+
+    def __init__(self):
+        self.total = 0
+        self.concluidos = 0
+        self.espessuras_pendentes: Counter = Counter()
+
+    @property
+    def pendentes(self) -> int:
+        return self.total - self.concluidos
+
+    def adicionar(self, espessura: str, concluido: bool) -> None:
+        self.total += 1
+        if concluido:
+            self.concluidos += 1
+        else:
+            self.espessuras_pendentes[espessura] += 1
+
+    def concluir(self, espessura: str) -> None:
+        self.concluidos += 1
+        self.espessuras_pendentes[espessura] -= 1
+        if self.espessuras_pendentes[espessura] <= 0:
+            del self.espessuras_pendentes[espessura]
+
+    def reabrir(self, espessura: str) -> None:
+        self.concluidos -= 1
+        self.espessuras_pendentes[espessura] += 1
+
+    def como_dict(self) -> Dict:
+        return {
+            "total": self.total,
+            "concluidos": self.concluidos,
+            "pendentes": self.pendentes,
+            # Empates pela espessura: a mesma ordem do backend SQLite
+            "espessuras": dict(sorted(self.espessuras_pendentes.items(), key=lambda item: (-item[1], item[0])))
+        }
+
+
+class AgregadosCarga:
+    """Minutos de corte pendentes no total e por espessura, lista e OPD.
+
+    Cada grupo guarda [minutos, cortes com tempo, cortes sem tempo]; conclusões
+    e reaberturas ajustam só os três grupos da linha, então uma consulta custa
+    O(grupos), não O(linhas).
+    """
+
+    AGRUPAMENTOS = ("espessura", "lista_corte", "opd")
+
+    def __init__(self):
+        self.total = [0, 0, 0]
+        self.grupos: Dict[str, Dict[str, List[int]]] = {a: {} for a in self.AGRUPAMENTOS}
+
+    def carregar(self, linhas: Iterable[int], colunas: Sequence[Sequence[str]], minutos: Sequence[int]) -> None:
+        """Soma as linhas pendentes de uma vez (carga inicial); 'colunas' na ordem de AGRUPAMENTOS."""
+        linhas = list(linhas)
+        for linha in linhas:
+            _somar_em(self.total, minutos[linha], 1)
+        for agrupamento, coluna in zip(self.AGRUPAMENTOS, colunas):
+            grupos = self.grupos[agrupamento]
+            for linha in linhas:
+                grupo = grupos.get(coluna[linha])
+                if grupo is None:
+                    grupo = grupos[coluna[linha]] = [0, 0, 0]
+                valor = minutos[linha]
+                if valor >= 0:
+                    grupo[0] += valor
+                    grupo[1] += 1
+                else:
+                    grupo[2] += 1
+
+    def adicionar(self, chaves: Tuple[str, str, str], minutos: int) -> None:
+        """Linha pendente com 'chaves' = (espessura, lista_corte, opd); minutos < 0 é sem tempo."""
+        self._somar(chaves, minutos, 1)
+
+    def remover(self, chaves: Tuple[str, str, str], minutos: int) -> None:
+        self._somar(chaves, minutos, -1)
+
+    def _somar(self, chaves: Tuple[str, str, str], minutos: int, sinal: int) -> None:
+        _somar_em(self.total, minutos, sinal)
+        for agrupamento, chave in zip(self.AGRUPAMENTOS, chaves):
+            grupos = self.grupos[agrupamento]
+            grupo = grupos.get(chave)
+            if grupo is None:
+                grupo = grupos[chave] = [0, 0, 0]
+            _somar_em(grupo, minutos, sinal)
+            if not grupo[1] and not grupo[2]:
+                del grupos[chave]
+
+    def como_dict(self, agrupamento: str) -> Dict:
+        ordenados = sorted(self.grupos[agrupamento].items(), key=lambda item: (-item[1][0], item[0]))
+        return {
+            **_como_dict(self.total),
+            "grupos": {chave: _como_dict(grupo) for chave, grupo in ordenados}
+        }
+
+
+def _somar_em(grupo: List[int], minutos: int, sinal: int) -> None:
+    if minutos >= 0:
+        grupo[0] += sinal * minutos
+        grupo[1] += sinal
+    else:
+        grupo[2] += sinal
+
+
+def _como_dict(grupo: List[int]) -> Dict:
+    return {"minutos": grupo[0], "cortes": grupo[1], "sem_tempo": grupo[2]}
@@ -0,0 +1,108 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, List, Optional
+
+# Colunas da planilha, na ordem do CSV
+COLUNAS = [
+    "numero", "lista_corte", "espessura", "tempo_corte",
+    "opd", "data_entrega", "data_corte"
+]
+
+# Erros de concluir_cortes (o texto vai direto na resposta ao usuário)
+ERRO_NAO_ENCONTRADO = "Numero nao encontrado"
+ERRO_JA_CONCLUIDO = "Este corte ja foi concluido"
+ERRO_GRAVACAO = "Falha ao gravar a conclusao, tente novamente"
+
+
+class Armazenamento(ABC):
+    """Interface dos backends de armazenamento do CortesManager.
+
+    Todas as consultas retornam registros como dicts com as COLUNAS da
+    planilha (valores str, vazios como ""), na ordem do arquivo original.
+    """
+
+    @abstractmethod
+    def get_status_geral(self) -> Dict:
+        """{"total", "concluidos", "pendentes", "espessuras": {espessura: pendentes}}"""
+
+    @abstractmethod
+    def get_carga(self, agrupamento: str) -> Dict:
+        """Minutos de corte pendentes: {"minutos", "cortes", "sem_tempo", "grupos": {valor: {...}}}.
+
+        'agrupamento' é "espessura", "lista_corte" ou "opd"; grupos do maior para o menor.
+        Cortes sem tempo_corte reconhecido só entram em "sem_tempo".
+        """
+
+    @abstractmethod
+    def get_pendentes(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        """Pendentes ordenados por numero, a partir da posição 'inicio' (paginação)."""
+
+    @abstractmethod
+    def get_concluidos(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        """Últimos 'limite' concluídos (pulando os 'inicio' mais recentes), na ordem do arquivo."""
+
+    @abstractmethod
+    def get_por_entrega(self, ate: date, desde: Optional[date] = None, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        """Pendentes com data_entrega reconhecida entre 'desde' e 'ate' (inclusive), por data.
+
+        Sem 'desde', todos até 'ate'. Empates na mesma data ficam na ordem do arquivo.
+        """
+
+    @abstractmethod
+    def get_entregas_invalidas(self) -> List[Dict]:
+        """Pendentes cuja data_entrega não foi reconhecida (texto livre, data impossível)."""
+
+    @abstractmethod
+    def get_por_lista(self, lista: str) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def get_por_espessura(self, espessura: str) -> List[Dict]:
+        """Só os pendentes."""
+
+    @abstractmethod
+    def get_por_opd(self, opd: str) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def get_detalhe(self, numero: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def concluir_cortes(self, numeros: List[str]) -> List[Dict]:
+        """Conclui vários cortes em uma única gravação; um resultado por numero, na ordem.
+
+        Cada resultado é {"sucesso": True, "corte": {...}} ou {"sucesso": False, "erro": "..."}.
+        Se a gravação falhar, nenhum corte do lote fica concluído (erro ERRO_GRAVACAO).
+        """
+
+    def concluir_corte(self, numero: str) -> Dict:
+        return self.concluir_cortes([numero])[0]
+
+    @abstractmethod
+    def buscar(self, termo: str) -> List[Dict]:
+        """Até 20 registros cujo numero, lista_corte ou opd contém o termo."""
+
+    @abstractmethod
+    def versao(self) -> int:
+        """Versão dos dados: cresce a cada alteração (conclusão ou recarga)."""
+
+    def marca_dados(self) -> str:
+        """Identifica o estado dos dados do mesmo jeito em todos os processos (cursores de paginação)."""
+        return str(self.versao())
+
+    @contextmanager
+    def leitura_consistente(self):
+        """Agrupa consultas para que todas vejam o mesmo estado dos dados."""
+        yield
+
+    def recarregar(self) -> None:
+        """Relê a fonte de dados (no-op quando o backend já é a fonte)."""
+
+    def planilha_alterada(self) -> bool:
+        """Indica se a fonte mudou por fora e precisa de recarregar()."""
+        return False
+
+    def fechar(self) -> None:
+        """Libera recursos e persiste o que estiver pendente (shutdown)."""
@@ -0,0 +1,542 @@
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from typing import Optional, List, Dict
+import hashlib
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    DATA_PATH, JOURNAL_JANELA_MS, COMPACTAR_INTERVALO, COMPACTAR_MAX_ENTRADAS, TABELA, WORKERS, CACHE_PLANILHA
+)
+
+from . import metricas
+from .armazenamento import Armazenamento, COLUNAS, ERRO_NAO_ENCONTRADO, ERRO_JA_CONCLUIDO, ERRO_GRAVACAO
+from .journal import Journal
+from .indices import IndiceHash, IndiceTrigramas
+from .agregados import AgregadosStatus, AgregadosCarga
+from .concorrencia import LockLeituraEscrita, LockArquivo
+from .datas import DATA_INVALIDA, ordinal_data, ordinais
+from .tempos import minutos
+from .tabelas import TABELAS
+from .cache_planilha import gravar_cache, ler_cache
+
+
+def _is_concluido(data_corte: str) -> bool:
+    return data_corte is not None and str(data_corte).strip() != ""
+
+
+def _hash(conteudo: bytes) -> str:
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+class SnapshotCortes:
+    """Dataset carregado e seus índices; cada recarga monta um novo e troca o inteiro."""
+
+    # Índices de busca: (classe, coluna). Só dependem de colunas que não mudam, e por
+    # isso podem vir prontos do cache binário da planilha
+    INDICES = {
+        "busca_numero": (IndiceTrigramas, "numero"),
+        "lista": (IndiceTrigramas, "lista_corte"),
+        "opd": (IndiceTrigramas, "opd"),
+        "espessura": (IndiceHash, "espessura"),
+    }
+
+    def __init__(self, tabela, indices: Optional[Dict] = None):
+        self.tabela = tabela
+        self._indexar(indices)
+
+    def indices(self) -> Dict:
+        return {nome: getattr(self, f"idx_{nome}") for nome in self.INDICES}
+
+    def _indexar(self, indices: Optional[Dict] = None) -> None:
+        """Monta os índices em memória (as linhas são as posições na tabela)."""
+        numeros = self.tabela.coluna("numero")
+        # Primeira linha de cada numero (zip invertido: a primeira ocorrência sobrescreve as demais)
+        self.idx_numero: Dict[str, int] = dict(zip(reversed(numeros), range(len(numeros) - 1, -1, -1)))
+        for nome, (classe, coluna) in self.INDICES.items():
+            indice = indices[nome] if indices else classe(self.tabela.coluna(coluna))
+            setattr(self, f"idx_{nome}", indice)
+        espessuras = self.tabela.coluna("espessura")
+        self.pendentes = set()
+        self.agregados = AgregadosStatus()
+        concluidas = []
+        for linha, data in enumerate(self.tabela.coluna("data_corte")):
+            concluido = _is_concluido(data)
+            if concluido:
+                concluidas.append(linha)
+            else:
+                self.pendentes.add(linha)
+            self.agregados.adicionar(espessuras[linha], concluido)
+
+        # Ordens mantidas a cada conclusão, para paginar sem reordenar:
+        # pendentes por (numero, linha) e concluídas na ordem do arquivo
+        self.ordem_pendentes = array("I", self.tabela.ordenar(sorted(self.pendentes), "numero"))
+        self.linhas_concluidas = array("I", concluidas)
+
+        # Datas interpretadas uma vez, como ordinais de dia (o texto original continua na tabela)
+        self.interpretar_datas(date.today())
+
+        # tempo_corte em minutos e a carga pendente por espessura/lista/OPD
+        self.minutos = minutos(self.tabela.coluna("tempo_corte"))
+        self.carga = AgregadosCarga()
+        colunas_carga = [self.tabela.coluna(nome) for nome in AgregadosCarga.AGRUPAMENTOS]
+        self.carga.carregar(self.pendentes, colunas_carga, self.minutos)
+
+    def interpretar_datas(self, referencia: date) -> None:
+        """Converte as datas em ordinais; as sem ano ("28/ago") ficam no ano mais perto de 'referencia'.
+
+        Chamado de novo quando o dia muda, senão o ano escolhido na carga vai ficando para trás.
+        """
+        self.referencia = referencia
+        self.dia_entrega = ordinais(self.tabela.coluna("data_entrega"), referencia)
+        self.dia_corte = ordinais(self.tabela.coluna("data_corte"), referencia)
+        self.entregas_invalidas = {l for l, dia in enumerate(self.dia_entrega) if dia == DATA_INVALIDA}
+        # Pendentes com data de entrega reconhecida, por (dia, linha): atrasados/vencendo por bisect
+        self.ordem_entrega = array("I", sorted(
+            (linha for linha in self.pendentes if self.dia_entrega[linha] > 0), key=self._chave_entrega
+        ))
+
+    def _chave_pendente(self, linha: int):
+        return self.tabela.valor(linha, "numero"), linha
+
+    def _chave_entrega(self, linha: int):
+        return self.dia_entrega[linha], linha
+
+    def _chaves_carga(self, linha: int):
+        return tuple(self.tabela.valor(linha, nome) for nome in AgregadosCarga.AGRUPAMENTOS)
+
+    def faixa_entrega(self, desde: int, ate: int) -> array:
+        """Linhas pendentes com entrega entre os dias 'desde' e 'ate' (inclusive), por data."""
+        inicio = bisect_left(self.ordem_entrega, (desde, -1), key=self._chave_entrega)
+        fim = bisect_left(self.ordem_entrega, (ate + 1, -1), key=self._chave_entrega)
+        return self.ordem_entrega[inicio:fim]
+
+    def aplicar(self, entrada: Dict) -> None:
+        """Aplica uma entrada do journal (idempotente)."""
+        linha = self.idx_numero.get(entrada["numero"])
+        if linha is not None and entrada["op"] == "concluir":
+            self.marcar_concluido(linha, entrada["data_corte"])
+
+    def marcar_concluido(self, linha: int, data_corte: str) -> None:
+        self.tabela.definir(linha, "data_corte", data_corte)
+        self.dia_corte[linha] = ordinal_data(data_corte)
+        pendente = linha in self.pendentes
+        espessura = self.tabela.valor(linha, "espessura")
+        com_entrega = self.dia_entrega[linha] > 0
+        if _is_concluido(data_corte) and pendente:
+            self.pendentes.discard(linha)
+            self.agregados.concluir(espessura)
+            del self.ordem_pendentes[bisect_left(self.ordem_pendentes, self._chave_pendente(linha), key=self._chave_pendente)]
+            insort(self.linhas_concluidas, linha)
+            if com_entrega:
+                del self.ordem_entrega[bisect_left(self.ordem_entrega, self._chave_entrega(linha), key=self._chave_entrega)]
+            self.carga.remover(self._chaves_carga(linha), self.minutos[linha])
+        elif not _is_concluido(data_corte) and not pendente:
+            self.pendentes.add(linha)
+            self.agregados.reabrir(espessura)
+            insort(self.ordem_pendentes, linha, key=self._chave_pendente)
+            del self.linhas_concluidas[bisect_left(self.linhas_concluidas, linha)]
+            if com_entrega:
+                insort(self.ordem_entrega, linha, key=self._chave_entrega)
+            self.carga.adicionar(self._chaves_carga(linha), self.minutos[linha])
+
+    def registros(self, linhas) -> List[Dict]:
+        return self.tabela.registros(sorted(linhas))
+
+
+class ArmazenamentoCSV(Armazenamento):
+    """Backend original: tabela em memória, journal de alterações e compactação no CSV.
+
+    A tabela pode ser um DataFrame ("pandas") ou a TabelaCompacta ("compacta"),
+    que não depende de pandas e ocupa bem menos memória.
+
+    Com vários workers (multiprocesso), o journal é o canal entre os processos:
+    cada conclusão é validada e gravada sob um lock de arquivo, depois de
+    aplicar o que os outros gravaram, e as leituras aplicam as entradas novas
+    antes de responder.
+    """
+
+    def __init__(self, csv_path: str = DATA_PATH, tabela: str = TABELA, multiprocesso: bool = WORKERS > 1):
+        self.csv_path = csv_path
+        self._tabela = TABELAS[tabela]
+        self._caminho_cache = csv_path + ".cache" if CACHE_PLANILHA else None
+        self._lock = LockLeituraEscrita()
+        self._arquivo = LockArquivo(csv_path + ".lock")
+        self._multiprocesso = multiprocesso
+        self._journal = Journal(csv_path + ".journal", janela=JOURNAL_JANELA_MS / 1000)
+
+        # Estado conhecido do arquivo, para detectar edições externas
+        self._stat_planilha = None
+        self._hash_planilha = None
+
+        # Recargas são serializadas; as conclusões feitas durante uma recarga
+        # são guardadas aqui e reaplicadas no snapshot novo antes da troca
+        self._recarga = threading.RLock()
+        self._durante_recarga: Optional[List[Dict]] = None
+        self._versao = 0
+
+        self._dados, posicao = self._carregar()
+        self._journal.posicionar(posicao)
+
+        # Compactação periódica do journal de volta para o CSV
+        self._parar = threading.Event()
+        self._compactador = threading.Thread(target=self._compactar_periodicamente, name="compactador", daemon=True)
+        self._compactador.start()
+
+    def _carregar_planilha(self):
+        """Retorna (tabela, índices); os índices só vêm prontos quando o cache binário vale."""
+        if not os.path.exists(self.csv_path):
+            tabela = self._tabela.vazia(COLUNAS)
+            self._salvar(tabela)
+            return tabela, None
+
+        inicio = time.perf_counter()
+        with open(self.csv_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # Mesmo tamanho e mtime: usa o cache sem nem ler o CSV
+            cache = self._ler_cache(stat.st_size, stat.st_mtime_ns)
+            if cache is None:
+                conteudo = f.read()
+                hash_planilha = _hash(conteudo)
+                # Só o mtime mudou (arquivo copiado ou salvo sem alterações): o cache ainda vale
+                cache = self._ler_cache(stat.st_size, stat.st_mtime_ns, hash_planilha)
+        if cache is not None:
+            tabela, indices, hash_planilha = cache
+            metricas.cache_planilha_total.incrementar("acerto")
+        else:
+            tabela, indices = self._tabela.ler_csv(conteudo), None
+            if self._caminho_cache:
+                metricas.cache_planilha_total.incrementar("falha")
+        self._stat_planilha = (stat.st_size, stat.st_mtime_ns)
+        self._hash_planilha = hash_planilha
+        metricas.planilha_carga_duracao.observar(time.perf_counter() - inicio)
+        metricas.planilha_linhas.definir(len(tabela))
+        return tabela, indices
+
+    def _ler_cache(self, tamanho: int, mtime_ns: int, hash_planilha: Optional[str] = None):
+        if not self._caminho_cache:
+            return None
+        return ler_cache(self._caminho_cache, self._tabela, tamanho, mtime_ns, hash_planilha)
+
+    def _gravar_cache(self, tabela, indices: Dict) -> None:
+        """Grava o cache da planilha que acabou de ser lida/gravada (chave em _stat/_hash_planilha)."""
+        if not self._caminho_cache or self._stat_planilha is None:
+            return
+        try:
+            gravar_cache(self._caminho_cache, *self._stat_planilha, self._hash_planilha, tabela, indices)
+        except OSError:
+            # Sem cache o próximo start só fica mais lento
+            pass
+
+    def _carregar(self):
+        """Lê a planilha, monta um snapshot novo e reaplica o journal.
+
+        Retorna o snapshot e a posição do journal que ele já inclui.
+        """
+        # Planilha e journal lidos juntos, sem uma compactação de outro processo no meio
+        with self._arquivo.exclusivo():
+            tabela, indices = self._carregar_planilha()
+            entradas, posicao = self._journal.ler_com_posicao()
+        dados = SnapshotCortes(tabela, indices)
+        # O cache guarda a planilha como está no CSV: gravado antes de aplicar o journal
+        if indices is None and len(tabela):
+            self._gravar_cache(tabela, dados.indices())
+        for entrada in entradas:
+            dados.aplicar(entrada)
+        return dados, posicao
+
+    def _acompanhar(self) -> bool:
+        """Aplica as entradas que outros processos gravaram no journal.
+
+        Retorna False se o journal foi rotacionado (outro processo compactou) e
+        é preciso recarregar. Reaplicar uma entrada já vista não muda nada.
+        """
+        with self._lock.escrita():
+            novas = self._journal.ler_novas()
+            if novas is None:
+                return False
+            if novas:
+                for entrada in novas:
+                    self._dados.aplicar(entrada)
+                if self._durante_recarga is not None:
+                    self._durante_recarga.extend(novas)
+                self._versao += 1
+        return True
+
+    def _sincronizar(self) -> None:
+        """No modo multiprocesso, aplica o que os outros processos gravaram (um stat se nada mudou)."""
+        # Dentro de uma leitura o lock de escrita daria deadlock: a leitura externa já sincronizou
+        if self._multiprocesso and not self._lock.lendo() and self._journal.mudou():
+            versao = self._versao
+            while not self._acompanhar():
+                self._recarregar_desde(versao)
+                versao = self._versao
+
+    def _recarregar_desde(self, versao: int) -> None:
+        """Recarrega, a menos que outra thread já tenha recarregado (ou concluído) desde 'versao'."""
+        with self._recarga:
+            if self._versao == versao:
+                self.recarregar()
+
+    def _ler(self):
+        self._sincronizar()
+        return self._lock.leitura()
+
+    def _ler_entregas(self):
+        """Como _ler(), mas antes reinterpreta as datas sem ano se o dia mudou desde a carga."""
+        hoje = date.today()
+        # Dentro de uma leitura a troca esperaria pela própria thread: fica para a próxima consulta
+        if self._dados.referencia != hoje and not self._lock.lendo():
+            with self._lock.escrita():
+                if self._dados.referencia != hoje:
+                    self._dados.interpretar_datas(hoje)
+                    self._versao += 1
+        return self._ler()
+
+    def recarregar(self) -> None:
+        """Relê a planilha fora do lock e troca o snapshot de forma atômica."""
+        with self._recarga:
+            with self._lock.escrita():
+                self._durante_recarga = []
+            try:
+                dados, posicao = self._carregar()
+            except Exception:
+                with self._lock.escrita():
+                    self._durante_recarga = None
+                raise
+            with self._lock.escrita():
+                for entrada in self._durante_recarga:
+                    dados.aplicar(entrada)
+                self._durante_recarga = None
+                self._dados = dados
+                # Até a troca, o journal continua sendo acompanhado a partir do snapshot antigo
+                self._journal.posicionar(posicao)
+                self._versao += 1
+
+    def planilha_alterada(self) -> bool:
+        """Indica se o CSV mudou desde a última leitura/gravação (stat e, se preciso, hash)."""
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_size, stat.st_mtime_ns) == self._stat_planilha:
+            return False
+        with open(self.csv_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            conteudo = f.read()
+        if _hash(conteudo) == self._hash_planilha:
+            # Só o mtime mudou (ex.: arquivo salvo sem alterações)
+            self._stat_planilha = (stat.st_size, stat.st_mtime_ns)
+            return False
+        return True
+
+    def _salvar(self, tabela) -> None:
+        """Grava o CSV de forma atômica (arquivo temporário + rename)."""
+        inicio = time.perf_counter()
+        conteudo = tabela.para_csv()
+        temp = self.csv_path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        # O hash é atualizado antes do rename para o observador não recarregar a própria gravação
+        self._hash_planilha = _hash(conteudo)
+        os.replace(temp, self.csv_path)
+        stat = os.stat(self.csv_path)
+        self._stat_planilha = (stat.st_size, stat.st_mtime_ns)
+        metricas.planilha_gravacao_duracao.observar(time.perf_counter() - inicio)
+        metricas.planilha_linhas.definir(len(tabela))
+
+    def compactar(self) -> None:
+        """Grava o estado atual no CSV e descarta o journal já incorporado."""
+        # Edições externas ainda não recarregadas não podem ser sobrescritas
+        if self.planilha_alterada():
+            self.recarregar()
+
+        with self._arquivo.exclusivo():
+            # Outro processo compactou desde a última leitura: a planilha já está em dia
+            if self._multiprocesso and not self._acompanhar():
+                return
+
+            # Leitura basta: exclui as escritas enquanto copia e rotaciona o journal
+            with self._lock.leitura():
+                tabela = self._dados.tabela.copia()
+                # Índices não dependem de data_corte: valem para o CSV que vai ser gravado
+                indices = self._dados.indices()
+                self._journal.rotacionar()
+            self._salvar(tabela)
+            self._journal.descartar_antigo()
+            self._gravar_cache(tabela, indices)
+
+    def fechar(self) -> None:
+        """Para a compactação periódica e compacta o que restou (chamado no shutdown)."""
+        self._parar.set()
+        self._compactador.join()
+        if self._journal.entradas:
+            self.compactar()
+
+    def _compactar_periodicamente(self) -> None:
+        ultima = time.monotonic()
+        while not self._parar.wait(1.0):
+            if not self._journal.entradas:
+                continue
+            if self._journal.entradas >= COMPACTAR_MAX_ENTRADAS or time.monotonic() - ultima >= COMPACTAR_INTERVALO:
+                try:
+                    self.compactar()
+                except OSError:
+                    # Disco cheio / erro de I/O (inclusive do journal): tenta de novo na próxima rodada
+                    continue
+                ultima = time.monotonic()
+
+    def versao(self) -> int:
+        self._sincronizar()
+        return self._versao
+
+    def marca_dados(self) -> str:
+        if not self._multiprocesso:
+            return str(self.versao())
+        # _versao é de cada processo; a planilha lida e a posição no journal são as mesmas
+        # em todos os processos que já aplicaram as mesmas entradas
+        with self._ler():
+            tamanho, mtime_ns = self._stat_planilha or (0, 0)
+            inode, offset = self._journal.posicao_lida()
+            return f"{tamanho}.{mtime_ns}:{inode}.{offset}:{self._dados.referencia.toordinal()}"
+
+    def get_status_geral(self) -> Dict:
+        with self._ler():
+            return self._dados.agregados.como_dict()
+
+    def get_carga(self, agrupamento: str) -> Dict:
+        with self._ler():
+            return self._dados.carga.como_dict(agrupamento)
+
+    def get_pendentes(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        with self._ler():
+            d = self._dados
+            return d.tabela.registros(d.ordem_pendentes[inicio:inicio + limite].tolist())
+
+    def get_concluidos(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        with self._ler():
+            d = self._dados
+            fim = len(d.linhas_concluidas) - inicio
+            if fim <= 0:
+                return []
+            return d.tabela.registros(d.linhas_concluidas[max(0, fim - limite):fim].tolist())
+
+    def get_por_entrega(self, ate: date, desde: Optional[date] = None, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        with self._ler_entregas():
+            d = self._dados
+            linhas = d.faixa_entrega(desde.toordinal() if desde else 1, ate.toordinal())
+            return d.tabela.registros(linhas[inicio:inicio + limite].tolist())
+
+    def get_entregas_invalidas(self) -> List[Dict]:
+        with self._ler_entregas():
+            d = self._dados
+            return d.registros(d.entregas_invalidas & d.pendentes)
+
+    def get_por_lista(self, lista: str) -> List[Dict]:
+        with self._ler():
+            return self._dados.registros(self._dados.idx_lista.contem(lista))
+
+    def get_por_espessura(self, espessura: str) -> List[Dict]:
+        with self._ler():
+            d = self._dados
+            return d.registros(d.idx_espessura.contem(espessura) & d.pendentes)
+
+    def get_por_opd(self, opd: str) -> List[Dict]:
+        with self._ler():
+            return self._dados.registros(self._dados.idx_opd.contem(opd))
+
+    def get_detalhe(self, numero: str) -> Optional[Dict]:
+        with self._ler():
+            d = self._dados
+            linha = d.idx_numero.get(str(numero))
+            if linha is None:
+                return None
+            return d.tabela.registro(linha)
+
+    def leitura_consistente(self):
+        return self._ler()
+
+    def concluir_cortes(self, numeros: List[str]) -> List[Dict]:
+        if not self._multiprocesso:
+            resultados = self._concluir(numeros)
+        else:
+            while True:
+                # Sob o lock de arquivo: aplica o que os outros processos gravaram antes de
+                # validar, e só libera depois do fsync, para nenhuma conclusão se perder
+                with self._arquivo.exclusivo():
+                    versao = self._versao
+                    if self._acompanhar():
+                        self._journal.reabrir_se_rotacionado()
+                        resultados = self._concluir(numeros)
+                        self._journal.marcar_lido()
+                        break
+                self._recarregar_desde(versao)
+        # Fora do lock de arquivo: a recarga também o pega, depois do lock de recarga
+        if any(r.get("erro") == ERRO_GRAVACAO for r in resultados):
+            self._desfazer_falha()
+        return resultados
+
+    def _desfazer_falha(self) -> None:
+        """Depois de uma falha do journal, volta o snapshot ao que está em disco.
+
+        Enquanto o journal está com erro, nenhuma conclusão nova é aplicada e a
+        compactação não grava o CSV; as conclusões do lote com falha (de todas
+        as threads) somem na recarga.
+        """
+        with self._recarga:
+            # As threads do mesmo lote falham juntas: só a primeira recarrega
+            if self._journal.falhou():
+                self.recarregar()
+                self._journal.recuperar()
+
+    def _concluir(self, numeros: List[str]) -> List[Dict]:
+        resultados = []
+        entradas = []
+        with self._lock.escrita():
+            # Journal com erro: recusa antes de mexer no snapshot (a recarga está desfazendo o lote)
+            if self._journal.falhou():
+                return [{"sucesso": False, "erro": ERRO_GRAVACAO} for _ in numeros]
+            d = self._dados
+            data_corte = datetime.now().strftime("%d/%m/%y")
+            for numero in numeros:
+                linha = d.idx_numero.get(str(numero))
+                if linha is None:
+                    resultados.append({"sucesso": False, "erro": ERRO_NAO_ENCONTRADO})
+                    continue
+                if linha not in d.pendentes:
+                    resultados.append({"sucesso": False, "erro": ERRO_JA_CONCLUIDO})
+                    continue
+                entrada = {"op": "concluir", "numero": str(numero), "data_corte": data_corte}
+                d.aplicar(entrada)
+                entradas.append(entrada)
+                resultados.append({"sucesso": True, "corte": d.tabela.registro(linha)})
+            if not entradas:
+                return resultados
+            seq = self._journal.registrar_varios(entradas)
+            if self._durante_recarga is not None:
+                self._durante_recarga.extend(entradas)
+            self._versao += 1
+
+        # Responde só depois do fsync (agrupado com as demais conclusões da janela)
+        try:
+            self._journal.aguardar(seq)
+        except OSError:
+            return [{"sucesso": False, "erro": ERRO_GRAVACAO} if r["sucesso"] else r for r in resultados]
+        return resultados
+
+    def buscar(self, termo: str) -> List[Dict]:
+        with self._ler():
+            d = self._dados
+            linhas = (
+                d.idx_busca_numero.contem(termo) |
+                d.idx_lista.contem(termo) |
+                d.idx_opd.contem(termo)
+            )
+            return d.registros(sorted(linhas)[:20])
+
@@ -0,0 +1,421 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_PATH, SQLITE_PATH
+
+from .armazenamento import Armazenamento, COLUNAS, ERRO_NAO_ENCONTRADO, ERRO_JA_CONCLUIDO
+from .agregados import AgregadosCarga
+from .datas import DATA_INVALIDA, ordinal_data
+from .tempos import SEM_TEMPO, minutos_corte
+from .journal import ler_journal
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cortes (
+    id INTEGER PRIMARY KEY,
+    numero TEXT NOT NULL DEFAULT '',
+    lista_corte TEXT NOT NULL DEFAULT '',
+    espessura TEXT NOT NULL DEFAULT '',
+    tempo_corte TEXT NOT NULL DEFAULT '',
+    opd TEXT NOT NULL DEFAULT '',
+    data_entrega TEXT NOT NULL DEFAULT '',
+    data_corte TEXT NOT NULL DEFAULT '',
+    dia_entrega INTEGER NOT NULL DEFAULT 0,
+    dia_corte INTEGER NOT NULL DEFAULT 0,
+    minutos_corte INTEGER NOT NULL DEFAULT -1
+);
+CREATE INDEX IF NOT EXISTS idx_cortes_numero ON cortes (numero);
+DROP INDEX IF EXISTS idx_cortes_lista;
+DROP INDEX IF EXISTS idx_cortes_opd;
+DROP INDEX IF EXISTS idx_cortes_espessura;
+CREATE INDEX IF NOT EXISTS idx_cortes_data_corte ON cortes (data_corte, numero);
+CREATE INDEX IF NOT EXISTS idx_cortes_entrega ON cortes (data_corte, dia_entrega);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', 0);
+"""
+
+# Busca por substring (lista, opd, espessura, buscar): LIKE '%termo%' não usa índice B-tree,
+# então as colunas vão para uma tabela FTS5 com tokenizer trigram (o equivalente do
+# IndiceTrigramas do backend CSV). Conteúdo externo: o texto fica só em 'cortes', e os
+# triggers mantêm o índice (concluir só altera data_corte, que não está nele)
+_COLUNAS_BUSCA = ("numero", "lista_corte", "espessura", "opd")
+_SCHEMA_BUSCA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS cortes_busca USING fts5("
+    f"{', '.join(_COLUNAS_BUSCA)}, content='cortes', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS cortes_busca_ai AFTER INSERT ON cortes BEGIN "
+    f"INSERT INTO cortes_busca (rowid, {', '.join(_COLUNAS_BUSCA)}) "
+    f"VALUES (new.id, {', '.join('new.' + c for c in _COLUNAS_BUSCA)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS cortes_busca_ad AFTER DELETE ON cortes BEGIN "
+    f"INSERT INTO cortes_busca (cortes_busca, rowid, {', '.join(_COLUNAS_BUSCA)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + c for c in _COLUNAS_BUSCA)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS cortes_busca_au AFTER UPDATE OF {', '.join(_COLUNAS_BUSCA)} ON cortes BEGIN "
+    f"INSERT INTO cortes_busca (cortes_busca, rowid, {', '.join(_COLUNAS_BUSCA)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + c for c in _COLUNAS_BUSCA)}); "
+    f"INSERT INTO cortes_busca (rowid, {', '.join(_COLUNAS_BUSCA)}) "
+    f"VALUES (new.id, {', '.join('new.' + c for c in _COLUNAS_BUSCA)}); END",
+]
+# Termos mais curtos que um trigrama não usam o índice: varrem a tabela com LIKE
+_TAMANHO_TRIGRAMA = 3
+
+# SQL fixo: o sqlite3 reaproveita o statement preparado do cache da conexão
+_CAMPOS = ", ".join(COLUNAS)
+_SQL_TOTAIS = "SELECT COUNT(*), COALESCE(SUM(data_corte <> ''), 0) FROM cortes"
+_SQL_ESPESSURAS = (
+    "SELECT espessura, COUNT(*) AS n FROM cortes WHERE data_corte = '' "
+    "GROUP BY espessura ORDER BY n DESC, espessura"
+)
+_SQL_PENDENTES = f"SELECT {_CAMPOS} FROM cortes WHERE data_corte = '' ORDER BY numero, id LIMIT ? OFFSET ?"
+_SQL_CONCLUIDOS = f"SELECT {_CAMPOS} FROM cortes WHERE data_corte <> '' ORDER BY id DESC LIMIT ? OFFSET ?"
+_SQL_ENTREGA = (
+    f"SELECT {_CAMPOS} FROM cortes WHERE data_corte = '' AND dia_entrega BETWEEN ? AND ? "
+    "ORDER BY dia_entrega, id LIMIT ? OFFSET ?"
+)
+_SQL_ENTREGA_INVALIDA = f"SELECT {_CAMPOS} FROM cortes WHERE data_corte = '' AND dia_entrega = ? ORDER BY id"
+_SQL_DETALHE = f"SELECT id, {_CAMPOS} FROM cortes WHERE numero = ? ORDER BY id LIMIT 1"
+_SQL_CONCLUIR = "UPDATE cortes SET data_corte = ?, dia_corte = ? WHERE id = ? AND data_corte = ''"
+# Consultas por substring: (colunas, filtro extra, limite) -> SQL com trigramas e com LIKE
+_CONSULTAS_CONTEM = {
+    "lista": (("lista_corte",), "", ""),
+    "espessura": (("espessura",), "data_corte = '' AND ", ""),
+    "opd": (("opd",), "", ""),
+    "buscar": (("numero", "lista_corte", "opd"), "", " LIMIT 20"),
+}
+_ESCAPE = "ESCAPE '\\'"
+_SQL_CONTEM_TRIGRAMAS = {
+    nome: (
+        f"SELECT {_CAMPOS} FROM cortes WHERE {filtro}id IN (SELECT rowid FROM cortes_busca "
+        f"WHERE cortes_busca MATCH '{{{' '.join(colunas)}}} : ' || ?1) ORDER BY id{limite}"
+    )
+    for nome, (colunas, filtro, limite) in _CONSULTAS_CONTEM.items()
+}
+_SQL_CONTEM_LIKE = {
+    nome: (
+        f"SELECT {_CAMPOS} FROM cortes WHERE {filtro}"
+        f"({' OR '.join(f'{coluna} LIKE ?1 {_ESCAPE}' for coluna in colunas)}) ORDER BY id{limite}"
+    )
+    for nome, (colunas, filtro, limite) in _CONSULTAS_CONTEM.items()
+}
+# Carga pendente: (minutos, cortes com tempo, cortes sem tempo), no total e por grupo
+_SOMAS_CARGA = "COALESCE(SUM(MAX(minutos_corte, 0)), 0), COALESCE(SUM(minutos_corte >= 0), 0), COALESCE(SUM(minutos_corte < 0), 0)"
+_SQL_CARGA_TOTAL = f"SELECT {_SOMAS_CARGA} FROM cortes WHERE data_corte = ''"
+_SQL_CARGA = {
+    coluna: f"SELECT {coluna}, {_SOMAS_CARGA} FROM cortes WHERE data_corte = '' GROUP BY {coluna}"
+    for coluna in AgregadosCarga.AGRUPAMENTOS
+}
+_SQL_VERSAO = "SELECT valor FROM meta WHERE chave = 'versao'"
+_SQL_INCREMENTAR_VERSAO = "UPDATE meta SET valor = valor + 1 WHERE chave = 'versao'"
+# Dia (ordinal) usado para dar ano às datas sem ano ("28/ago") de dia_entrega/dia_corte
+_SQL_REFERENCIA = "SELECT valor FROM meta WHERE chave = 'referencia_datas'"
+_SQL_DEFINIR_REFERENCIA = "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('referencia_datas', ?)"
+_SQL_REINTERPRETAR = [
+    f"UPDATE cortes SET {coluna} = ordinal_data({origem}, ?1) WHERE {coluna} <> ordinal_data({origem}, ?1)"
+    for coluna, origem in (("dia_entrega", "data_entrega"), ("dia_corte", "data_corte"))
+]
+_SQL_INSERIR = (
+    f"INSERT INTO cortes ({_CAMPOS}, dia_entrega, dia_corte, minutos_corte) "
+    f"VALUES ({', '.join('?' * (len(COLUNAS) + 3))})"
+)
+
+# Colunas calculadas na importação a partir das da planilha: (coluna, origem, conversão, padrão)
+_DERIVADAS = [
+    ("dia_entrega", "data_entrega", ordinal_data, 0),
+    ("dia_corte", "data_corte", ordinal_data, 0),
+    ("minutos_corte", "tempo_corte", minutos_corte, SEM_TEMPO),
+]
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Backend SQLite (modo WAL), com uma conexão por thread.
+
+    Aceita vários processos lendo e escrevendo no mesmo arquivo; cada
+    lote de conclusões é uma única transação.
+    """
+
+    def __init__(self, db_path: str = SQLITE_PATH, csv_path: Optional[str] = DATA_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._conexoes: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._referencia: Optional[int] = None
+
+        # Primeira execução: importa a planilha
+        if not os.path.exists(db_path) and csv_path and os.path.exists(csv_path):
+            importar_csv(csv_path, db_path)
+
+        con = self._conexao()
+        _migrar(con)
+        con.executescript(_SCHEMA)
+        # Sem FTS5 com trigram (SQLite < 3.34): as buscas por substring varrem a tabela
+        self._trigramas = _criar_busca(con)
+
+    def _conexao(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(
+                self.db_path, isolation_level=None, check_same_thread=False, cached_statements=64
+            )
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA busy_timeout=5000")
+            con.create_function("ordinal_data", 2, _ordinal_data_referencia, deterministic=True)
+            self._local.con = con
+            with self._lock:
+                self._conexoes.append(con)
+        return con
+
+    def _registros(self, sql: str, *params) -> List[Dict]:
+        cursor = self._conexao().execute(sql, params)
+        return [dict(zip(COLUNAS, linha)) for linha in cursor.fetchall()]
+
+    def fechar(self) -> None:
+        with self._lock:
+            for con in self._conexoes:
+                con.close()
+            self._conexoes = []
+        self._local = threading.local()
+
+    def versao(self) -> int:
+        # Guardada no próprio banco: vale para todos os processos que usam o arquivo
+        return self._conexao().execute(_SQL_VERSAO).fetchone()[0]
+
+    @contextmanager
+    def leitura_consistente(self):
+        con = self._conexao()
+        if con.in_transaction:
+            yield
+            return
+        # Uma transação de leitura: todos os SELECTs veem o mesmo snapshot do WAL
+        con.execute("BEGIN")
+        try:
+            yield
+        finally:
+            con.execute("COMMIT")
+
+    def get_status_geral(self) -> Dict:
+        con = self._conexao()
+        with self.leitura_consistente():
+            total, concluidos = con.execute(_SQL_TOTAIS).fetchone()
+            espessuras = dict(con.execute(_SQL_ESPESSURAS).fetchall())
+        return {"total": total, "concluidos": concluidos, "pendentes": total - concluidos, "espessuras": espessuras}
+
+    def get_carga(self, agrupamento: str) -> Dict:
+        con = self._conexao()
+        with self.leitura_consistente():
+            total = con.execute(_SQL_CARGA_TOTAL).fetchone()
+            grupos = con.execute(_SQL_CARGA[agrupamento]).fetchall()
+        grupos.sort(key=lambda grupo: (-grupo[1], grupo[0]))
+        return {
+            **_carga_dict(total),
+            "grupos": {grupo[0]: _carga_dict(grupo[1:]) for grupo in grupos}
+        }
+
+    def get_pendentes(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        return self._registros(_SQL_PENDENTES, limite, inicio)
+
+    def get_concluidos(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        return list(reversed(self._registros(_SQL_CONCLUIDOS, limite, inicio)))
+
+    def get_por_entrega(self, ate: date, desde: Optional[date] = None, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        self._atualizar_referencia()
+        return self._registros(_SQL_ENTREGA, desde.toordinal() if desde else 1, ate.toordinal(), limite, inicio)
+
+    def get_entregas_invalidas(self) -> List[Dict]:
+        self._atualizar_referencia()
+        return self._registros(_SQL_ENTREGA_INVALIDA, DATA_INVALIDA)
+
+    def _atualizar_referencia(self) -> None:
+        """Reinterpreta as datas sem ano quando o dia muda (uma vez por dia, pelo primeiro processo)."""
+        hoje = date.today().toordinal()
+        if self._referencia == hoje:
+            return
+        con = self._conexao()
+        # Dentro de leitura_consistente não dá para escrever: fica para a próxima consulta
+        if con.in_transaction:
+            return
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            linha = con.execute(_SQL_REFERENCIA).fetchone()
+            if linha is None or linha[0] != hoje:
+                for sql in _SQL_REINTERPRETAR:
+                    con.execute(sql, (hoje,))
+                con.execute(_SQL_DEFINIR_REFERENCIA, (hoje,))
+                con.execute(_SQL_INCREMENTAR_VERSAO)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        self._referencia = hoje
+
+    def get_por_lista(self, lista: str) -> List[Dict]:
+        return self._contem("lista", lista)
+
+    def get_por_espessura(self, espessura: str) -> List[Dict]:
+        return self._contem("espessura", espessura)
+
+    def get_por_opd(self, opd: str) -> List[Dict]:
+        return self._contem("opd", opd)
+
+    def _contem(self, consulta: str, termo: str) -> List[Dict]:
+        """Registros cujas colunas da consulta contêm o termo (substring, sem diferenciar maiúsculas)."""
+        termo = str(termo)
+        if self._trigramas and len(termo) >= _TAMANHO_TRIGRAMA:
+            # Frase entre aspas: o trigram casa a substring literal, sem operadores do FTS5
+            return self._registros(_SQL_CONTEM_TRIGRAMAS[consulta], '"' + termo.replace('"', '""') + '"')
+        return self._registros(_SQL_CONTEM_LIKE[consulta], _padrao_contem(termo))
+
+    def get_detalhe(self, numero: str) -> Optional[Dict]:
+        linha = self._conexao().execute(_SQL_DETALHE, (str(numero),)).fetchone()
+        if linha is None:
+            return None
+        return dict(zip(COLUNAS, linha[1:]))
+
+    def concluir_cortes(self, numeros: List[str]) -> List[Dict]:
+        con = self._conexao()
+        resultados = []
+        alterou = False
+        data_corte = datetime.now().strftime("%d/%m/%y")
+        dia_corte = ordinal_data(data_corte)
+        # IMMEDIATE pega o lock de escrita já no início: leitura e update sem corrida
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            for numero in numeros:
+                linha = con.execute(_SQL_DETALHE, (str(numero),)).fetchone()
+                if linha is None:
+                    resultados.append({"sucesso": False, "erro": ERRO_NAO_ENCONTRADO})
+                    continue
+                corte = dict(zip(COLUNAS, linha[1:]))
+                if corte["data_corte"].strip():
+                    resultados.append({"sucesso": False, "erro": ERRO_JA_CONCLUIDO})
+                    continue
+                corte["data_corte"] = data_corte
+                con.execute(_SQL_CONCLUIR, (data_corte, dia_corte, linha[0]))
+                resultados.append({"sucesso": True, "corte": corte})
+                alterou = True
+            if alterou:
+                con.execute(_SQL_INCREMENTAR_VERSAO)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return resultados
+
+    def buscar(self, termo: str) -> List[Dict]:
+        return self._contem("buscar", termo)
+
+
+def _carga_dict(somas) -> Dict:
+    return {"minutos": somas[0], "cortes": somas[1], "sem_tempo": somas[2]}
+
+
+def _migrar(con: sqlite3.Connection) -> None:
+    """Bancos de versões anteriores: adiciona e preenche as colunas derivadas que faltam."""
+    colunas = {linha[1] for linha in con.execute("PRAGMA table_info(cortes)")}
+    faltando = [derivada for derivada in _DERIVADAS if colunas and derivada[0] not in colunas]
+    if not faltando:
+        return
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        for coluna, origem, converter, padrao in faltando:
+            con.create_function(f"converter_{coluna}", 1, converter)
+            con.execute(f"ALTER TABLE cortes ADD COLUMN {coluna} INTEGER NOT NULL DEFAULT {padrao}")
+            con.execute(f"UPDATE cortes SET {coluna} = converter_{coluna}({origem})")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def _criar_busca(con: sqlite3.Connection) -> bool:
+    """Cria o índice de trigramas e, se ele é novo, indexa as linhas existentes.
+
+    Retorna False se o SQLite não tiver FTS5 com o tokenizer trigram.
+    """
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        nova = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'cortes_busca'").fetchone() is None
+        for comando in _SCHEMA_BUSCA:
+            con.execute(comando)
+        if nova:
+            con.execute("INSERT INTO cortes_busca (cortes_busca) VALUES ('rebuild')")
+        con.execute("COMMIT")
+    except sqlite3.OperationalError:
+        con.execute("ROLLBACK")
+        return False
+    return True
+
+
+def _ordinal_data_referencia(texto: str, referencia: int) -> int:
+    return ordinal_data(texto, date.fromordinal(referencia))
+
+
+def _padrao_contem(termo: str) -> str:
+    """Padrão LIKE para substring literal (LIKE já ignora maiúsculas em ASCII)."""
+    termo = str(termo).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{termo}%"
+
+
+def importar_csv(csv_path: str = DATA_PATH, db_path: str = SQLITE_PATH) -> int:
+    """Cria (ou recria) o banco a partir do CSV e do journal pendente. Retorna o número de linhas.
+
+    Deve rodar com o servidor parado (substitui o arquivo do banco).
+    """
+    # Valores como estão no CSV, igual ao backend CSV (busca, detalhe e agrupamentos batem)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        linhas = [[registro.get(c) or "" for c in COLUNAS] for registro in csv.DictReader(f)]
+
+    # data_corte só com espaços é pendente nos dois backends; aqui as consultas usam data_corte = ''
+    col_data_corte = COLUNAS.index("data_corte")
+    for linha in linhas:
+        if not linha[col_data_corte].strip():
+            linha[col_data_corte] = ""
+
+    # Conclusões ainda não compactadas no CSV
+    posicoes = {}
+    for pos, linha in enumerate(linhas):
+        posicoes.setdefault(linha[0], pos)
+    for entrada in ler_journal(csv_path + ".journal"):
+        pos = posicoes.get(entrada["numero"])
+        if pos is not None and entrada["op"] == "concluir":
+            linhas[pos][col_data_corte] = entrada["data_corte"]
+
+    # Datas e tempos interpretados uma vez, na importação; as datas sem ano são
+    # reinterpretadas quando o dia muda (_atualizar_referencia)
+    referencia = date.today().toordinal()
+    derivadas = [(COLUNAS.index(origem), converter) for _, origem, converter, _ in _DERIVADAS]
+    linhas = [linha + [converter(linha[posicao]) for posicao, converter in derivadas] for linha in linhas]
+
+    # Monta o banco em um arquivo temporário e troca de uma vez (rename atômico)
+    temp = db_path + ".tmp"
+    if os.path.exists(temp):
+        os.remove(temp)
+    con = sqlite3.connect(temp, isolation_level=None)
+    try:
+        con.executescript(_SCHEMA)
+        con.execute("BEGIN")
+        con.executemany(_SQL_INSERIR, linhas)
+        con.execute(_SQL_DEFINIR_REFERENCIA, (referencia,))
+        con.execute("COMMIT")
+        # Depois das linhas: um 'rebuild' só em vez de um trigger por linha
+        _criar_busca(con)
+        con.execute("PRAGMA journal_mode=WAL")
+    finally:
+        con.close()
+    for sufixo in ("-wal", "-shm"):
+        if os.path.exists(db_path + sufixo):
+            os.remove(db_path + sufixo)
+    os.replace(temp, db_path)
+    return len(linhas)
+
+
+if __name__ == "__main__":
+    # Uso: python -m app.armazenamento_sqlite [cortes.csv] [cortes.db]
+    origem = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    destino = sys.argv[2] if len(sys.argv) > 2 else SQLITE_PATH
+    total = importar_csv(origem, destino)
+    print(f"{total} cortes importados de {origem} para {destino}")
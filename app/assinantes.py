@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import RESUMO_ARQUIVO, RESUMO_ASSINANTES
+
+from .concorrencia import LockArquivo
+
+logger = logging.getLogger(__name__)
+
+
+class RegistroAssinantes:
+    """Números que recebem o resumo diário, persistidos em um JSON.
+
+    O arquivo também guarda o dia do último envio concluído e a reserva do
+    envio em andamento: com vários workers do uvicorn (ou após um restart)
+    o resumo do dia sai uma única vez, e um envio que falhou ou ficou pela
+    metade (reserva vencida) pode ser refeito. Cada processo relê o arquivo
+    quando o mtime muda; alterações são feitas sob flock. Os números de
+    RESUMO_ASSINANTES recebem sempre.
+    """
+
+    def __init__(self, arquivo: str = RESUMO_ARQUIVO, fixos: str = RESUMO_ASSINANTES):
+        self.arquivo = arquivo
+        self.fixos = {numero.strip() for numero in fixos.split(",") if numero.strip()}
+        self._estado: Dict = {"assinantes": [], "ultimo_envio": "", "reserva": {}}
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._arquivo = LockArquivo(arquivo + ".lock")
+
+    def listar(self) -> List[str]:
+        with self._lock:
+            self._atualizar()
+            return sorted(self.fixos.union(self._estado["assinantes"]))
+
+    def contem(self, numero: str) -> bool:
+        return numero in self.listar()
+
+    def adicionar(self, numero: str) -> bool:
+        """False se o número já era assinante."""
+        def alterar(estado: Dict) -> bool:
+            if numero in estado["assinantes"]:
+                return False
+            estado["assinantes"].append(numero)
+            return True
+        return self._alterar(alterar)
+
+    def remover(self, numero: str) -> bool:
+        """False se o número não era assinante."""
+        def alterar(estado: Dict) -> bool:
+            if numero not in estado["assinantes"]:
+                return False
+            estado["assinantes"].remove(numero)
+            return True
+        return self._alterar(alterar)
+
+    def reservar_envio(self, dia: str, validade: float) -> bool:
+        """Reserva o envio do dia por 'validade' segundos.
+
+        False se o resumo do dia já foi enviado ou se outro processo está enviando
+        (reserva dentro da validade e sem falha).
+        """
+        agora = time.time()
+
+        def alterar(estado: Dict) -> bool:
+            reserva = estado["reserva"]
+            if estado["ultimo_envio"] == dia:
+                return False
+            if reserva.get("dia") == dia and not reserva.get("erro") and reserva.get("expira", 0) > agora:
+                return False
+            estado["reserva"] = {"dia": dia, "expira": agora + validade, "erro": ""}
+            return True
+        return self._alterar(alterar)
+
+    def concluir_envio(self, dia: str) -> None:
+        def alterar(estado: Dict) -> bool:
+            estado["ultimo_envio"] = dia
+            estado["reserva"] = {}
+            return True
+        self._alterar(alterar)
+
+    def falhar_envio(self, dia: str, erro: str) -> None:
+        """Marca a reserva como falha: o envio do dia pode ser refeito."""
+        def alterar(estado: Dict) -> bool:
+            if estado["reserva"].get("dia") != dia:
+                return False
+            estado["reserva"]["erro"] = erro
+            return True
+        self._alterar(alterar)
+
+    def reserva_do_dia(self, dia: str) -> Optional[Dict]:
+        """Reserva de um envio do dia ainda não concluído ({"dia", "expira", "erro"}), ou None."""
+        with self._lock:
+            self._atualizar()
+            reserva = self._estado["reserva"]
+            if self._estado["ultimo_envio"] == dia or reserva.get("dia") != dia:
+                return None
+            return dict(reserva)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            self._atualizar()
+            return {
+                "assinantes": len(self.fixos.union(self._estado["assinantes"])),
+                "ultimo_envio": self._estado["ultimo_envio"],
+                "reserva_envio": self._estado["reserva"]
+            }
+
+    def _alterar(self, alterar: Callable[[Dict], bool]) -> bool:
+        with self._lock, self._arquivo.exclusivo():
+            self._atualizar()
+            alterado = alterar(self._estado)
+            if alterado:
+                self._gravar()
+            return alterado
+
+    def _atualizar(self) -> None:
+        try:
+            info = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return
+        # os.replace troca o inode: junto com o mtime, detecta gravações no mesmo instante
+        mtime = (info.st_ino, info.st_mtime_ns)
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                estado = json.load(f)
+            self._estado = {
+                "assinantes": list(estado.get("assinantes", [])),
+                "ultimo_envio": estado.get("ultimo_envio", ""),
+                "reserva": estado.get("reserva") or {}
+            }
+        except (ValueError, TypeError, AttributeError):
+            # Arquivo corrompido (editado à mão, disco cheio): segue com o último estado lido,
+            # que substitui o arquivo na próxima alteração; a cópia fica para recuperar à mão
+            logger.exception("%s corrompido; copia em %s.corrompido", self.arquivo, self.arquivo)
+            try:
+                shutil.copyfile(self.arquivo, self.arquivo + ".corrompido")
+            except OSError:
+                pass
+
+    def _gravar(self) -> None:
+        temp = self.arquivo + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self._estado, f, ensure_ascii=False, indent=2)
+        os.replace(temp, self.arquivo)
+        info = os.stat(self.arquivo)
+        self._mtime = (info.st_ino, info.st_mtime_ns)
+
+
+# Instância global
+assinantes_resumo = RegistroAssinantes()
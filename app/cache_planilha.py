@@ -0,0 +1,138 @@
+"""Cache binário da planilha já interpretada, gravado ao lado do CSV.
+
+Guarda as colunas codificadas (valores distintos + array de códigos) e os
+índices de busca em forma colunar. Evita o parse do texto e a montagem dos
+índices a cada start/recarga. O arquivo tem um cabeçalho JSON e seções
+alinhadas em 8 bytes, lidas de um mmap:
+
+    MAGICO | tamanho do cabeçalho (uint32) | cabeçalho JSON | seções
+
+O cabeçalho traz a chave do CSV de origem (tamanho, mtime, hash), a posição
+de cada seção e o hash das seções. Qualquer divergência invalida o cache e
+a planilha é lida do CSV.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .indices import IndiceHash, IndiceTrigramas
+
+MAGICO = b"CRTSNAP1"
+FORMATO = 1
+_ALINHAMENTO = 8
+_CLASSES_INDICE = {cls.__name__: cls for cls in (IndiceHash, IndiceTrigramas)}
+
+
+def gravar_cache(
+    caminho: str, tamanho: int, mtime_ns: int, hash: str, tabela, indices: Dict[str, IndiceHash]
+) -> bool:
+    """Grava o cache do CSV (tamanho, mtime, hash) de forma atômica.
+
+    Retorna False se o conteúdo não puder ser representado (valor com NUL).
+    """
+    secoes: List[Tuple[str, object]] = []
+    for coluna in tabela.colunas:
+        valores, codigos = tabela.codificar(coluna)
+        secoes.append((f"valores:{coluna}", valores))
+        secoes.append((f"codigos:{coluna}", codigos))
+    tipos_indice = {}
+    for nome, indice in indices.items():
+        tipos_indice[nome] = type(indice).__name__
+        for parte, valor in indice.exportar().items():
+            secoes.append((f"indice:{nome}:{parte}", valor))
+
+    blocos = []
+    mapa = {}
+    posicao = 0
+    for nome, valor in secoes:
+        if isinstance(valor, array):
+            dados, tipo, quantidade = valor.tobytes(), valor.typecode, len(valor)
+        else:
+            # Strings separadas por NUL: um valor com NUL não tem representação
+            if any("\0" in v for v in valor):
+                return False
+            dados, tipo, quantidade = "\0".join(valor).encode("utf-8"), "s", len(valor)
+        mapa[nome] = [posicao, len(dados), tipo, quantidade]
+        preenchimento = -len(dados) % _ALINHAMENTO
+        blocos.append(dados + b"\0" * preenchimento)
+        posicao += len(dados) + preenchimento
+    corpo = b"".join(blocos)
+
+    cabecalho = json.dumps({
+        "formato": FORMATO,
+        "ordem_bytes": sys.byteorder,
+        "tamanho": tamanho,
+        "mtime_ns": mtime_ns,
+        "hash": hash,
+        "colunas": list(tabela.colunas),
+        "indices": tipos_indice,
+        "secoes": mapa,
+        "hash_secoes": hashlib.blake2b(corpo, digest_size=16).hexdigest(),
+    }).encode("utf-8")
+    cabecalho += b" " * (-(len(MAGICO) + 4 + len(cabecalho)) % _ALINHAMENTO)
+
+    # Nome temporário por processo: vários workers podem gravar ao mesmo tempo
+    temp = f"{caminho}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(MAGICO)
+        f.write(struct.pack("<I", len(cabecalho)))
+        f.write(cabecalho)
+        f.write(corpo)
+    os.replace(temp, caminho)
+    return True
+
+
+def ler_cache(caminho: str, classe_tabela, tamanho: int, mtime_ns: int, hash: Optional[str] = None):
+    """Lê o cache se ele corresponder ao CSV: mesmo tamanho e mtime, ou mesmo hash.
+
+    Retorna (tabela, índices, hash do CSV) ou None se não houver cache válido.
+    """
+    try:
+        with open(caminho, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return _ler(mapa, classe_tabela, tamanho, mtime_ns, hash)
+    except (OSError, ValueError, KeyError, UnicodeDecodeError, struct.error):
+        # Ausente, truncado ou de outro formato: lê do CSV
+        return None
+
+
+def _ler(mapa: mmap.mmap, classe_tabela, tamanho: int, mtime_ns: int, hash: Optional[str]):
+    if mapa[:len(MAGICO)] != MAGICO:
+        return None
+    (n,) = struct.unpack_from("<I", mapa, len(MAGICO))
+    inicio_corpo = len(MAGICO) + 4 + n
+    meta = json.loads(mapa[len(MAGICO) + 4:inicio_corpo])
+    if meta["formato"] != FORMATO or meta["ordem_bytes"] != sys.byteorder:
+        return None
+    if (meta["tamanho"], meta["mtime_ns"]) != (tamanho, mtime_ns) and meta["hash"] != hash:
+        return None
+    with memoryview(mapa) as dados, dados[inicio_corpo:] as corpo:
+        if hashlib.blake2b(corpo, digest_size=16).hexdigest() != meta["hash_secoes"]:
+            return None
+
+    def secao(nome: str):
+        posicao, comprimento, tipo, quantidade = meta["secoes"][nome]
+        bruto = mapa[inicio_corpo + posicao:inicio_corpo + posicao + comprimento]
+        if tipo == "s":
+            return bruto.decode("utf-8").split("\0") if quantidade else []
+        valores = array(tipo)
+        valores.frombytes(bruto)
+        return valores
+
+    colunas = meta["colunas"]
+    tabela = classe_tabela.de_codigos(
+        colunas,
+        {c: secao(f"valores:{c}") for c in colunas},
+        {c: secao(f"codigos:{c}") for c in colunas},
+    )
+    indices = {}
+    for nome, tipo in meta["indices"].items():
+        prefixo = f"indice:{nome}:"
+        partes = {s[len(prefixo):]: secao(s) for s in meta["secoes"] if s.startswith(prefixo)}
+        indices[nome] = _CLASSES_INDICE[tipo].importar(partes)
+    return tabela, indices, meta["hash"]
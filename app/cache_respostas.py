@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import CACHE_RESPOSTAS_MAX
+
+
+class CacheRespostas:
+    """Cache LRU de respostas já montadas, válido para uma única versão dos dados.
+
+    A versão é lida antes de montar a resposta; quando ela muda o cache é
+    esvaziado, então uma resposta nunca sobrevive a uma escrita.
+    """
+
+    def __init__(self, maximo: int = CACHE_RESPOSTAS_MAX):
+        self.maximo = maximo
+        self.acertos = 0
+        self.falhas = 0
+        self._versao = None
+        self._respostas: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: Hashable, versao: int, montar: Callable[[], str]) -> str:
+        """Retorna a resposta em cache para (chave, versao) ou monta e guarda."""
+        with self._lock:
+            if versao != self._versao:
+                self._respostas.clear()
+                self._versao = versao
+            resposta = self._respostas.get(chave)
+            if resposta is not None:
+                self._respostas.move_to_end(chave)
+                self.acertos += 1
+                return resposta
+            self.falhas += 1
+
+        resposta = montar()
+
+        with self._lock:
+            # Se a versão mudou enquanto montava, a resposta não é guardada
+            if versao == self._versao:
+                self._respostas[chave] = resposta
+                if len(self._respostas) > self.maximo:
+                    self._respostas.popitem(last=False)
+        return resposta
+
+    def estatisticas(self) -> dict:
+        return {
+            "respostas": len(self._respostas),
+            "versao": self._versao,
+            "acertos": self.acertos,
+            "falhas": self.falhas
+        }
+
+
+# Instância global
+cache_respostas = CacheRespostas()
@@ -1,8 +1,137 @@
-from datetime import datetime
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from . import metricas
+from .armazenamento import ERRO_JA_CONCLUIDO, ERRO_GRAVACAO
 from .cortes_manager import cortes_manager
-
-
-def processar_comando(texto: str) -> str:
+from .cache_respostas import cache_respostas
+from .paginacao import cursores_paginacao
+from .assinantes import assinantes_resumo
+from .datas import ordinal_data
+from .historico import historico_conclusoes, inicio_do_dia
+from .tempos import formatar_minutos
+
+# Comandos que alteram a planilha
+COMANDOS_ESCRITA = {"concluir", "finalizar", "recarregar"}
+
+# Comandos só de leitura cuja resposta pode ir para o cache (apelido -> nome canônico)
+COMANDOS_CACHE = {
+    "status": "status",
+    "resumo": "resumo",
+    "pendentes": "pendentes",
+    "pendente": "pendentes",
+    "concluidos": "concluidos",
+    "concluido": "concluidos",
+    "detalhe": "detalhe",
+    "detalhes": "detalhe",
+    "lista": "lista",
+    "espessura": "espessura",
+    "opd": "opd",
+    "buscar": "buscar",
+    "carga": "carga",
+}
+
+
+# Limite de cortes em um único "concluir" (intervalos grandes por engano)
+LIMITE_CONCLUSAO_LOTE = 500
+
+# Comandos paginados com "mais": itens por página
+TAMANHO_PAGINA = {"pendentes": 15, "concluidos": 10, "lista": 10, "espessura": 15, "atrasados": 15, "vencendo": 15}
+
+# "carga <tipo>": agrupamento correspondente e quantos grupos mostrar
+AGRUPAMENTOS_CARGA = {
+    "espessura": "espessura", "espessuras": "espessura",
+    "lista": "lista_corte", "listas": "lista_corte",
+    "opd": "opd", "opds": "opd",
+}
+CARGA_MAX_GRUPOS = 15
+
+# Comandos por data de entrega: dependem do dia de hoje, não só da versão (fora do cache)
+COMANDOS_ENTREGA = {"atrasados", "vencendo"}
+
+# "vencendo" sem argumento e o maior prazo aceito, em dias
+VENCENDO_DIAS_PADRAO = 7
+VENCENDO_DIAS_MAX = 365
+
+# "producao" sem argumento e o maior período aceito, em dias
+PRODUCAO_DIAS_PADRAO = 7
+PRODUCAO_DIAS_MAX = 90
+
+DIAS_SEMANA = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
+
+
+def eh_escrita(texto: str) -> bool:
+    partes = texto.lower().split()
+    return bool(partes) and partes[0] in COMANDOS_ESCRITA
+
+
+def nome_comando(texto: str) -> str:
+    """Nome canônico do comando (rótulo das métricas); desconhecidos viram 'ajuda'."""
+    partes = texto.lower().split()
+    if not partes:
+        return "ajuda"
+    comando = partes[0]
+    if comando in COMANDOS_CACHE:
+        return COMANDOS_CACHE[comando]
+    if comando in COMANDOS_ESCRITA:
+        return "concluir" if comando == "finalizar" else comando
+    if comando in ("mais", "assinar", "sair", "producao") or comando in COMANDOS_ENTREGA:
+        return comando
+    return "ajuda"
+
+
+def processar_comando(texto: str, numero: str = "") -> str:
+    """Processa um comando; 'numero' (remetente) identifica o cursor do comando "mais"."""
+    inicio = time.perf_counter()
+    try:
+        return _executar_comando(texto, numero)
+    finally:
+        metricas.comando_duracao.observar(time.perf_counter() - inicio, nome_comando(texto))
+
+
+def processar_lote(textos: List[str], numeros_remetentes: Optional[List[str]] = None) -> List[str]:
+    """Processa vários comandos de uma vez (webhook com várias mensagens).
+
+    As conclusões do lote vão para o armazenamento em uma única gravação, e as
+    consultas rodam todas sobre o mesmo estado dos dados, já com essas conclusões.
+    """
+    respostas: List[Optional[str]] = [None] * len(textos)
+
+    # Todas as conclusões do lote (ids, intervalos, listas) em uma chamada
+    conclusoes = []
+    numeros = []
+    remetentes = []
+    for i, texto in enumerate(textos):
+        partes = texto.lower().split()
+        if len(partes) > 1 and partes[0] in ("concluir", "finalizar"):
+            alvos, erro = _alvos_conclusao(partes[1:])
+            if erro:
+                respostas[i] = erro
+                continue
+            conclusoes.append((i, len(numeros), alvos))
+            numeros.extend(alvos)
+            remetentes.extend([numeros_remetentes[i] if numeros_remetentes else ""] * len(alvos))
+    if numeros:
+        inicio = time.perf_counter()
+        resultados = cortes_manager.concluir_cortes(numeros, remetentes)
+        metricas.comando_duracao.observar(time.perf_counter() - inicio, "concluir")
+        for i, posicao, alvos in conclusoes:
+            respostas[i] = _resposta_conclusoes(alvos, resultados[posicao:posicao + len(alvos)])
+
+    # Demais escritas (recarregar) antes das consultas: precisam do lock de escrita
+    for i, texto in enumerate(textos):
+        if respostas[i] is None and eh_escrita(texto):
+            respostas[i] = processar_comando(texto)
+
+    with cortes_manager.leitura_consistente():
+        for i, texto in enumerate(textos):
+            if respostas[i] is None:
+                respostas[i] = processar_comando(texto, numeros_remetentes[i] if numeros_remetentes else "")
+    return respostas
+
+
+def _executar_comando(texto: str, numero: str = "") -> str:
     texto = texto.lower().strip()
     partes = texto.split()
 
@@ -14,24 +143,57 @@ def processar_comando(texto: str) -> str:
 
     comandos = {
         "status": cmd_status,
+        "resumo": cmd_resumo,
+        "assinar": lambda: cmd_assinar(numero),
+        "sair": lambda: cmd_sair(numero),
         "pendentes": cmd_pendentes,
         "pendente": cmd_pendentes,
-        "concluidos": cmd_concluidos,
-        "concluido": cmd_concluidos,
-        "concluir": lambda: cmd_concluir(args),
-        "finalizar": lambda: cmd_concluir(args),
+        "concluidos": lambda: cmd_concluidos_periodo(args) if args else cmd_concluidos(),
+        "concluido": lambda: cmd_concluidos_periodo(args) if args else cmd_concluidos(),
+        "concluir": lambda: cmd_concluir(args, numero),
+        "finalizar": lambda: cmd_concluir(args, numero),
         "detalhe": lambda: cmd_detalhe(args),
         "detalhes": lambda: cmd_detalhe(args),
         "lista": lambda: cmd_lista(args),
         "espessura": lambda: cmd_espessura(args),
         "opd": lambda: cmd_opd(args),
         "buscar": lambda: cmd_buscar(args),
+        "carga": lambda: cmd_carga(args),
+        "atrasados": cmd_atrasados,
+        "vencendo": lambda: cmd_vencendo(args),
+        "producao": lambda: cmd_producao(args),
         "recarregar": cmd_recarregar,
+        "mais": lambda: cmd_mais(numero),
         "ajuda": cmd_ajuda,
         "help": cmd_ajuda,
         "menu": cmd_ajuda,
     }
 
+    # "concluidos hoje/semana/<datas>" também depende do dia de hoje: fora do cache
+    if comando in COMANDOS_ENTREGA or (args and COMANDOS_CACHE.get(comando) == "concluidos"):
+        canonico = COMANDOS_CACHE.get(comando, comando)
+        marca = cortes_manager.marca_dados() if numero else None
+        resposta = comandos[comando]()
+        if numero:
+            cursores_paginacao.abrir(numero, canonico, args, marca, TAMANHO_PAGINA[canonico])
+        return resposta
+
+    if comando in COMANDOS_CACHE:
+        canonico = COMANDOS_CACHE[comando]
+        versao = cortes_manager.versao
+        # O cursor guarda a marca dos dados, que vale em todos os workers (a versão é do processo)
+        paginado = numero and canonico in TAMANHO_PAGINA and (args or canonico in ("pendentes", "concluidos"))
+        marca = cortes_manager.marca_dados() if paginado else None
+        chave = (canonico, tuple(args))
+        if canonico == "detalhe":
+            # "Concluido em" vem do histórico, gravado depois da conclusão (que já muda a versão)
+            chave += (historico_conclusoes.versao(),)
+        resposta = cache_respostas.obter(chave, versao, comandos[comando])
+        # O cursor é do remetente: abre mesmo quando a resposta veio do cache
+        if paginado:
+            cursores_paginacao.abrir(numero, canonico, args, marca, TAMANHO_PAGINA[canonico])
+        return resposta
+
     if comando in comandos:
         func = comandos[comando]
         if callable(func):
@@ -53,51 +215,341 @@ _Digite *pendentes* para ver detalhes._"""
     return msg
 
 
-def cmd_pendentes() -> str:
-    pendentes = cortes_manager.get_pendentes(15)
+def cmd_resumo() -> str:
+    status = cortes_manager.get_status_geral()
+    msg = f"""*RESUMO DOS CORTES*
+
+Total: {status["total"]}
+Concluidos: {status["concluidos"]}
+Pendentes: {status["pendentes"]}
+"""
+    if status["espessuras"]:
+        msg += "\n*Pendentes por espessura:*\n"
+        for espessura, quantidade in status["espessuras"].items():
+            msg += f"{espessura}mm: {quantidade}\n"
+
+    msg += "\n_Envie *assinar* para receber todo dia ou *sair* para parar._"
+    return msg
+
+
+def cmd_assinar(numero: str) -> str:
+    if not numero:
+        return "Nao foi possivel identificar o seu numero."
+    if not assinantes_resumo.adicionar(numero):
+        return "Voce ja recebe o resumo diario."
+    return "Pronto! Voce vai receber o resumo diario dos cortes.\n\n_Envie *sair* para cancelar._"
+
+
+def cmd_sair(numero: str) -> str:
+    if not numero or not assinantes_resumo.remover(numero):
+        return "Voce nao esta inscrito no resumo diario."
+    return "Voce nao vai mais receber o resumo diario.\n\n_Envie *assinar* para voltar._"
+
+
+def cmd_pendentes(inicio: int = 0) -> str:
+    tamanho = TAMANHO_PAGINA["pendentes"]
+    # Um a mais só para saber se existe a próxima página
+    pendentes = cortes_manager.get_pendentes(tamanho + 1, inicio)
     if not pendentes:
-        return "Nenhum corte pendente!"
+        return "Nao ha mais cortes pendentes." if inicio else "Nenhum corte pendente!"
+    mais = len(pendentes) > tamanho
+    pendentes = pendentes[:tamanho]
 
-    msg = f"*CORTES PENDENTES ({len(pendentes)})*
-"
+    msg = f"*CORTES PENDENTES ({_faixa(inicio, len(pendentes))})*\n"
     for corte in pendentes:
-        msg += f"
-*{corte['numero']}* - Lista {corte['lista_corte']} - {corte['espessura']}mm"
+        msg += f"\n*{corte['numero']}* - Lista {corte['lista_corte']} - {corte['espessura']}mm"
         if corte["tempo_corte"]:
             msg += f" - {corte['tempo_corte']}"
         if corte["opd"]:
-            msg += f"
-   OPD: {corte['opd']}"
-
-    msg += "
+            msg += f"\n   OPD: {corte['opd']}"
 
-_Para concluir:_ *concluir <numero>*"
-    return msg
+    msg += "\n\n_Para concluir:_ *concluir <numero>*"
+    return msg + _rodape_mais(mais)
 
 
-def cmd_concluidos() -> str:
-    concluidos = cortes_manager.get_concluidos(10)
+def cmd_concluidos(inicio: int = 0) -> str:
+    tamanho = TAMANHO_PAGINA["concluidos"]
+    # Vem na ordem do arquivo: o item extra, se houver, é o mais antigo
+    concluidos = cortes_manager.get_concluidos(tamanho + 1, inicio)
     if not concluidos:
-        return "Nenhum corte concluido ainda."
+        return "Nao ha mais cortes concluidos." if inicio else "Nenhum corte concluido ainda."
+    mais = len(concluidos) > tamanho
+    concluidos = concluidos[-tamanho:]
 
-    msg = f"*CORTES CONCLUIDOS (ultimos {len(concluidos)})*
-"
+    msg = f"*CORTES CONCLUIDOS (ultimos {_faixa(inicio, len(concluidos))})*\n"
     for corte in concluidos:
-        msg += f"
-*{corte['numero']}* - Lista {corte['lista_corte']} - Corte: {corte['data_corte']}"
+        msg += f"\n*{corte['numero']}* - Lista {corte['lista_corte']} - Corte: {corte['data_corte']}"
+
+    if not inicio:
+        msg += "\n\n_Por data de conclusao:_ *concluidos hoje*, *concluidos semana*"
+    return msg + _rodape_mais(mais)
+
+
+def cmd_concluidos_periodo(args: list, inicio: int = 0) -> str:
+    periodo, erro = _periodo_concluidos(args)
+    if erro:
+        return erro
+    desde, ate, titulo = periodo
+
+    # Range no índice por tempo do histórico, da conclusão mais recente para a mais antiga
+    tamanho = TAMANHO_PAGINA["concluidos"]
+    instante_desde, instante_ate = inicio_do_dia(desde), inicio_do_dia(ate + timedelta(days=1))
+    total = historico_conclusoes.contar(instante_desde, instante_ate)
+    conclusoes = historico_conclusoes.periodo(instante_desde, instante_ate, tamanho, inicio)
+    if not conclusoes:
+        return "Nao ha mais cortes concluidos." if inicio else f"Nenhum corte concluido {titulo.lower()}."
+
+    formato = "%H:%M" if desde == ate else "%d/%m %H:%M"
+    msg = f"*CONCLUIDOS {titulo} ({inicio + 1}-{inicio + len(conclusoes)} de {total})*\n"
+    for conclusao in conclusoes:
+        msg += f"\n*{conclusao['numero']}* - {datetime.fromtimestamp(conclusao['instante']):{formato}}"
+        corte = cortes_manager.get_detalhe(conclusao["numero"])
+        if corte:
+            msg += f" - Lista {corte['lista_corte']} - {corte['espessura']}mm"
+
+    return msg + _rodape_mais(inicio + len(conclusoes) < total)
+
+
+def _periodo_concluidos(args: list) -> Tuple[Optional[Tuple[date, date, str]], Optional[str]]:
+    """Período de "concluidos": hoje, ontem, semana, mes ou datas (15/10, 01/10 a 15/10).
+
+    Retorna ((desde, ate, título), None), com os dois dias inclusive, ou (None, mensagem de erro).
+    """
+    hoje = date.today()
+    if args[0] == "hoje":
+        return (hoje, hoje, "HOJE"), None
+    if args[0] == "ontem":
+        ontem = hoje - timedelta(days=1)
+        return (ontem, ontem, "ONTEM"), None
+    if args[0] == "semana":
+        return (hoje - timedelta(days=hoje.weekday()), hoje, "NA SEMANA"), None
+    if args[0] in ("mes", "mês"):
+        return (hoje.replace(day=1), hoje, "NO MES"), None
+
+    termos = [a for a in args if a not in ("periodo", "de", "a", "ate")]
+    dias = [ordinal_data(termo, hoje) for termo in termos]
+    if not 1 <= len(dias) <= 2 or min(dias) < 1:
+        return None, "Use *concluidos hoje*, *ontem*, *semana*, *mes* ou datas.\n\n_Exemplo:_ *concluidos 01/10 a 15/10*"
+    desde, ate = date.fromordinal(min(dias)), date.fromordinal(max(dias))
+    if desde == ate:
+        return (desde, ate, f"EM {desde:%d/%m/%y}"), None
+    return (desde, ate, f"DE {desde:%d/%m} A {ate:%d/%m/%y}"), None
+
+
+def cmd_producao(args: list) -> str:
+    if args and not (args[0].isdigit() and 1 <= int(args[0]) <= PRODUCAO_DIAS_MAX):
+        return f"Informe o periodo em dias (ate {PRODUCAO_DIAS_MAX}).\n\n_Exemplo:_ *producao 30*"
+    quantidade = int(args[0]) if args else PRODUCAO_DIAS_PADRAO
+
+    hoje = date.today()
+    dias = historico_conclusoes.por_dia(hoje - timedelta(days=quantidade - 1), hoje)
+    total = sum(concluidos for _, concluidos in dias)
+    if not total:
+        return f"Nenhum corte concluido nos ultimos {quantidade} dias."
+
+    msg = f"*PRODUCAO - ULTIMOS {quantidade} DIAS*\n"
+    for dia, concluidos in reversed(dias):
+        msg += f"\n{dia:%d/%m} ({DIAS_SEMANA[dia.weekday()]}): {concluidos}"
+    melhor, maximo = max(dias, key=lambda item: item[1])
+    ativos = sum(1 for _, concluidos in dias if concluidos)
+    msg += f"\n\nTotal: {total} cortes"
+    msg += f"\nMedia: {total / quantidade:.1f} por dia ({total / ativos:.1f} nos {ativos} dias com producao)"
+    msg += f"\nMelhor dia: {melhor:%d/%m} ({maximo})"
+    return msg
+
+
+def cmd_carga(args: list) -> str:
+    tipo = args[0] if args else "espessura"
+    if tipo not in AGRUPAMENTOS_CARGA:
+        return "Use *carga*, *carga lista*, *carga opd* ou *carga espessura*.\n\n_Exemplo:_ *carga lista 219*"
+    agrupamento = AGRUPAMENTOS_CARGA[tipo]
+    rotulo = "OPD" if agrupamento == "opd" else tipo.rstrip("s").capitalize()
+    carga = cortes_manager.get_carga(agrupamento)
 
+    # Um grupo só: "carga lista 219"
+    if len(args) > 1:
+        valor = " ".join(args[1:])
+        grupo = next((g for chave, g in carga["grupos"].items() if chave.strip().lower() == valor), None)
+        if grupo is None:
+            return f"Nenhum corte pendente para {rotulo.lower()} *{valor}*."
+        return f"*CARGA - {rotulo} {valor}*\n\n" + _texto_carga(grupo)
+
+    if not carga["cortes"] and not carga["sem_tempo"]:
+        return "Nenhum corte pendente!"
+    msg = f"*CARGA PENDENTE*\n\n{_texto_carga(carga)}\n\n*Por {rotulo.lower()}:*"
+    for chave, grupo in list(carga["grupos"].items())[:CARGA_MAX_GRUPOS]:
+        nome = f"{chave}mm" if agrupamento == "espessura" else (chave or "(sem)")
+        msg += f"\n{nome}: {formatar_minutos(grupo['minutos'])} ({grupo['cortes'] + grupo['sem_tempo']} cortes)"
+    restantes = len(carga["grupos"]) - CARGA_MAX_GRUPOS
+    if restantes > 0:
+        msg += f"\n_... e mais {restantes}_"
     return msg
 
 
-def cmd_concluir(args: list) -> str:
-    if not args:
-        return "Informe o numero do corte.
+def _texto_carga(grupo: dict) -> str:
+    msg = f"Tempo: {formatar_minutos(grupo['minutos'])} ({grupo['cortes']} cortes)"
+    if grupo["sem_tempo"]:
+        msg += f"\nSem tempo informado: {grupo['sem_tempo']} cortes"
+    return msg
 
-_Exemplo:_ *concluir 4835*"
 
-    numero = args[0]
-    resultado = cortes_manager.concluir_corte(numero)
+def cmd_atrasados(inicio: int = 0) -> str:
+    tamanho = TAMANHO_PAGINA["atrasados"]
+    hoje = date.today()
+    cortes = cortes_manager.get_por_entrega(hoje - timedelta(days=1), None, tamanho + 1, inicio)
+    if not cortes:
+        msg = "Nao ha mais cortes atrasados." if inicio else "Nenhum corte atrasado!"
+    else:
+        mais = len(cortes) > tamanho
+        cortes = cortes[:tamanho]
+        msg = f"*CORTES ATRASADOS ({_faixa(inicio, len(cortes))})*\n"
+        msg += _linhas_entrega(cortes) + _rodape_mais(mais)
+
+    # Datas que não deu para interpretar ficam de fora da consulta: avisa na primeira página
+    if not inicio:
+        invalidas = len(cortes_manager.get_entregas_invalidas())
+        if invalidas:
+            msg += f"\n\n_{invalidas} pendente(s) com data de entrega nao reconhecida._"
+    return msg
 
+
+def cmd_vencendo(args: list, inicio: int = 0) -> str:
+    if args and not (args[0].isdigit() and int(args[0]) <= VENCENDO_DIAS_MAX):
+        return f"Informe o prazo em dias (ate {VENCENDO_DIAS_MAX}).\n\n_Exemplo:_ *vencendo 7*"
+    dias = int(args[0]) if args else VENCENDO_DIAS_PADRAO
+
+    tamanho = TAMANHO_PAGINA["vencendo"]
+    hoje = date.today()
+    cortes = cortes_manager.get_por_entrega(hoje + timedelta(days=dias), hoje, tamanho + 1, inicio)
+    if not cortes:
+        if inicio:
+            return "Nao ha mais cortes vencendo."
+        return f"Nenhum corte pendente com entrega nos proximos {dias} dias."
+    mais = len(cortes) > tamanho
+    cortes = cortes[:tamanho]
+
+    msg = f"*VENCENDO EM ATE {dias} DIAS ({_faixa(inicio, len(cortes))})*\n"
+    return msg + _linhas_entrega(cortes) + _rodape_mais(mais)
+
+
+def _linhas_entrega(cortes: List[dict]) -> str:
+    msg = ""
+    for corte in cortes:
+        msg += f"\n*{corte['numero']}* - Entrega: {corte['data_entrega']} - Lista {corte['lista_corte']} - {corte['espessura']}mm"
+        if corte["opd"]:
+            msg += f"\n   OPD: {corte['opd']}"
+    return msg
+
+
+def _faixa(inicio: int, quantidade: int) -> str:
+    """Faixa do título: "15" na primeira página, "16-30" nas seguintes."""
+    return str(quantidade) if not inicio else f"{inicio + 1}-{inicio + quantidade}"
+
+
+def _rodape_mais(mais: bool) -> str:
+    return "\n\n_Proxima pagina:_ *mais*" if mais else ""
+
+
+def cmd_mais(numero: str) -> str:
+    cursor = cursores_paginacao.obter(numero) if numero else None
+    if cursor is None:
+        return "Nada para continuar.\n\n_Envie_ *pendentes*, *concluidos*, *lista <num>* _ou_ *espessura <mm>*."
+
+    comando = " ".join([cursor.comando, *cursor.args])
+    # Versão conferida e página lida sobre o mesmo estado dos dados
+    with cortes_manager.leitura_consistente():
+        if cursor.versao != cortes_manager.marca_dados():
+            cursores_paginacao.remover(numero)
+            return f"Os dados mudaram desde a consulta.\n\n_Envie_ *{comando}* _de novo._"
+
+        tamanho = TAMANHO_PAGINA[cursor.comando]
+        if cursor.comando == "pendentes":
+            msg = cmd_pendentes(cursor.posicao)
+        elif cursor.comando == "concluidos":
+            msg = cmd_concluidos_periodo(cursor.args, cursor.posicao) if cursor.args else cmd_concluidos(cursor.posicao)
+        elif cursor.comando == "atrasados":
+            msg = cmd_atrasados(cursor.posicao)
+        elif cursor.comando == "vencendo":
+            msg = cmd_vencendo(cursor.args, cursor.posicao)
+        else:
+            if cursor.itens is None:
+                if cursor.comando == "lista":
+                    cursor.itens = [c for c in cortes_manager.get_por_lista(cursor.args[0]) if not c["data_corte"]]
+                else:
+                    cursor.itens = cortes_manager.get_por_espessura(cursor.args[0])
+            msg = _pagina_itens(cursor, tamanho)
+    cursores_paginacao.avancar(numero, cursor, tamanho)
+    return msg
+
+
+def _pagina_itens(cursor, tamanho: int) -> str:
+    """Página seguinte de lista/espessura, a partir do resultado guardado no cursor."""
+    pagina = cursor.itens[cursor.posicao:cursor.posicao + tamanho]
+    if not pagina:
+        return "Nao ha mais cortes pendentes."
+
+    faixa = f"{cursor.posicao + 1}-{cursor.posicao + len(pagina)} de {len(cursor.itens)}"
+    if cursor.comando == "lista":
+        msg = f"*LISTA {cursor.args[0]} - Pendentes {faixa}*\n"
+        for c in pagina:
+            msg += f"\n- {c['numero']} ({c['espessura']}mm)"
+    else:
+        msg = f"*PENDENTES - {cursor.args[0]}mm ({faixa})*\n"
+        for c in pagina:
+            msg += f"\n*{c['numero']}* - Lista {c['lista_corte']}"
+    return msg + _rodape_mais(cursor.posicao + tamanho < len(cursor.itens))
+
+
+def cmd_concluir(args: list, numero: str = "") -> str:
+    if not args:
+        return "Informe o numero do corte.\n\n_Exemplo:_ *concluir 4835*"
+
+    numeros, erro = _alvos_conclusao(args)
+    if erro:
+        return erro
+    # O remetente vai para o histórico de conclusões
+    return _resposta_conclusoes(numeros, cortes_manager.concluir_cortes(numeros, [numero] * len(numeros)))
+
+
+def _alvos_conclusao(args: list) -> Tuple[List[str], Optional[str]]:
+    """Números a concluir: ids, intervalos (4912-4915), ou 'lista <n>' / 'opd <n>'.
+
+    Retorna (numeros, None) ou ([], mensagem de erro).
+    """
+    if args[0] in ("lista", "opd"):
+        tipo = args[0]
+        valor = " ".join(args[1:])
+        if not valor:
+            return [], f"Informe a {tipo}.\n\n_Exemplo:_ *concluir {tipo} 219*"
+        # A consulta é por "contém"; para concluir, só a lista/OPD exata
+        if tipo == "lista":
+            cortes = [c for c in cortes_manager.get_por_lista(valor) if c["lista_corte"].strip().lower() == valor]
+        else:
+            cortes = [c for c in cortes_manager.get_por_opd(valor) if c["opd"].strip().lower() == valor]
+        if not cortes:
+            return [], f"Nenhum corte encontrado para {tipo} *{valor}*."
+        return list(dict.fromkeys(c["numero"] for c in cortes)), None
+
+    numeros = []
+    for termo in re.split(r"[,\s]+", " ".join(args)):
+        inicio, separador, fim = termo.partition("-")
+        if not separador:
+            if termo:
+                numeros.append(termo)
+            continue
+        if not (inicio.isdigit() and fim.isdigit()) or int(inicio) > int(fim):
+            return [], f"Intervalo invalido: *{termo}*\n\n_Exemplo:_ *concluir 4912-4915*"
+        # O tamanho é conferido antes de gerar os números: "1-100000000" não monta a lista
+        if len(numeros) + int(fim) - int(inicio) + 1 > LIMITE_CONCLUSAO_LOTE:
+            return [], f"Maximo de {LIMITE_CONCLUSAO_LOTE} cortes por comando."
+        numeros.extend(str(n) for n in range(int(inicio), int(fim) + 1))
+
+    if len(numeros) > LIMITE_CONCLUSAO_LOTE:
+        return [], f"Maximo de {LIMITE_CONCLUSAO_LOTE} cortes por comando."
+    return list(dict.fromkeys(numeros)), None
+
+
+def _resposta_conclusao(resultado: dict) -> str:
     if not resultado["sucesso"]:
         return f"Erro: {resultado['erro']}"
 
@@ -109,11 +561,43 @@ Espessura: {corte['espessura']}mm
 Data: {corte['data_corte']}"""
 
 
+def _resposta_conclusoes(numeros: List[str], resultados: List[dict]) -> str:
+    if len(numeros) == 1:
+        return _resposta_conclusao(resultados[0])
+
+    concluidos, ja_concluidos, nao_gravados, nao_encontrados = [], [], [], []
+    for numero, resultado in zip(numeros, resultados):
+        if resultado["sucesso"]:
+            concluidos.append(numero)
+        elif resultado["erro"] == ERRO_JA_CONCLUIDO:
+            ja_concluidos.append(numero)
+        elif resultado["erro"] == ERRO_GRAVACAO:
+            nao_gravados.append(numero)
+        else:
+            nao_encontrados.append(numero)
+
+    msg = f"*CONCLUSAO EM LOTE ({len(numeros)})*\n"
+    for titulo, lista in (
+        ("Concluidos", concluidos),
+        ("Ja concluidos", ja_concluidos),
+        ("Nao encontrados", nao_encontrados),
+        ("Falha ao gravar, envie de novo", nao_gravados),
+    ):
+        if lista:
+            msg += f"\n*{titulo} ({len(lista)}):* {_resumir_numeros(lista)}"
+    return msg
+
+
+def _resumir_numeros(numeros: List[str], maximo: int = 30) -> str:
+    texto = ", ".join(numeros[:maximo])
+    if len(numeros) > maximo:
+        texto += f" e mais {len(numeros) - maximo}"
+    return texto
+
+
 def cmd_detalhe(args: list) -> str:
     if not args:
-        return "Informe o numero do corte.
-
-_Exemplo:_ *detalhe 4835*"
+        return "Informe o numero do corte.\n\n_Exemplo:_ *detalhe 4835*"
 
     numero = args[0]
     corte = cortes_manager.get_detalhe(numero)
@@ -122,8 +606,9 @@ _Exemplo:_ *detalhe 4835*"
         return f"Corte *{numero}* nao encontrado."
 
     status = "CONCLUIDO" if corte["data_corte"] else "PENDENTE"
+    conclusao = historico_conclusoes.ultima(corte["numero"]) if corte["data_corte"] else None
 
-    return f"""*DETALHES DO CORTE*
+    msg = f"""*DETALHES DO CORTE*
 
 Numero: {corte['numero']}
 Lista: {corte['lista_corte']}
@@ -133,13 +618,16 @@ OPD: {corte['opd']}
 Entrega: {corte['data_entrega']}
 Status: {status}
 Data Corte: {corte['data_corte'] or '-'}"""
+    if conclusao:
+        msg += f"\nConcluido em: {datetime.fromtimestamp(conclusao['instante']):%d/%m/%y %H:%M}"
+        if conclusao["remetente"]:
+            msg += f" por {conclusao['remetente']}"
+    return msg
 
 
 def cmd_lista(args: list) -> str:
     if not args:
-        return "Informe o numero da lista.
-
-_Exemplo:_ *lista 219*"
+        return "Informe o numero da lista.\n\n_Exemplo:_ *lista 219*"
 
     lista = args[0]
     cortes = cortes_manager.get_por_lista(lista)
@@ -150,26 +638,20 @@ _Exemplo:_ *lista 219*"
     pendentes = [c for c in cortes if not c["data_corte"]]
     concluidos = [c for c in cortes if c["data_corte"]]
 
-    msg = f"*LISTA {lista}*
-"
-    msg += f"Total: {len(cortes)} | Pendentes: {len(pendentes)} | Concluidos: {len(concluidos)}
-"
+    msg = f"*LISTA {lista}*\n"
+    msg += f"Total: {len(cortes)} | Pendentes: {len(pendentes)} | Concluidos: {len(concluidos)}\n"
 
     if pendentes:
-        msg += "
-*Pendentes:*"
-        for c in pendentes[:10]:
-            msg += f"
-- {c['numero']} ({c['espessura']}mm)"
+        msg += "\n*Pendentes:*"
+        for c in pendentes[:TAMANHO_PAGINA["lista"]]:
+            msg += f"\n- {c['numero']} ({c['espessura']}mm)"
 
-    return msg
+    return msg + _rodape_mais(len(pendentes) > TAMANHO_PAGINA["lista"])
 
 
 def cmd_espessura(args: list) -> str:
     if not args:
-        return "Informe a espessura.
-
-_Exemplo:_ *espessura 6.35*"
+        return "Informe a espessura.\n\n_Exemplo:_ *espessura 6.35*"
 
     espessura = args[0]
     cortes = cortes_manager.get_por_espessura(espessura)
@@ -177,20 +659,16 @@ _Exemplo:_ *espessura 6.35*"
     if not cortes:
         return f"Nenhum corte pendente com espessura *{espessura}*."
 
-    msg = f"*PENDENTES - {espessura}mm ({len(cortes)})*
-"
-    for c in cortes[:15]:
-        msg += f"
-*{c['numero']}* - Lista {c['lista_corte']}"
+    msg = f"*PENDENTES - {espessura}mm ({len(cortes)})*\n"
+    for c in cortes[:TAMANHO_PAGINA["espessura"]]:
+        msg += f"\n*{c['numero']}* - Lista {c['lista_corte']}"
 
-    return msg
+    return msg + _rodape_mais(len(cortes) > TAMANHO_PAGINA["espessura"])
 
 
 def cmd_opd(args: list) -> str:
     if not args:
-        return "Informe a OPD.
-
-_Exemplo:_ *opd 290*"
+        return "Informe a OPD.\n\n_Exemplo:_ *opd 290*"
 
     opd = args[0]
     cortes = cortes_manager.get_por_opd(opd)
@@ -201,26 +679,20 @@ _Exemplo:_ *opd 290*"
     pendentes = [c for c in cortes if not c["data_corte"]]
     concluidos = [c for c in cortes if c["data_corte"]]
 
-    msg = f"*OPD {opd}*
-"
-    msg += f"Total: {len(cortes)} | Pendentes: {len(pendentes)} | Concluidos: {len(concluidos)}
-"
+    msg = f"*OPD {opd}*\n"
+    msg += f"Total: {len(cortes)} | Pendentes: {len(pendentes)} | Concluidos: {len(concluidos)}\n"
 
     if pendentes:
-        msg += "
-*Pendentes:*"
+        msg += "\n*Pendentes:*"
         for c in pendentes[:10]:
-            msg += f"
-- {c['numero']} ({c['espessura']}mm)"
+            msg += f"\n- {c['numero']} ({c['espessura']}mm)"
 
     return msg
 
 
 def cmd_buscar(args: list) -> str:
     if not args:
-        return "Informe o termo de busca.
-
-_Exemplo:_ *buscar 4835*"
+        return "Informe o termo de busca.\n\n_Exemplo:_ *buscar 4835*"
 
     termo = " ".join(args)
     resultados = cortes_manager.buscar(termo)
@@ -228,12 +700,10 @@ _Exemplo:_ *buscar 4835*"
     if not resultados:
         return f"Nenhum resultado para *{termo}*."
 
-    msg = f"*RESULTADOS ({len(resultados)})*
-"
+    msg = f"*RESULTADOS ({len(resultados)})*\n"
     for c in resultados:
         status = "OK" if c["data_corte"] else "PEND"
-        msg += f"
-[{status}] *{c['numero']}* - Lista {c['lista_corte']}"
+        msg += f"\n[{status}] *{c['numero']}* - Lista {c['lista_corte']}"
 
     return msg
 
@@ -252,14 +722,24 @@ def cmd_ajuda() -> str:
     return """*COMANDOS DISPONIVEIS*
 
 *status* - Resumo geral
+*resumo* - Status e pendentes por espessura
+*assinar* / *sair* - Resumo diario automatico
 *pendentes* - Lista pendentes
 *concluidos* - Lista concluidos
+*concluidos hoje* / *semana* / *<data> a <data>* - Por data de conclusao
+*producao <dias>* - Cortes concluidos por dia
 *concluir <num>* - Marca como feito
+*concluir <num> <num>* ou *<ini>-<fim>* - Varios de uma vez
+*concluir lista <num>* / *opd <num>* - Lista ou OPD inteira
 *detalhe <num>* - Detalhes do corte
 *lista <num>* - Cortes de uma lista
 *espessura <mm>* - Filtra por espessura
 *opd <num>* - Cortes de uma OPD
 *buscar <termo>* - Busca geral
+*carga* / *carga lista* / *carga opd* - Tempo de corte pendente
+*atrasados* - Pendentes com entrega vencida
+*vencendo <dias>* - Entregas nos proximos dias
+*mais* - Proxima pagina da ultima lista
 *recarregar* - Atualiza planilha
 
 _Exemplo:_ *concluir 4835*"""
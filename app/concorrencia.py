@@ -0,0 +1,108 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos (use um único worker)
+    fcntl = None
+
+
+class LockLeituraEscrita:
+    """Lock de leitores-escritor: várias leituras em paralelo, escrita exclusiva.
+
+    Dá preferência ao escritor: quando há escrita esperando, novas leituras
+    aguardam, para que um fluxo contínuo de leituras não segure as escritas.
+    Leituras aninhadas na mesma thread são reentrantes (uma leitura externa
+    pode agrupar várias consultas); a escrita não é.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._leitores = 0
+        self._escrevendo = False
+        self._escritores_esperando = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def leitura(self):
+        profundidade = getattr(self._local, "profundidade", 0)
+        if profundidade:
+            # Já lendo nesta thread: esperar o escritor aqui seria um deadlock
+            self._local.profundidade = profundidade + 1
+            try:
+                yield
+            finally:
+                self._local.profundidade = profundidade
+            return
+
+        with self._cond:
+            while self._escrevendo or self._escritores_esperando:
+                self._cond.wait()
+            self._leitores += 1
+        self._local.profundidade = 1
+        try:
+            yield
+        finally:
+            self._local.profundidade = 0
+            with self._cond:
+                self._leitores -= 1
+                if not self._leitores:
+                    self._cond.notify_all()
+
+    def lendo(self) -> bool:
+        """Indica se a thread atual está dentro de uma leitura."""
+        return bool(getattr(self._local, "profundidade", 0))
+
+    @contextmanager
+    def escrita(self):
+        with self._cond:
+            self._escritores_esperando += 1
+            while self._escrevendo or self._leitores:
+                self._cond.wait()
+            self._escritores_esperando -= 1
+            self._escrevendo = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._escrevendo = False
+                self._cond.notify_all()
+
+
+class LockArquivo:
+    """Lock exclusivo entre processos (flock em um arquivo auxiliar).
+
+    O flock vale por descritor aberto, e as threads do processo compartilham o
+    descritor: por isso também há um lock de thread. É reentrante na mesma thread.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._thread = threading.RLock()
+        self._profundidade = 0
+        self._fd = None
+
+    @contextmanager
+    def exclusivo(self):
+        with self._thread:
+            self._profundidade += 1
+            try:
+                if self._profundidade == 1:
+                    self._travar()
+                yield
+            finally:
+                self._profundidade -= 1
+                if not self._profundidade:
+                    self._destravar()
+
+    def _travar(self) -> None:
+        if fcntl is None:
+            return
+        if self._fd is None:
+            self._fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _destravar(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
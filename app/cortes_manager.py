@@ -1,97 +1,119 @@
-import pandas as pd
-from datetime import datetime
+from datetime import date
 from typing import Optional, List, Dict
+import logging
 import os
 import sys
+import threading
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import DATA_PATH
+from config import DATA_PATH, ARMAZENAMENTO, SQLITE_PATH
+
+from .armazenamento import Armazenamento
+from .historico import historico_conclusoes
+
+logger = logging.getLogger(__name__)
+
+
+def criar_armazenamento(tipo: str = ARMAZENAMENTO, csv_path: str = DATA_PATH) -> Armazenamento:
+    """Cria o backend configurado ("csv" ou "sqlite")."""
+    if tipo == "sqlite":
+        from .armazenamento_sqlite import ArmazenamentoSQLite
+        return ArmazenamentoSQLite(SQLITE_PATH, csv_path=csv_path)
+    if tipo == "csv":
+        from .armazenamento_csv import ArmazenamentoCSV
+        return ArmazenamentoCSV(csv_path)
+    raise ValueError(f"Armazenamento desconhecido: {tipo}")
 
 
 class CortesManager:
-    def __init__(self, csv_path: str = DATA_PATH):
+    def __init__(self, csv_path: str = DATA_PATH, armazenamento: Optional[Armazenamento] = None):
         self.csv_path = csv_path
-        self.df = self._carregar_planilha()
-
-    def _carregar_planilha(self) -> pd.DataFrame:
-        if os.path.exists(self.csv_path):
-            df = pd.read_csv(self.csv_path, dtype=str)
-            df = df.fillna("")
-            return df
-        else:
-            df = pd.DataFrame(columns=[
-                "numero", "lista_corte", "espessura", "tempo_corte",
-                "opd", "data_entrega", "data_corte"
-            ])
-            df.to_csv(self.csv_path, index=False)
-            return df
+        self._armazenamento = armazenamento
+        self._lock = threading.Lock()
+
+    @property
+    def armazenamento(self) -> Armazenamento:
+        """Backend, criado no primeiro uso: importar o módulo não lê a planilha."""
+        if self._armazenamento is None:
+            with self._lock:
+                if self._armazenamento is None:
+                    self._armazenamento = criar_armazenamento(csv_path=self.csv_path)
+        return self._armazenamento
+
+    def iniciar(self) -> None:
+        """Carrega os dados antecipadamente (chamado em segundo plano no startup)."""
+        self.armazenamento
+
+    @property
+    def versao(self) -> int:
+        return self.armazenamento.versao()
+
+    def marca_dados(self) -> str:
+        return self.armazenamento.marca_dados()
 
     def recarregar(self) -> None:
-        self.df = self._carregar_planilha()
+        self.armazenamento.recarregar()
 
-    def _salvar(self) -> None:
-        self.df.to_csv(self.csv_path, index=False)
+    def planilha_alterada(self) -> bool:
+        return self.armazenamento.planilha_alterada()
 
-    def _is_concluido(self, data_corte: str) -> bool:
-        return data_corte is not None and str(data_corte).strip() != ""
+    def fechar(self) -> None:
+        if self._armazenamento is not None:
+            self._armazenamento.fechar()
 
     def get_status_geral(self) -> Dict:
-        total = len(self.df)
-        concluidos = len(self.df[self.df["data_corte"].str.strip() != ""])
-        pendentes = total - concluidos
-        df_pendentes = self.df[self.df["data_corte"].str.strip() == ""]
-        espessuras = df_pendentes["espessura"].value_counts().to_dict() if len(df_pendentes) > 0 else {}
-        return {"total": total, "concluidos": concluidos, "pendentes": pendentes, "espessuras": espessuras}
-
-    def get_pendentes(self, limite: int = 20) -> List[Dict]:
-        df_pendentes = self.df[self.df["data_corte"].str.strip() == ""]
-        df_pendentes = df_pendentes.sort_values("numero")
-        return df_pendentes.head(limite).to_dict("records")
-
-    def get_concluidos(self, limite: int = 20) -> List[Dict]:
-        df_concluidos = self.df[self.df["data_corte"].str.strip() != ""]
-        return df_concluidos.tail(limite).to_dict("records")
+        return self.armazenamento.get_status_geral()
+
+    def get_carga(self, agrupamento: str) -> Dict:
+        return self.armazenamento.get_carga(agrupamento)
+
+    def get_pendentes(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        return self.armazenamento.get_pendentes(limite, inicio)
+
+    def get_concluidos(self, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        return self.armazenamento.get_concluidos(limite, inicio)
+
+    def get_por_entrega(self, ate: date, desde: Optional[date] = None, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        return self.armazenamento.get_por_entrega(ate, desde, limite, inicio)
+
+    def get_entregas_invalidas(self) -> List[Dict]:
+        return self.armazenamento.get_entregas_invalidas()
 
     def get_por_lista(self, lista: str) -> List[Dict]:
-        df_filtrado = self.df[self.df["lista_corte"].str.contains(lista, case=False, na=False)]
-        return df_filtrado.to_dict("records")
+        return self.armazenamento.get_por_lista(lista)
 
     def get_por_espessura(self, espessura: str) -> List[Dict]:
-        df_filtrado = self.df[
-            (self.df["data_corte"].str.strip() == "") &
-            (self.df["espessura"].str.contains(espessura, case=False, na=False))
-        ]
-        return df_filtrado.to_dict("records")
+        return self.armazenamento.get_por_espessura(espessura)
 
     def get_por_opd(self, opd: str) -> List[Dict]:
-        df_filtrado = self.df[self.df["opd"].str.contains(opd, case=False, na=False)]
-        return df_filtrado.to_dict("records")
+        return self.armazenamento.get_por_opd(opd)
 
     def get_detalhe(self, numero: str) -> Optional[Dict]:
-        df_corte = self.df[self.df["numero"].astype(str) == str(numero)]
-        if len(df_corte) == 0:
-            return None
-        return df_corte.iloc[0].to_dict()
-
-    def concluir_corte(self, numero: str) -> Dict:
-        idx = self.df[self.df["numero"].astype(str) == str(numero)].index
-        if len(idx) == 0:
-            return {"sucesso": False, "erro": "Numero nao encontrado"}
-        if self._is_concluido(self.df.loc[idx[0], "data_corte"]):
-            return {"sucesso": False, "erro": "Este corte ja foi concluido"}
-        self.df.loc[idx[0], "data_corte"] = datetime.now().strftime("%d/%m/%y")
-        self._salvar()
-        corte = self.df.loc[idx[0]].to_dict()
-        return {"sucesso": True, "corte": corte}
+        return self.armazenamento.get_detalhe(numero)
+
+    def concluir_corte(self, numero: str, remetente: str = "") -> Dict:
+        return self.concluir_cortes([numero], [remetente])[0]
+
+    def concluir_cortes(self, numeros: List[str], remetentes: Optional[List[str]] = None) -> List[Dict]:
+        """Conclui os cortes e registra no histórico os que foram concluídos agora.
+
+        'remetentes' traz o número do WhatsApp de quem concluiu cada corte.
+        """
+        resultados = self.armazenamento.concluir_cortes(numeros)
+        remetentes = remetentes or [""] * len(numeros)
+        sucessos = [i for i, resultado in enumerate(resultados) if resultado["sucesso"]]
+        try:
+            historico_conclusoes.registrar([numeros[i] for i in sucessos], [remetentes[i] for i in sucessos])
+        except OSError:
+            # As conclusões já estão gravadas no journal/banco: só o histórico fica sem elas
+            logger.exception("Falha ao registrar %d conclusoes no historico", len(sucessos))
+        return resultados
+
+    def leitura_consistente(self):
+        return self.armazenamento.leitura_consistente()
 
     def buscar(self, termo: str) -> List[Dict]:
-        termo = str(termo).lower()
-        df_resultado = self.df[
-            (self.df["numero"].astype(str).str.lower().str.contains(termo, na=False)) |
-            (self.df["lista_corte"].str.lower().str.contains(termo, na=False)) |
-            (self.df["opd"].str.lower().str.contains(termo, na=False))
-        ]
-        return df_resultado.head(20).to_dict("records")
+        return self.armazenamento.buscar(termo)
 
 
 cortes_manager = CortesManager()
@@ -0,0 +1,66 @@
+import re
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+# Valores especiais dos ordinais (datas reais são >= 1)
+SEM_DATA = 0
+DATA_INVALIDA = -1
+
+MESES = {
+    "jan": 1, "fev": 2, "mar": 3, "abr": 4, "mai": 5, "jun": 6,
+    "jul": 7, "ago": 8, "set": 9, "out": 10, "nov": 11, "dez": 12
+}
+
+_SEPARADORES = re.compile(r"[/.-]")
+
+
+def ordinal_data(texto: str, referencia: Optional[date] = None) -> int:
+    """Dia de uma data da planilha como date.toordinal().
+
+    Aceita "28/ago", "03/10/2025", "29/8/25" e "16/12". Sem o ano, vale o ano
+    que deixa a data mais perto da referência (hoje). Retorna SEM_DATA para
+    vazio e DATA_INVALIDA para texto livre ("RAFA") ou datas impossíveis.
+    """
+    texto = str(texto).strip(" .").lower()
+    if not texto:
+        return SEM_DATA
+    partes = _SEPARADORES.split(texto)
+    if len(partes) not in (2, 3):
+        return DATA_INVALIDA
+    try:
+        dia = int(partes[0])
+        mes = int(partes[1]) if partes[1].isdigit() else MESES.get(partes[1][:3])
+        if mes is None:
+            return DATA_INVALIDA
+        if len(partes) == 3:
+            ano = int(partes[2])
+            return date(ano + 2000 if ano < 100 else ano, mes, dia).toordinal()
+
+        referencia = referencia or date.today()
+        candidatos = []
+        for ano in (referencia.year - 1, referencia.year, referencia.year + 1):
+            try:
+                candidatos.append(date(ano, mes, dia).toordinal())
+            except ValueError:
+                # 29/fev fora de ano bissexto
+                pass
+        if not candidatos:
+            return DATA_INVALIDA
+        hoje = referencia.toordinal()
+        return min(candidatos, key=lambda ordinal: abs(ordinal - hoje))
+    except ValueError:
+        return DATA_INVALIDA
+
+
+def ordinais(valores: Iterable[str], referencia: Optional[date] = None) -> array:
+    """Converte uma coluna inteira; cada valor distinto é interpretado uma vez só."""
+    referencia = referencia or date.today()
+    convertidos: Dict[str, int] = {}
+    resultado = array("i")
+    for valor in valores:
+        ordinal = convertidos.get(valor)
+        if ordinal is None:
+            ordinal = convertidos[valor] = ordinal_data(valor, referencia)
+        resultado.append(ordinal)
+    return resultado
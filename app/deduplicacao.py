@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DEDUP_TTL, DEDUP_MAX, DEDUP_ARQUIVO, WORKERS
+
+from .estado_compartilhado import EstadoCompartilhado, estado_compartilhado
+
+# Grava a chave se for nova ou se a anterior já expirou; sem linha alterada, já tinha sido vista
+_SQL_VISTO = """
+INSERT INTO vistos (chave, expira) VALUES (?, ?)
+ON CONFLICT (chave) DO UPDATE SET expira = excluded.expira WHERE vistos.expira <= ?
+"""
+
+
+class CacheVistos:
+    """Conjunto de ids de mensagens já recebidas, com TTL e limite de tamanho (LRU).
+
+    Como o TTL é fixo, a ordem de inserção também é a ordem de expiração:
+    limpar expirados e descartar o mais antigo são O(1) amortizado.
+    """
+
+    def __init__(self, ttl: float = DEDUP_TTL, maximo: int = DEDUP_MAX, arquivo: Optional[str] = DEDUP_ARQUIVO):
+        self.ttl = ttl
+        self.maximo = maximo
+        self.arquivo = arquivo or None
+        self.duplicados = 0
+        self._vistos: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._linhas_arquivo = 0
+        if self.arquivo:
+            self._carregar()
+
+    def ja_visto(self, chave: str) -> bool:
+        """Registra a chave e indica se ela já tinha sido vista dentro do TTL."""
+        agora = time.time()
+        with self._lock:
+            self._expirar(agora)
+            if chave in self._vistos:
+                self.duplicados += 1
+                return True
+            self._vistos[chave] = agora + self.ttl
+            if len(self._vistos) > self.maximo:
+                self._vistos.popitem(last=False)
+            if self.arquivo:
+                self._persistir(chave, agora + self.ttl)
+            return False
+
+    def estatisticas(self) -> dict:
+        return {"ids": len(self._vistos), "duplicados": self.duplicados}
+
+    def _expirar(self, agora: float) -> None:
+        while self._vistos:
+            chave, expira = next(iter(self._vistos.items()))
+            if expira > agora:
+                break
+            self._vistos.popitem(last=False)
+
+    def _carregar(self) -> None:
+        if os.path.exists(self.arquivo):
+            agora = time.time()
+            with open(self.arquivo, encoding="utf-8") as f:
+                for linha in f:
+                    partes = linha.rstrip("\n").split("\t")
+                    if len(partes) != 2:
+                        continue
+                    try:
+                        expira = float(partes[1])
+                    except ValueError:
+                        continue
+                    if expira > agora:
+                        self._vistos[partes[0]] = expira
+            while len(self._vistos) > self.maximo:
+                self._vistos.popitem(last=False)
+        self._reescrever()
+
+    def _persistir(self, chave: str, expira: float) -> None:
+        # Append simples; quando o arquivo cresce demais é reescrito só com o que está em memória
+        if self._linhas_arquivo >= 2 * self.maximo:
+            self._reescrever()
+            return
+        with open(self.arquivo, "a", encoding="utf-8") as f:
+            f.write(f"{chave}\t{expira}\n")
+        self._linhas_arquivo += 1
+
+    def _reescrever(self) -> None:
+        temp = self.arquivo + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            for chave, expira in self._vistos.items():
+                f.write(f"{chave}\t{expira}\n")
+        os.replace(temp, self.arquivo)
+        self._linhas_arquivo = len(self._vistos)
+
+
+class CacheVistosCompartilhado:
+    """Como CacheVistos, mas na tabela 'vistos' do estado comum aos workers.
+
+    Um webhook reenviado pelo provedor pode cair em outro processo: a
+    verificação e o registro são um único upsert. Os expirados saem de
+    tempos em tempos; o tamanho fica limitado pelo TTL.
+    """
+
+    def __init__(self, estado: EstadoCompartilhado = estado_compartilhado, ttl: float = DEDUP_TTL):
+        self.estado = estado
+        self.ttl = ttl
+        self.duplicados = 0
+        self._operacoes = 0
+
+    def ja_visto(self, chave: str) -> bool:
+        """Registra a chave e indica se ela já tinha sido vista dentro do TTL (por qualquer worker)."""
+        agora = time.time()
+        con = self.estado.conexao()
+        self._operacoes += 1
+        if self._operacoes % 256 == 0:
+            con.execute("DELETE FROM vistos WHERE expira <= ?", (agora,))
+        if con.execute(_SQL_VISTO, (chave, agora + self.ttl, agora)).rowcount == 0:
+            self.duplicados += 1
+            return True
+        return False
+
+    def estatisticas(self) -> dict:
+        ids = self.estado.conexao().execute("SELECT COUNT(*) FROM vistos WHERE expira > ?", (time.time(),)).fetchone()[0]
+        return {"ids": ids, "duplicados": self.duplicados}
+
+
+# Instância global
+mensagens_vistas = CacheVistosCompartilhado() if WORKERS > 1 else CacheVistos()
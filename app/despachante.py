@@ -0,0 +1,182 @@
+import asyncio
+import time
+import os
+import sys
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    ENVIO_WORKERS, ENVIO_FILA_MAX, ENVIO_TAXA_GLOBAL, ENVIO_RAJADA_GLOBAL,
+    ENVIO_TAXA_NUMERO, ENVIO_RAJADA_NUMERO
+)
+
+from .whatsapp import whatsapp_client
+
+
+class BaldeTokens:
+    """Token bucket com reserva: quem chega primeiro garante a vez e espera o necessário."""
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.atualizado = time.monotonic()
+
+    def reservar(self) -> float:
+        """Consome um token e retorna quantos segundos esperar até poder usá-lo."""
+        agora = time.monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.taxa
+
+    def tentar(self, custo: float = 1) -> bool:
+        """Consome 'custo' tokens se houver saldo; sem saldo, não consome nada (o pedido é recusado)."""
+        agora = time.monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+        custo = min(custo, self.capacidade)
+        if self.tokens < custo:
+            return False
+        self.tokens -= custo
+        return True
+
+    def cheio(self) -> bool:
+        """Indica se o balde já teria recuperado toda a capacidade (pode ser descartado)."""
+        decorrido = time.monotonic() - self.atualizado
+        return self.tokens + decorrido * self.taxa >= self.capacidade
+
+
+class DespachanteEnvio:
+    """Fila de envio com pool de workers, ordem FIFO por número e limite de taxa."""
+
+    def __init__(
+        self,
+        enviar: Callable[[str, str], Awaitable[dict]],
+        workers: int = ENVIO_WORKERS,
+        fila_max: int = ENVIO_FILA_MAX,
+        taxa_global: float = ENVIO_TAXA_GLOBAL,
+        rajada_global: float = ENVIO_RAJADA_GLOBAL,
+        taxa_numero: float = ENVIO_TAXA_NUMERO,
+        rajada_numero: float = ENVIO_RAJADA_NUMERO
+    ):
+        self._enviar = enviar
+        self._n_workers = workers
+        self._fila_max = fila_max
+        self._taxa_numero = taxa_numero
+        self._rajada_numero = rajada_numero
+        self._balde_global = BaldeTokens(taxa_global, rajada_global)
+        self._baldes: Dict[str, BaldeTokens] = {}
+
+        # Mensagens pendentes de cada número e números prontos para um worker
+        self._filas: Dict[str, Deque[str]] = {}
+        self._ativos: Set[str] = set()
+        self._prontos: Optional[asyncio.Queue] = None
+        self._vagas: Optional[asyncio.Semaphore] = None
+        self._workers: list = []
+
+        self.pendentes = 0
+        self.em_envio = 0
+        self.enviados = 0
+        self.falhas = 0
+
+    async def iniciar(self) -> None:
+        """Cria a fila e sobe os workers (chamado no startup)."""
+        if self._workers:
+            return
+        self._prontos = asyncio.Queue()
+        self._vagas = asyncio.Semaphore(self._fila_max)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._n_workers)]
+
+    async def parar(self, timeout: float = 10.0) -> None:
+        """Aguarda a fila esvaziar (até o timeout) e encerra os workers."""
+        if not self._workers:
+            return
+        limite = time.monotonic() + timeout
+        while (self.pendentes or self.em_envio) and time.monotonic() < limite:
+            await asyncio.sleep(0.05)
+        for tarefa in self._workers:
+            tarefa.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def enfileirar(self, numero: str, mensagem: str) -> None:
+        """Coloca uma mensagem na fila; aguarda vaga se a fila estiver cheia."""
+        if not self._workers:
+            await self.iniciar()
+
+        await self._vagas.acquire()
+        self._filas.setdefault(numero, deque()).append(mensagem)
+        self.pendentes += 1
+
+        # Só um worker atende cada número por vez, o que garante a ordem FIFO
+        if numero not in self._ativos:
+            self._ativos.add(numero)
+            self._prontos.put_nowait(numero)
+
+    def estatisticas(self) -> dict:
+        """Profundidade da fila e contadores de envio."""
+        return {
+            "pendentes": self.pendentes,
+            "em_envio": self.em_envio,
+            "capacidade": self._fila_max,
+            "numeros_na_fila": len(self._filas),
+            "workers": len(self._workers),
+            "enviados": self.enviados,
+            "falhas": self.falhas
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            numero = await self._prontos.get()
+            fila = self._filas[numero]
+            mensagem = fila.popleft()
+            self.pendentes -= 1
+            self.em_envio += 1
+            try:
+                await self._aguardar_taxa(numero)
+                resultado = await self._enviar(numero, mensagem)
+                if resultado.get("sucesso"):
+                    self.enviados += 1
+                else:
+                    self.falhas += 1
+            except Exception:
+                self.falhas += 1
+            finally:
+                self.em_envio -= 1
+                self._vagas.release()
+
+            # Devolve o número ao fim da fila de prontos (revezamento entre números)
+            if fila:
+                self._prontos.put_nowait(numero)
+            else:
+                del self._filas[numero]
+                self._ativos.discard(numero)
+                self._limpar_balde(numero)
+
+    async def _aguardar_taxa(self, numero: str) -> None:
+        balde = self._baldes.get(numero)
+        if balde is None:
+            balde = self._baldes[numero] = BaldeTokens(self._taxa_numero, self._rajada_numero)
+        espera = balde.reservar()
+        if espera:
+            await asyncio.sleep(espera)
+        espera = self._balde_global.reservar()
+        if espera:
+            await asyncio.sleep(espera)
+
+    def _limpar_balde(self, numero: str) -> None:
+        # Remove baldes recuperados para a memória não crescer com números antigos
+        balde = self._baldes.get(numero)
+        if balde is not None and balde.cheio():
+            del self._baldes[numero]
+        if len(self._baldes) > 1000:
+            for outro in [n for n, b in self._baldes.items() if n not in self._ativos and b.cheio()]:
+                del self._baldes[outro]
+
+
+# Instância global
+despachante = DespachanteEnvio(whatsapp_client.enviar_mensagem)
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ESTADO_ARQUIVO
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vistos (chave TEXT PRIMARY KEY, expira REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_vistos_expira ON vistos (expira);
+CREATE TABLE IF NOT EXISTS limites (
+    numero TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    atualizado REAL NOT NULL,
+    ultimo_texto TEXT NOT NULL DEFAULT '',
+    ultimo_instante REAL NOT NULL DEFAULT 0,
+    avisado INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cursores (
+    numero TEXT PRIMARY KEY,
+    comando TEXT NOT NULL,
+    args TEXT NOT NULL,
+    versao TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    expira REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cursores_expira ON cursores (expira);
+"""
+
+
+class EstadoCompartilhado:
+    """Banco SQLite (WAL) com o estado de curta duração comum a todos os workers.
+
+    Com WORKERS > 1, cada webhook cai em um processo qualquer: os ids já vistos,
+    os limites de entrada e os cursores de paginação ficam aqui em vez de em
+    memória. Uma conexão por thread; o arquivo é criado no primeiro uso.
+    """
+
+    def __init__(self, arquivo: str = ESTADO_ARQUIVO):
+        self.arquivo = arquivo
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._criado = False
+
+    def conexao(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+            con = sqlite3.connect(self.arquivo, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA busy_timeout=5000")
+            with self._lock:
+                if not self._criado:
+                    con.executescript(_SCHEMA)
+                    self._criado = True
+            self._local.con = con
+        return con
+
+    @contextmanager
+    def transacao(self):
+        """Transação de escrita: ler e atualizar sem outro worker no meio."""
+        con = self.conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+
+# Instância global
+estado_compartilhado = EstadoCompartilhado()
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import COMANDOS_WORKERS_LEITURA, COMANDOS_WORKERS_ESCRITA
+
+from .commands import processar_comando, processar_lote, eh_escrita
+
+
+class ExecutorComandos:
+    """Executa os comandos fora do event loop, em pools separados para leitura e escrita.
+
+    A consistência entre leituras e escritas fica com o backend de armazenamento;
+    o pool de escrita só evita que conclusões esperem atrás de consultas.
+    """
+
+    def __init__(self, workers_leitura: int = COMANDOS_WORKERS_LEITURA, workers_escrita: int = COMANDOS_WORKERS_ESCRITA):
+        self._leitura = ThreadPoolExecutor(max_workers=workers_leitura, thread_name_prefix="leitura")
+        self._escrita = ThreadPoolExecutor(max_workers=workers_escrita, thread_name_prefix="escrita")
+
+    async def executar(self, texto: str, numero: str = "") -> str:
+        """Processa o comando em uma thread e retorna a resposta."""
+        pool = self._escrita if eh_escrita(texto) else self._leitura
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, processar_comando, texto, numero)
+
+    async def executar_lote(self, textos: List[str], numeros: Optional[List[str]] = None) -> List[str]:
+        """Processa vários comandos em uma única tarefa (uma resposta por texto)."""
+        pool = self._escrita if any(eh_escrita(t) for t in textos) else self._leitura
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, processar_lote, textos, numeros)
+
+    def fechar(self) -> None:
+        self._leitura.shutdown(wait=True)
+        self._escrita.shutdown(wait=True)
+
+
+# Instância global
+executor_comandos = ExecutorComandos()
@@ -0,0 +1,166 @@
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, datetime, time as hora
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import HISTORICO_ARQUIVO
+
+
+def inicio_do_dia(dia: date) -> float:
+    """Instante (time.time()) da meia-noite local do dia."""
+    return datetime.combine(dia, hora()).timestamp()
+
+
+class HistoricoConclusoes:
+    """Histórico append-only das conclusões: corte, instante e remetente.
+
+    Cada conclusão é uma linha JSON no arquivo, com o instante completo
+    (time.time()), não só a data da planilha. Em memória, os instantes ficam
+    em um array ordenado, com o número e o remetente em listas paralelas:
+    um período (hoje, semana, datas) é uma busca binária. As contagens por
+    dia ficam em um Counter. Com vários workers, cada processo lê as linhas
+    que os outros acrescentaram antes de consultar.
+    """
+
+    def __init__(self, arquivo: str = HISTORICO_ARQUIVO):
+        self.arquivo = arquivo
+        self._instantes = array("d")
+        self._numeros: List[str] = []
+        self._remetentes: List[str] = []
+        self._por_dia: Counter = Counter()
+        # Última conclusão de cada corte: (instante, remetente)
+        self._ultima: Dict[str, Tuple[float, str]] = {}
+        self._posicao = 0
+        self._arquivo_id = None
+        self._lock = threading.Lock()
+
+    def registrar(self, numeros: List[str], remetentes: Optional[List[str]] = None) -> None:
+        """Acrescenta as conclusões (um remetente por número, ou nenhum)."""
+        if not numeros:
+            return
+        instante = time.time()
+        remetentes = remetentes or [""] * len(numeros)
+        linhas = "".join(
+            json.dumps({"numero": numero, "instante": instante, "remetente": remetente}) + "\n"
+            for numero, remetente in zip(numeros, remetentes)
+        ).encode("utf-8")
+        with self._lock:
+            os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+            # O_APPEND com uma única escrita: linhas de workers diferentes não se misturam.
+            # Sem fsync: o estado dos cortes está no journal; o histórico é complementar.
+            fd = os.open(self.arquivo, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # Linha incompleta de uma queda no meio da gravação: fecha antes de acrescentar
+                tamanho = os.fstat(fd).st_size
+                if tamanho and os.pread(fd, 1, tamanho - 1) != b"\n":
+                    linhas = b"\n" + linhas
+                os.write(fd, linhas)
+            finally:
+                os.close(fd)
+            # As linhas gravadas entram no índice pelo mesmo caminho das dos outros processos
+            self._acompanhar()
+
+    def contar(self, desde: float, ate: float) -> int:
+        """Conclusões com desde <= instante < ate."""
+        with self._lock:
+            self._acompanhar()
+            return bisect_left(self._instantes, ate) - bisect_left(self._instantes, desde)
+
+    def periodo(self, desde: float, ate: float, limite: int = 20, inicio: int = 0) -> List[Dict]:
+        """Conclusões com desde <= instante < ate, da mais recente para a mais antiga."""
+        with self._lock:
+            self._acompanhar()
+            primeira = bisect_left(self._instantes, desde)
+            fim = bisect_left(self._instantes, ate) - inicio
+            return [
+                {"numero": self._numeros[i], "instante": self._instantes[i], "remetente": self._remetentes[i]}
+                for i in range(fim - 1, max(primeira, fim - limite) - 1, -1)
+            ]
+
+    def por_dia(self, desde: date, ate: date) -> List[Tuple[date, int]]:
+        """Conclusões de cada dia entre 'desde' e 'ate' (inclusive), com zero nos dias parados."""
+        with self._lock:
+            self._acompanhar()
+            return [
+                (date.fromordinal(dia), self._por_dia[dia])
+                for dia in range(desde.toordinal(), ate.toordinal() + 1)
+            ]
+
+    def ultima(self, numero: str) -> Optional[Dict]:
+        """Última conclusão registrada do corte, ou None."""
+        with self._lock:
+            self._acompanhar()
+            if numero not in self._ultima:
+                return None
+            instante, remetente = self._ultima[numero]
+            return {"numero": numero, "instante": instante, "remetente": remetente}
+
+    def versao(self) -> Tuple:
+        """Muda a cada conclusão registrada, por este ou por outro processo."""
+        with self._lock:
+            self._acompanhar()
+            return self._arquivo_id, self._posicao
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            self._acompanhar()
+            return {"conclusoes": len(self._instantes), "dias": len(self._por_dia)}
+
+    def _acompanhar(self) -> None:
+        """Lê as linhas novas do arquivo (deste e de outros processos); chamado com o lock."""
+        try:
+            info = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return
+        # Arquivo trocado ou truncado (apagado à mão): recomeça do zero
+        if (info.st_dev, info.st_ino) != self._arquivo_id or info.st_size < self._posicao:
+            self._limpar()
+            self._arquivo_id = (info.st_dev, info.st_ino)
+        if info.st_size == self._posicao:
+            return
+
+        with open(self.arquivo, "rb") as f:
+            f.seek(self._posicao)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    # Linha ainda sendo gravada por outro processo
+                    break
+                self._posicao += len(linha)
+                try:
+                    entrada = json.loads(linha)
+                    self._adicionar(str(entrada["numero"]), float(entrada["instante"]), entrada.get("remetente", ""))
+                except (ValueError, KeyError, TypeError):
+                    # Linha corrompida (queda no meio da gravação): ignora só ela
+                    continue
+
+    def _adicionar(self, numero: str, instante: float, remetente: str) -> None:
+        if not self._instantes or instante >= self._instantes[-1]:
+            posicao = len(self._instantes)
+            self._instantes.append(instante)
+        else:
+            # Outro worker gravou depois uma conclusão de antes: mantém a ordem por tempo
+            posicao = bisect_right(self._instantes, instante)
+            self._instantes.insert(posicao, instante)
+        self._numeros.insert(posicao, numero)
+        self._remetentes.insert(posicao, remetente)
+        self._por_dia[date.fromtimestamp(instante).toordinal()] += 1
+        if instante >= self._ultima.get(numero, (float("-inf"), ""))[0]:
+            self._ultima[numero] = (instante, remetente)
+
+    def _limpar(self) -> None:
+        self._instantes = array("d")
+        self._numeros = []
+        self._remetentes = []
+        self._por_dia.clear()
+        self._ultima.clear()
+        self._posicao = 0
+
+
+historico_conclusoes = HistoricoConclusoes()
@@ -0,0 +1,141 @@
+from array import array
+from typing import Dict, Iterable, List, Set
+
+
+class IndiceHash:
+    """Índice valor -> conjunto de linhas de uma coluna (chaves em minúsculas)."""
+
+    def __init__(self, valores: Iterable[str] = ()):
+        self._linhas: Dict[str, Set[int]] = {}
+        for linha, valor in enumerate(valores):
+            self.adicionar(linha, valor)
+
+    def adicionar(self, linha: int, valor: str) -> None:
+        self._linhas.setdefault(str(valor).lower(), set()).add(linha)
+
+    def remover(self, linha: int, valor: str) -> None:
+        chave = str(valor).lower()
+        linhas = self._linhas.get(chave)
+        if linhas is None:
+            return
+        linhas.discard(linha)
+        if not linhas:
+            del self._linhas[chave]
+
+    def exato(self, valor: str) -> Set[int]:
+        """Linhas cujo valor é igual ao informado (O(1))."""
+        return self._linhas.get(str(valor).lower(), set())
+
+    def contem(self, termo: str) -> Set[int]:
+        """Linhas cujo valor contém o termo (substring literal, sem regex).
+
+        Percorre só os valores distintos da coluna, não as linhas.
+        """
+        termo = str(termo).lower()
+        resultado = set()
+        for valor in self._chaves_candidatas(termo):
+            if termo in valor:
+                resultado |= self._linhas[valor]
+        return resultado
+
+    def _chaves_candidatas(self, termo: str) -> Iterable[str]:
+        return self._linhas.keys()
+
+    def exportar(self) -> Dict:
+        """Forma colunar do índice (cache binário): as chaves e, concatenadas, as linhas de cada uma."""
+        chaves = list(self._linhas)
+        offsets, linhas = _concatenar(self._linhas[chave] for chave in chaves)
+        return {"chaves": chaves, "offsets": offsets, "linhas": linhas}
+
+    @classmethod
+    def importar(cls, partes: Dict) -> "IndiceHash":
+        """Reconstrói o índice a partir de exportar(), sem percorrer a coluna."""
+        indice = cls.__new__(cls)
+        indice._linhas = _separar(partes["chaves"], partes["offsets"], partes["linhas"])
+        return indice
+
+
+class IndiceTrigramas(IndiceHash):
+    """IndiceHash com índice invertido de trigramas para buscas por substring.
+
+    Os trigramas apontam para os valores distintos; a busca intersecta as
+    listas de postagem dos trigramas do termo e só confere esses candidatos.
+    """
+
+    def __init__(self, valores: Iterable[str] = ()):
+        self._trigramas: Dict[str, Set[str]] = {}
+        super().__init__(valores)
+
+    def adicionar(self, linha: int, valor: str) -> None:
+        chave = str(valor).lower()
+        if chave not in self._linhas:
+            for trigrama in _trigramas(chave):
+                self._trigramas.setdefault(trigrama, set()).add(chave)
+        super().adicionar(linha, valor)
+
+    def remover(self, linha: int, valor: str) -> None:
+        super().remover(linha, valor)
+        chave = str(valor).lower()
+        if chave in self._linhas:
+            return
+        for trigrama in _trigramas(chave):
+            chaves = self._trigramas.get(trigrama)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._trigramas[trigrama]
+
+    def _chaves_candidatas(self, termo: str) -> Iterable[str]:
+        trigramas = _trigramas(termo)
+        if not trigramas:
+            # Termos com menos de 3 caracteres: confere todos os valores distintos
+            return self._linhas.keys()
+
+        postagens = []
+        for trigrama in trigramas:
+            chaves = self._trigramas.get(trigrama)
+            if not chaves:
+                return ()
+            postagens.append(chaves)
+
+        postagens.sort(key=len)
+        candidatas = set(postagens[0])
+        for chaves in postagens[1:]:
+            candidatas &= chaves
+            if not candidatas:
+                break
+        return candidatas
+
+    def exportar(self) -> Dict:
+        partes = super().exportar()
+        # Os trigramas apontam para as chaves pela posição delas em "chaves"
+        posicao = {chave: i for i, chave in enumerate(partes["chaves"])}
+        trigramas = list(self._trigramas)
+        offsets, chaves = _concatenar({posicao[c] for c in self._trigramas[t]} for t in trigramas)
+        partes.update({"trigramas": trigramas, "offsets_trigramas": offsets, "chaves_trigramas": chaves})
+        return partes
+
+    @classmethod
+    def importar(cls, partes: Dict) -> "IndiceTrigramas":
+        indice = super().importar(partes)
+        chaves = partes["chaves"]
+        posicoes = _separar(partes["trigramas"], partes["offsets_trigramas"], partes["chaves_trigramas"])
+        indice._trigramas = {trigrama: {chaves[i] for i in ids} for trigrama, ids in posicoes.items()}
+        return indice
+
+
+def _concatenar(conjuntos: Iterable[Set[int]]):
+    offsets = array("I", [0])
+    valores = array("I")
+    for conjunto in conjuntos:
+        valores.extend(sorted(conjunto))
+        offsets.append(len(valores))
+    return offsets, valores
+
+
+def _separar(chaves: List, offsets: array, valores: array) -> Dict:
+    return {chave: set(valores[offsets[i]:offsets[i + 1]]) for i, chave in enumerate(chaves)}
+
+
+def _trigramas(texto: str) -> Set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+
+class Journal:
+    """Write-ahead journal das alterações (JSON por linha, append + fsync).
+
+    As gravações que chegam dentro da mesma janela são agrupadas em um único
+    fsync (group commit) por uma thread dedicada.
+
+    Vários processos podem gravar no mesmo arquivo (append); cada um guarda até
+    onde já leu (ler_novas) para aplicar só as entradas dos outros.
+
+    Se um write/fsync falhar (disco cheio, erro de I/O), o lote é cortado do
+    arquivo e o erro fica guardado: nada mais é gravado, e aguardar(),
+    rotacionar() e fechar() levantam o erro até o dono do journal desfazer
+    as alterações em memória e chamar recuperar().
+    """
+
+    def __init__(self, caminho: str, janela: float = 0.005):
+        self.caminho = caminho
+        self.caminho_antigo = caminho + ".old"
+        self.janela = janela
+        self.entradas = 0
+
+        self._cond = threading.Condition()
+        self._io = threading.Lock()
+        self._buffer: List[bytes] = []
+        self._seq_registrado = 0
+        self._seq_duravel = 0
+        self._erro: Optional[OSError] = None
+        self._fechado = False
+        self._arquivo = open(self.caminho, "a+b", buffering=0)
+
+        # Até onde as entradas já foram lidas: (arquivo aberto para leitura, inode, offset).
+        # Manter o arquivo aberto impede que o inode seja reaproveitado depois de removido
+        self._leitura = threading.Lock()
+        self._lido: Tuple[Optional[BinaryIO], int, int] = (None, 0, 0)
+
+        self._thread = threading.Thread(target=self._gravador, name="journal", daemon=True)
+        self._thread.start()
+
+    def ler(self) -> List[Dict]:
+        """Lê as entradas pendentes de compactação (journal antigo + atual)."""
+        entradas, posicao = self.ler_com_posicao()
+        self.posicionar(posicao)
+        return entradas
+
+    def ler_com_posicao(self) -> Tuple[List[Dict], Tuple]:
+        """Como ler(), mais a posição lida: vale só quando o snapshot com essas entradas entra em uso."""
+        entradas = []
+        if os.path.exists(self.caminho_antigo):
+            with open(self.caminho_antigo, "rb") as f:
+                entradas = _ler_entradas(f)[0]
+        posicao = (None, 0, 0)
+        try:
+            leitor = open(self.caminho, "rb")
+        except FileNotFoundError:
+            pass
+        else:
+            novas, fim = _ler_entradas(leitor)
+            posicao = (leitor, os.fstat(leitor.fileno()).st_ino, fim)
+            entradas.extend(novas)
+        self.entradas = len(entradas)
+        return entradas, posicao
+
+    def posicionar(self, posicao: Tuple) -> None:
+        with self._leitura:
+            anterior = self._lido[0]
+            self._lido = posicao
+        if anterior is not None and anterior is not posicao[0]:
+            anterior.close()
+
+    def posicao_lida(self) -> Tuple[int, int]:
+        """(inode, offset) até onde as entradas já foram lidas."""
+        with self._leitura:
+            _, inode, offset = self._lido
+            return inode, offset
+
+    def mudou(self) -> bool:
+        """Indica se o journal cresceu ou foi trocado desde a última leitura (só um stat)."""
+        try:
+            stat = os.stat(self.caminho)
+        except FileNotFoundError:
+            return True
+        _, inode, offset = self._lido
+        return (stat.st_ino, stat.st_size) != (inode, offset)
+
+    def ler_novas(self) -> Optional[List[Dict]]:
+        """Entradas gravadas desde a última leitura; None se outro processo rotacionou o journal."""
+        with self._leitura:
+            leitor, inode, offset = self._lido
+            try:
+                atual = os.stat(self.caminho)
+            except FileNotFoundError:
+                return None
+            if leitor is None or atual.st_ino != inode or atual.st_size < offset:
+                # Rotacionado, ou cortado depois de uma falha de gravação de outro processo
+                return None
+            entradas, fim = _ler_entradas(leitor, offset)
+            self._lido = (leitor, inode, fim)
+            self.entradas += len(entradas)
+            return entradas
+
+    def marcar_lido(self) -> None:
+        """Avança a leitura até o fim (após gravar as próprias entradas sob o lock de arquivo)."""
+        with self._leitura:
+            leitor, inode, _ = self._lido
+            stat = os.stat(self.caminho)
+            if leitor is not None and stat.st_ino == inode:
+                self._lido = (leitor, inode, stat.st_size)
+
+    def reabrir_se_rotacionado(self) -> None:
+        """Reabre o arquivo se outro processo o rotacionou (o descritor aponta para o '.old')."""
+        with self._io:
+            try:
+                atual = os.stat(self.caminho).st_ino
+            except FileNotFoundError:
+                atual = None
+            if atual != os.fstat(self._arquivo.fileno()).st_ino:
+                self._arquivo.close()
+                self._arquivo = open(self.caminho, "a+b", buffering=0)
+
+    def registrar(self, entrada: Dict) -> int:
+        """Enfileira uma entrada e retorna o número de sequência para aguardar()."""
+        return self.registrar_varios([entrada])
+
+    def registrar_varios(self, entradas: List[Dict]) -> int:
+        """Enfileira várias entradas de uma vez: vão juntas no mesmo write + fsync."""
+        linhas = b"".join(json.dumps(e, ensure_ascii=False).encode("utf-8") + b"\n" for e in entradas)
+        with self._cond:
+            self._buffer.append(linhas)
+            self._seq_registrado += 1
+            self.entradas += len(entradas)
+            self._cond.notify_all()
+            return self._seq_registrado
+
+    def aguardar(self, seq: int) -> None:
+        """Bloqueia até a entrada 'seq' estar gravada em disco; levanta o erro se a gravação falhou."""
+        with self._cond:
+            while self._seq_duravel < seq and not self._fechado and self._erro is None:
+                self._cond.wait()
+            if self._seq_duravel < seq:
+                self._verificar_erro()
+
+    def falhou(self) -> bool:
+        with self._cond:
+            return self._erro is not None
+
+    def recuperar(self) -> None:
+        """Descarta o erro e as entradas não gravadas (o dono já desfez as alterações em memória)."""
+        with self._cond:
+            self._erro = None
+            self._buffer = []
+            self._seq_duravel = self._seq_registrado
+        with self._io:
+            # Descritor novo: o antigo pode ter ficado em estado indefinido após a falha
+            self._arquivo.close()
+            self._arquivo = open(self.caminho, "a+b", buffering=0)
+
+    def _verificar_erro(self) -> None:
+        """Chamado com _cond."""
+        if self._erro is not None:
+            raise OSError(self._erro.errno, f"Falha ao gravar o journal: {self._erro.strerror or self._erro}")
+
+    def rotacionar(self) -> None:
+        """Fecha o journal atual como '.old' e abre um novo (início da compactação)."""
+        with self._cond:
+            while self._seq_duravel < self._seq_registrado and self._erro is None:
+                self._cond.wait()
+            # Com um lote perdido, o estado em memória não pode ir para a planilha
+            self._verificar_erro()
+        with self._io:
+            self._arquivo.close()
+            if os.path.exists(self.caminho_antigo):
+                # Compactação anterior não terminou: preserva as entradas antigas
+                with open(self.caminho_antigo, "ab") as antigo, open(self.caminho, "rb") as atual:
+                    antigo.write(atual.read())
+                    antigo.flush()
+                    os.fsync(antigo.fileno())
+                os.remove(self.caminho)
+            else:
+                os.replace(self.caminho, self.caminho_antigo)
+            self._arquivo = open(self.caminho, "a+b", buffering=0)
+            self.entradas = 0
+        leitor = open(self.caminho, "rb")
+        self.posicionar((leitor, os.fstat(leitor.fileno()).st_ino, 0))
+
+    def descartar_antigo(self) -> None:
+        """Remove o journal antigo depois que a planilha compactada foi gravada."""
+        if os.path.exists(self.caminho_antigo):
+            os.remove(self.caminho_antigo)
+
+    def fechar(self) -> None:
+        with self._cond:
+            while self._seq_duravel < self._seq_registrado and self._erro is None:
+                self._cond.wait()
+            self._fechado = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._arquivo.close()
+        self.posicionar((None, 0, 0))
+        with self._cond:
+            self._verificar_erro()
+
+    def _gravador(self) -> None:
+        while True:
+            with self._cond:
+                # Depois de uma falha, nada é gravado até recuperar()
+                while (not self._buffer or self._erro is not None) and not self._fechado:
+                    self._cond.wait()
+                if self._fechado and (not self._buffer or self._erro is not None):
+                    return
+
+            # Espera a janela para juntar as gravações concorrentes
+            time.sleep(self.janela)
+
+            with self._cond:
+                lote = self._buffer
+                self._buffer = []
+                seq = self._seq_registrado
+
+            # Um único write + fsync para todo o lote; novas entradas continuam chegando
+            with self._io:
+                inicio = None
+                try:
+                    # Com vários processos, quem grava segura o lock de arquivo até o fsync
+                    inicio = os.fstat(self._arquivo.fileno()).st_size
+                    dados = b"".join(lote)
+                    # Linha incompleta de uma queda no meio da gravação: fecha antes de acrescentar,
+                    # senão a primeira entrada nova fica colada nela e se perde na releitura
+                    if inicio and os.pread(self._arquivo.fileno(), 1, inicio - 1) != b"\n":
+                        dados = b"\n" + dados
+                    dados = memoryview(dados)
+                    while dados:
+                        dados = dados[self._arquivo.write(dados):]
+                    os.fsync(self._arquivo.fileno())
+                except OSError as erro:
+                    self._descartar_lote(inicio)
+                    with self._cond:
+                        # O que chegou depois também não vai ser gravado: falha junto
+                        self._erro = erro
+                        self._buffer = []
+                        self._cond.notify_all()
+                    continue
+
+            with self._cond:
+                self._seq_duravel = seq
+                self._cond.notify_all()
+
+    def _descartar_lote(self, inicio: Optional[int]) -> None:
+        """Corta do arquivo o que o lote com falha chegou a gravar (melhor esforço, chamado com _io)."""
+        if inicio is None:
+            return
+        try:
+            os.truncate(self.caminho, inicio)
+        except OSError:
+            pass
+
+
+def ler_journal(caminho: str) -> List[Dict]:
+    """Lê as entradas de um journal sem abri-lo para escrita (journal antigo + atual)."""
+    entradas = []
+    for arquivo in (caminho + ".old", caminho):
+        if not os.path.exists(arquivo):
+            continue
+        with open(arquivo, "rb") as f:
+            entradas.extend(_ler_entradas(f)[0])
+    return entradas
+
+
+def _ler_entradas(f, inicio: int = 0) -> Tuple[List[Dict], int]:
+    """Lê as linhas completas a partir de 'inicio'; retorna as entradas e o offset final."""
+    f.seek(inicio)
+    entradas = []
+    fim = inicio
+    for linha in f:
+        if not linha.endswith(b"\n"):
+            # Linha ainda sendo gravada (ou incompleta após uma queda)
+            break
+        fim += len(linha)
+        try:
+            entradas.append(json.loads(linha))
+        except ValueError:
+            # Resto de uma gravação interrompida, já fechado pela gravação seguinte
+            continue
+    return entradas, fim
@@ -0,0 +1,191 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ENTRADA_TAXA, ENTRADA_RAJADA, ENTRADA_MAX_NUMEROS, ENTRADA_JANELA_REPETICAO, WORKERS
+
+from .despachante import BaldeTokens
+from .estado_compartilhado import EstadoCompartilhado, estado_compartilhado
+
+# Custo em tokens dos comandos caros (os demais custam 1)
+CUSTOS = {"buscar": 3, "recarregar": 5}
+
+# Comandos que mudam de resposta a cada repetição: nunca são agrupados
+SEM_AGRUPAR = {"mais"}
+
+
+class _EstadoNumero:
+    __slots__ = ("balde", "ultimo_texto", "ultimo_instante", "avisado")
+
+    def __init__(self, balde: BaldeTokens):
+        self.balde = balde
+        self.ultimo_texto = ""
+        self.ultimo_instante = 0.0
+        self.avisado = False
+
+
+class LimitadorEntrada:
+    """Limite de comandos recebidos por número (token bucket com custo por comando).
+
+    Os estados ficam em um OrderedDict por ordem de uso: os do início são os
+    mais ociosos e saem quando o balde já recuperou a capacidade (equivale a um
+    número novo) ou quando o limite de números é atingido.
+    """
+
+    def __init__(
+        self,
+        taxa: float = ENTRADA_TAXA,
+        rajada: float = ENTRADA_RAJADA,
+        max_numeros: int = ENTRADA_MAX_NUMEROS,
+        janela_repeticao: float = ENTRADA_JANELA_REPETICAO
+    ):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.max_numeros = max_numeros
+        self.janela_repeticao = janela_repeticao
+        self.aceitos = 0
+        self.descartados = 0
+        self.agrupados = 0
+        self._estados: "OrderedDict[str, _EstadoNumero]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verificar(self, numero: str, texto: str) -> Optional[str]:
+        """Registra o comando; retorna o motivo para descartá-lo ("coalesced"/"rate_limited") ou None."""
+        agora = time.monotonic()
+        texto = " ".join(texto.lower().split())
+        comando = texto.split(" ", 1)[0]
+        with self._lock:
+            self._despejar_ociosos()
+            estado = self._estados.get(numero)
+            if estado is None:
+                estado = self._estados[numero] = _EstadoNumero(BaldeTokens(self.taxa, self.rajada))
+                if len(self._estados) > self.max_numeros:
+                    self._estados.popitem(last=False)
+            else:
+                self._estados.move_to_end(numero)
+
+            # Mesmo comando repetido logo em seguida: a resposta do primeiro já está a caminho
+            if (
+                comando not in SEM_AGRUPAR
+                and texto == estado.ultimo_texto
+                and agora - estado.ultimo_instante < self.janela_repeticao
+            ):
+                self.agrupados += 1
+                return "coalesced"
+
+            if not estado.balde.tentar(CUSTOS.get(comando, 1)):
+                self.descartados += 1
+                return "rate_limited"
+
+            estado.ultimo_texto = texto
+            estado.ultimo_instante = agora
+            estado.avisado = False
+            self.aceitos += 1
+            return None
+
+    def avisar(self, numero: str) -> bool:
+        """True só na primeira recusa de uma sequência: um aviso por rajada, não um por mensagem."""
+        with self._lock:
+            estado = self._estados.get(numero)
+            if estado is None or estado.avisado:
+                return False
+            estado.avisado = True
+            return True
+
+    def estatisticas(self) -> Dict:
+        return {
+            "numeros": len(self._estados),
+            "aceitos": self.aceitos,
+            "descartados": self.descartados,
+            "agrupados": self.agrupados
+        }
+
+    def _despejar_ociosos(self, maximo: int = 8) -> None:
+        # Poucos por chamada: custo amortizado O(1)
+        for _ in range(maximo):
+            if not self._estados:
+                return
+            numero, estado = next(iter(self._estados.items()))
+            if not estado.balde.cheio():
+                return
+            del self._estados[numero]
+
+
+_SQL_GRAVAR_LIMITE = """
+INSERT INTO limites (numero, tokens, atualizado, ultimo_texto, ultimo_instante, avisado)
+VALUES (?, ?, ?, ?, ?, 0)
+ON CONFLICT (numero) DO UPDATE SET
+    tokens = excluded.tokens, atualizado = excluded.atualizado,
+    ultimo_texto = excluded.ultimo_texto, ultimo_instante = excluded.ultimo_instante, avisado = 0
+"""
+
+# Balde já cheio de novo e fora da janela de repetição: equivale a um número novo
+_SQL_DESPEJAR_LIMITES = """
+DELETE FROM limites
+WHERE MIN(tokens + (:agora - atualizado) * :taxa, :rajada) >= :rajada AND :agora - ultimo_instante >= :janela
+"""
+
+
+class LimitadorEntradaCompartilhado(LimitadorEntrada):
+    """Como LimitadorEntrada, mas com os baldes na tabela 'limites' do estado comum aos workers.
+
+    Cada verificação é uma transação: o limite vale para o número, não para
+    o processo que recebeu o webhook. Os contadores (aceitos, descartados,
+    agrupados) continuam sendo do processo, como as demais métricas.
+    """
+
+    def __init__(self, estado: EstadoCompartilhado = estado_compartilhado, **kwargs):
+        super().__init__(**kwargs)
+        self.estado = estado
+        self._operacoes = 0
+
+    def verificar(self, numero: str, texto: str) -> Optional[str]:
+        # time.time(): o relógio precisa ser o mesmo em todos os processos
+        agora = time.time()
+        texto = " ".join(texto.lower().split())
+        comando = texto.split(" ", 1)[0]
+        with self.estado.transacao() as con:
+            self._operacoes += 1
+            if self._operacoes % 256 == 0:
+                con.execute(_SQL_DESPEJAR_LIMITES, {
+                    "agora": agora, "taxa": self.taxa, "rajada": self.rajada, "janela": self.janela_repeticao
+                })
+            linha = con.execute(
+                "SELECT tokens, atualizado, ultimo_texto, ultimo_instante FROM limites WHERE numero = ?", (numero,)
+            ).fetchone()
+            if linha is None:
+                tokens, ultimo_texto, ultimo_instante = self.rajada, "", 0.0
+            else:
+                tokens = min(self.rajada, linha[0] + (agora - linha[1]) * self.taxa)
+                ultimo_texto, ultimo_instante = linha[2], linha[3]
+
+            if comando not in SEM_AGRUPAR and texto == ultimo_texto and agora - ultimo_instante < self.janela_repeticao:
+                self.agrupados += 1
+                return "coalesced"
+
+            # Mesma regra do BaldeTokens.tentar: sem saldo, nada é consumido
+            custo = min(CUSTOS.get(comando, 1), self.rajada)
+            if tokens < custo:
+                self.descartados += 1
+                return "rate_limited"
+
+            con.execute(_SQL_GRAVAR_LIMITE, (numero, tokens - custo, agora, texto, agora))
+            self.aceitos += 1
+            return None
+
+    def avisar(self, numero: str) -> bool:
+        con = self.estado.conexao()
+        return con.execute("UPDATE limites SET avisado = 1 WHERE numero = ? AND avisado = 0", (numero,)).rowcount == 1
+
+    def estatisticas(self) -> Dict:
+        estatisticas = super().estatisticas()
+        estatisticas["numeros"] = self.estado.conexao().execute("SELECT COUNT(*) FROM limites").fetchone()[0]
+        return estatisticas
+
+
+# Instância global
+limitador_entrada = LimitadorEntradaCompartilhado() if WORKERS > 1 else LimitadorEntrada()
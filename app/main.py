@@ -1,69 +1,207 @@
+from contextlib import asynccontextmanager
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import HOST, PORT
+from config import HOST, PORT, RECARGA_INTERVALO, ARMAZENAMENTO, WORKERS
 
 from .whatsapp import whatsapp_client
-from .commands import processar_comando
+from .despachante import despachante
+from .deduplicacao import mensagens_vistas
+from .cache_respostas import cache_respostas
+from .executor import executor_comandos
+from .cortes_manager import cortes_manager
+from .observador import observador_planilha
+from .paginacao import cursores_paginacao
+from .limitador import limitador_entrada
+from .resumo_diario import disparo_resumo
+from .historico import historico_conclusoes
+from . import metricas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Abre e fecha os recursos compartilhados do agente."""
+    # Carrega a planilha em segundo plano: o servidor aceita conexões sem esperar a leitura
+    threading.Thread(target=cortes_manager.iniciar, name="carga", daemon=True).start()
+    await whatsapp_client.iniciar()
+    await despachante.iniciar()
+    await disparo_resumo.iniciar()
+    # Só o backend CSV lê a planilha diretamente
+    if RECARGA_INTERVALO > 0 and ARMAZENAMENTO == "csv":
+        observador_planilha.iniciar()
+    yield
+    observador_planilha.parar()
+    await disparo_resumo.parar()
+    await despachante.parar()
+    await whatsapp_client.fechar()
+    executor_comandos.fechar()
+    cortes_manager.fechar()
+
 
 app = FastAPI(
     title="WhatsApp Cortes Agent",
     description="Agente para controle de cortes de produção via WhatsApp",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+SEPARADOR_RESPOSTAS = "\n\n---\n\n"
+AVISO_LIMITE = "Muitas mensagens em pouco tempo. Aguarde alguns segundos e envie o comando novamente."
+
+fila_envio = metricas.registro.medidor("cortes_fila_envio", "Estado da fila de envio de respostas", "campo")
+deduplicacao = metricas.registro.medidor("cortes_deduplicacao", "Cache de mensagens já vistas", "campo")
+cache_respostas_medidor = metricas.registro.medidor("cortes_cache_respostas", "Cache de respostas dos comandos", "campo")
+limite_entrada = metricas.registro.medidor(
+    "cortes_limite_entrada", "Comandos recebidos aceitos, descartados por limite e agrupados", "campo"
 )
 
 
+@metricas.registro.coletor
+def _coletar_estatisticas():
+    for medidor, estatisticas in (
+        (fila_envio, despachante.estatisticas()),
+        (deduplicacao, mensagens_vistas.estatisticas()),
+        (cache_respostas_medidor, cache_respostas.estatisticas()),
+        (limite_entrada, limitador_entrada.estatisticas()),
+    ):
+        for campo, valor in estatisticas.items():
+            medidor.definir(valor, campo)
+
+
 async def processar_mensagem(numero: str, texto: str):
-    """Processa a mensagem e envia a resposta."""
-    # Processa o comando
-    resposta = processar_comando(texto)
+    """Processa a mensagem e coloca a resposta na fila de envio."""
+    metricas.tarefas_em_andamento.incrementar()
+    try:
+        # Processa o comando em uma thread, sem bloquear o event loop
+        resposta = await executor_comandos.executar(texto, numero)
+
+        # Enfileira a resposta (ordem por número e limite de taxa ficam no despachante)
+        await despachante.enfileirar(numero, resposta)
+    finally:
+        metricas.tarefas_em_andamento.decrementar()
+
+
+async def processar_lote(grupos: Dict[str, List[str]]):
+    """Processa as mensagens de um webhook em lote e enfileira uma resposta por remetente."""
+    metricas.tarefas_em_andamento.incrementar()
+    try:
+        # Uma única tarefa: conclusões em uma gravação, consultas no mesmo estado dos dados
+        textos = [texto for lista in grupos.values() for texto in lista]
+        numeros = [numero for numero, lista in grupos.items() for _ in lista]
+        respostas = iter(await executor_comandos.executar_lote(textos, numeros))
+
+        # As respostas de cada remetente vão juntas, numa única mensagem
+        for numero, lista in grupos.items():
+            await despachante.enfileirar(numero, SEPARADOR_RESPOSTAS.join(next(respostas) for _ in lista))
+    finally:
+        metricas.tarefas_em_andamento.decrementar()
+
+
+def _motivo_ignorar(dados: dict) -> Optional[str]:
+    """Motivo para descartar a mensagem, ou None se ela deve ser processada."""
+    # Ignora mensagens enviadas por mim mesmo
+    if dados.get("from_me", False):
+        return "own_message"
 
-    # Envia a resposta via WhatsApp
-    await whatsapp_client.enviar_mensagem(numero, resposta)
+    # Ignora mensagens de grupo (opcional)
+    if dados.get("is_group", False):
+        return "group_message"
+
+    # Ignora reentregas da mesma mensagem (a Evolution API repete webhooks)
+    message_id = dados.get("id", "")
+    if message_id and mensagens_vistas.ja_visto(f"{dados.get('numero', '')}:{message_id}"):
+        return "duplicate"
+
+    # Ignora mensagens vazias
+    if not dados.get("texto", "").strip():
+        return "empty_message"
+
+    if not dados.get("numero", ""):
+        return "no_number"
+
+    # Limite por número e repetições do mesmo comando ("rate_limited"/"coalesced")
+    return limitador_entrada.verificar(dados["numero"], dados["texto"].strip())
+
+
+def _triagem(mensagens: List[dict]) -> List[Tuple[Optional[str], bool]]:
+    """(motivo para ignorar, se avisa do limite) de cada mensagem do webhook.
+
+    Só o primeiro descarte de uma rajada recusada recebe aviso; os seguintes
+    são silenciosos.
+    """
+    resultado = []
+    for dados in mensagens:
+        motivo = "error" if "erro" in dados else _motivo_ignorar(dados)
+        resultado.append((motivo, motivo == "rate_limited" and limitador_entrada.avisar(dados["numero"])))
+    return resultado
 
 
 @app.post("/webhook")
 async def webhook(request: Request, background_tasks: BackgroundTasks):
     """Endpoint para receber webhooks da Evolution API."""
+    inicio = time.perf_counter()
     try:
-        payload = await request.json()
+        corpo = await request.body()
 
-        # Extrai dados da mensagem
-        dados = whatsapp_client.extrair_dados_webhook(payload)
+        # Eventos que não são mensagens, de grupo ou enviadas por mim: descarta antes do parse
+        motivo = whatsapp_client.motivo_rejeicao_rapida(corpo)
+        if motivo:
+            return JSONResponse({"status": "ignored", "reason": motivo})
 
-        # Ignora se houver erro na extração
-        if "erro" in dados:
-            return JSONResponse({"status": "error", "message": dados["erro"]})
+        # Extrai dados das mensagens (um webhook pode trazer várias); o payload não é guardado
+        mensagens = whatsapp_client.extrair_mensagens_corpo(corpo)
 
-        # Ignora mensagens enviadas por mim mesmo
-        if dados.get("from_me", False):
-            return JSONResponse({"status": "ignored", "reason": "own_message"})
+        # Com vários workers, deduplicação e limite consultam o SQLite comum: fora do event loop
+        triagem = await asyncio.to_thread(_triagem, mensagens) if WORKERS > 1 else _triagem(mensagens)
+        for dados, (_, avisar) in zip(mensagens, triagem):
+            if avisar:
+                background_tasks.add_task(despachante.enfileirar, dados["numero"], AVISO_LIMITE)
 
-        # Ignora mensagens de grupo (opcional)
-        if dados.get("is_group", False):
-            return JSONResponse({"status": "ignored", "reason": "group_message"})
+        if len(mensagens) == 1:
+            dados = mensagens[0]
+            motivo = triagem[0][0]
 
-        # Ignora mensagens vazias
-        texto = dados.get("texto", "").strip()
-        if not texto:
-            return JSONResponse({"status": "ignored", "reason": "empty_message"})
+            # Ignora se houver erro na extração
+            if motivo == "error":
+                return JSONResponse({"status": "error", "message": dados["erro"]})
 
-        numero = dados.get("numero", "")
-        if not numero:
-            return JSONResponse({"status": "ignored", "reason": "no_number"})
+            if motivo:
+                return JSONResponse({"status": "ignored", "reason": motivo})
 
-        # Processa a mensagem em background para responder rápido ao webhook
-        background_tasks.add_task(processar_mensagem, numero, texto)
+            # Processa a mensagem em background para responder rápido ao webhook
+            background_tasks.add_task(processar_mensagem, dados["numero"], dados["texto"].strip())
+            return JSONResponse({"status": "ok", "message": "processing"})
 
-        return JSONResponse({"status": "ok", "message": "processing"})
+        # Lote: agrupa por remetente, mantendo a ordem das mensagens de cada um
+        grupos: Dict[str, List[str]] = {}
+        ignoradas: Dict[str, int] = {}
+        for dados, (motivo, _) in zip(mensagens, triagem):
+            if motivo:
+                ignoradas[motivo] = ignoradas.get(motivo, 0) + 1
+                continue
+            grupos.setdefault(dados["numero"], []).append(dados["texto"].strip())
+
+        if not grupos:
+            return JSONResponse({"status": "ignored", "reason": "no_messages", "ignored": ignoradas})
+
+        background_tasks.add_task(processar_lote, grupos)
+        aceitas = sum(len(textos) for textos in grupos.values())
+        return JSONResponse({"status": "ok", "message": "processing", "accepted": aceitas, "ignored": ignoradas})
 
     except Exception as e:
         return JSONResponse({"status": "error", "message": str(e)})
 
+    finally:
+        metricas.webhook_duracao.observar(time.perf_counter() - inicio)
+
 
 @app.get("/")
 async def root():
@@ -78,7 +216,22 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "fila_envio": despachante.estatisticas(),
+        "deduplicacao": mensagens_vistas.estatisticas(),
+        "cache_respostas": cache_respostas.estatisticas(),
+        "paginacao": cursores_paginacao.estatisticas(),
+        "limite_entrada": limitador_entrada.estatisticas(),
+        "resumo_diario": disparo_resumo.estatisticas(),
+        "historico": historico_conclusoes.estatisticas()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas no formato texto do Prometheus."""
+    return PlainTextResponse(metricas.registro.exportar(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
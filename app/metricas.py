@@ -0,0 +1,153 @@
+"""Métricas no formato texto do Prometheus (endpoint /metrics).
+
+Os registros são só incrementos em listas/dicts pré-alocados, sem lock: sob
+o GIL uma corrida entre threads pode, raramente, perder um incremento, o que
+é aceitável para métricas e mantém o custo fora do caminho crítico.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+BUCKETS_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Serie:
+    __slots__ = ("contagens", "soma")
+
+    def __init__(self, n_buckets: int):
+        # Um contador por bucket + o bucket +Inf (acumulados só na exportação)
+        self.contagens = [0] * (n_buckets + 1)
+        self.soma = 0.0
+
+
+class Histograma:
+    def __init__(self, nome: str, ajuda: str, rotulo: Optional[str] = None, buckets: Tuple[float, ...] = BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulo = rotulo
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, _Serie] = {}
+
+    def observar(self, valor: float, rotulo: str = "") -> None:
+        serie = self._series.get(rotulo)
+        if serie is None:
+            serie = self._series.setdefault(rotulo, _Serie(len(self.buckets)))
+        serie.contagens[bisect_left(self.buckets, valor)] += 1
+        serie.soma += valor
+
+    def exportar(self) -> Iterable[str]:
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} histogram"
+        for rotulo, serie in list(self._series.items()):
+            base = _rotulos(self.rotulo, rotulo)
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, serie.contagens):
+                acumulado += contagem
+                yield f'{self.nome}_bucket{{{base}le="{limite}"}} {acumulado}'
+            acumulado += serie.contagens[-1]
+            yield f'{self.nome}_bucket{{{base}le="+Inf"}} {acumulado}'
+            yield f"{self.nome}_sum{_chaves(base)} {serie.soma}"
+            yield f"{self.nome}_count{_chaves(base)} {acumulado}"
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulo: Optional[str] = None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulo = rotulo
+        self._valores: Dict[str, float] = {}
+
+    def incrementar(self, rotulo: str = "", valor: float = 1) -> None:
+        self._valores[rotulo] = self._valores.get(rotulo, 0) + valor
+
+    def exportar(self) -> Iterable[str]:
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} {self.tipo}"
+        for rotulo, valor in list(self._valores.items()):
+            yield f"{self.nome}{_chaves(_rotulos(self.rotulo, rotulo))} {valor}"
+
+
+class Medidor(Contador):
+    tipo = "gauge"
+
+    def definir(self, valor: float, rotulo: str = "") -> None:
+        self._valores[rotulo] = valor
+
+    def decrementar(self, rotulo: str = "", valor: float = 1) -> None:
+        self.incrementar(rotulo, -valor)
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: List = []
+        self._coletores: List[Callable[[], None]] = []
+
+    def histograma(self, nome: str, ajuda: str, rotulo: Optional[str] = None, buckets=BUCKETS_PADRAO) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, rotulo, buckets))
+
+    def contador(self, nome: str, ajuda: str, rotulo: Optional[str] = None) -> Contador:
+        return self._registrar(Contador(nome, ajuda, rotulo))
+
+    def medidor(self, nome: str, ajuda: str, rotulo: Optional[str] = None) -> Medidor:
+        return self._registrar(Medidor(nome, ajuda, rotulo))
+
+    def coletor(self, func: Callable[[], None]) -> Callable[[], None]:
+        """Registra uma função que atualiza medidores na hora da coleta (/metrics)."""
+        self._coletores.append(func)
+        return func
+
+    def exportar(self) -> str:
+        for coletor in self._coletores:
+            coletor()
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+    def _registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+
+def _rotulos(nome: Optional[str], valor: str) -> str:
+    if not nome:
+        return ""
+    valor = valor.replace("\\", "\\\\").replace('"', '\\"')
+    return f'{nome}="{valor}",'
+
+
+def _chaves(rotulos: str) -> str:
+    return "{" + rotulos.rstrip(",") + "}" if rotulos else ""
+
+
+# Instância global e métricas do agente
+registro = RegistroMetricas()
+
+comando_duracao = registro.histograma(
+    "cortes_comando_duracao_segundos", "Tempo de execução de cada comando", "comando"
+)
+webhook_duracao = registro.histograma(
+    "cortes_webhook_duracao_segundos", "Tempo para aceitar um webhook da Evolution API"
+)
+envio_duracao = registro.histograma(
+    "cortes_evolution_envio_duracao_segundos", "Latência do sendText na Evolution API"
+)
+envio_total = registro.contador(
+    "cortes_evolution_envio_total", "Envios para a Evolution API por status HTTP", "status"
+)
+planilha_carga_duracao = registro.histograma(
+    "cortes_planilha_carga_duracao_segundos", "Tempo de leitura e parse da planilha",
+    buckets=BUCKETS_PADRAO + (30.0, 60.0)
+)
+planilha_gravacao_duracao = registro.histograma(
+    "cortes_planilha_gravacao_duracao_segundos", "Tempo de gravação (compactação) da planilha",
+    buckets=BUCKETS_PADRAO + (30.0, 60.0)
+)
+cache_planilha_total = registro.contador(
+    "cortes_cache_planilha_total", "Cargas da planilha pelo cache binário (acerto) ou pelo CSV (falha)", "resultado"
+)
+planilha_linhas = registro.medidor("cortes_planilha_linhas", "Linhas na última leitura/gravação da planilha")
+tarefas_em_andamento = registro.medidor(
+    "cortes_tarefas_em_andamento", "Mensagens sendo processadas em background"
+)
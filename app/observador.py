@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import RECARGA_INTERVALO
+
+from .cortes_manager import CortesManager, cortes_manager
+
+try:
+    # Opcional: notificações do kernel em vez de polling (Linux)
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+class ObservadorPlanilha:
+    """Thread que detecta edições no CSV e recarrega o CortesManager em segundo plano.
+
+    Usa inotify quando disponível; senão faz polling de stat (tamanho/mtime).
+    Em ambos os casos o hash do conteúdo é conferido antes de recarregar.
+    """
+
+    def __init__(self, manager: CortesManager, intervalo: float = RECARGA_INTERVALO):
+        self.manager = manager
+        self.intervalo = intervalo
+        self.recargas = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self) -> None:
+        if self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._observar, name="observador", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join()
+        self._thread = None
+
+    def _observar(self) -> None:
+        inotify = self._criar_inotify()
+        while not self._parar.is_set():
+            if inotify is not None:
+                # Acorda com o evento ou no intervalo, para poder checar _parar
+                inotify.read(timeout=int(self.intervalo * 1000))
+            elif self._parar.wait(self.intervalo):
+                break
+            try:
+                if self.manager.planilha_alterada():
+                    self.manager.recarregar()
+                    self.recargas += 1
+            except Exception:
+                # Arquivo no meio de uma gravação externa: tenta de novo no próximo ciclo
+                pass
+        if inotify is not None:
+            inotify.close()
+
+    def _criar_inotify(self):
+        if INotify is None:
+            return None
+        try:
+            inotify = INotify()
+            pasta = os.path.dirname(os.path.abspath(self.manager.csv_path))
+            inotify.add_watch(pasta, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+            return inotify
+        except OSError:
+            return None
+
+
+# Instância global
+observador_planilha = ObservadorPlanilha(cortes_manager)
@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PAGINACAO_TTL, PAGINACAO_MAX, WORKERS
+
+from .estado_compartilhado import EstadoCompartilhado, estado_compartilhado
+
+
+class Cursor:
+    """Posição de um remetente dentro do resultado da última consulta paginada."""
+
+    __slots__ = ("comando", "args", "versao", "posicao", "itens")
+
+    def __init__(self, comando: str, args: List[str], versao, posicao: int):
+        self.comando = comando
+        self.args = list(args)
+        # Versão dos dados em que a ordenação foi feita: se mudar, o cursor não vale mais
+        self.versao = versao
+        self.posicao = posicao
+        # Resultado já filtrado (lista/espessura), guardado na primeira página seguinte
+        self.itens: Optional[List[dict]] = None
+
+
+class CursoresPaginacao:
+    """Um cursor por remetente, com TTL e limite de tamanho (LRU).
+
+    Abrir um cursor o coloca no fim: a ordem do dict também é a de expiração.
+    """
+
+    def __init__(self, ttl: float = PAGINACAO_TTL, maximo: int = PAGINACAO_MAX):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._cursores: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def abrir(self, numero: str, comando: str, args: List[str], versao, posicao: int) -> None:
+        """Substitui o cursor do remetente por um novo (primeira página já enviada)."""
+        agora = time.monotonic()
+        with self._lock:
+            self._cursores.pop(numero, None)
+            while self._cursores and next(iter(self._cursores.values()))[0] <= agora:
+                self._cursores.popitem(last=False)
+            self._cursores[numero] = (agora + self.ttl, Cursor(comando, args, versao, posicao))
+            if len(self._cursores) > self.maximo:
+                self._cursores.popitem(last=False)
+
+    def obter(self, numero: str) -> Optional[Cursor]:
+        with self._lock:
+            item = self._cursores.get(numero)
+            if item is None:
+                return None
+            expira, cursor = item
+            if expira <= time.monotonic():
+                del self._cursores[numero]
+                return None
+            return cursor
+
+    def avancar(self, numero: str, cursor: Cursor, tamanho: int) -> None:
+        """Passa o cursor para a página seguinte (a atual acabou de ser enviada)."""
+        cursor.posicao += tamanho
+
+    def remover(self, numero: str) -> None:
+        with self._lock:
+            self._cursores.pop(numero, None)
+
+    def estatisticas(self) -> dict:
+        return {"cursores": len(self._cursores)}
+
+
+class CursoresPaginacaoCompartilhados:
+    """Como CursoresPaginacao, mas na tabela 'cursores' do estado comum aos workers.
+
+    O "mais" pode cair em outro processo que não o da primeira página. A
+    versão guardada é a marca dos dados (Armazenamento.marca_dados), que é
+    igual em todos os processos; o resultado filtrado (Cursor.itens) não é
+    guardado e é refeito a cada página.
+    """
+
+    def __init__(self, estado: EstadoCompartilhado = estado_compartilhado, ttl: float = PAGINACAO_TTL):
+        self.estado = estado
+        self.ttl = ttl
+        self._operacoes = 0
+
+    def abrir(self, numero: str, comando: str, args: List[str], versao, posicao: int) -> None:
+        agora = time.time()
+        con = self.estado.conexao()
+        self._operacoes += 1
+        if self._operacoes % 256 == 0:
+            con.execute("DELETE FROM cursores WHERE expira <= ?", (agora,))
+        con.execute(
+            "INSERT OR REPLACE INTO cursores (numero, comando, args, versao, posicao, expira) VALUES (?, ?, ?, ?, ?, ?)",
+            (numero, comando, json.dumps(list(args)), str(versao), posicao, agora + self.ttl)
+        )
+
+    def obter(self, numero: str) -> Optional[Cursor]:
+        linha = self.estado.conexao().execute(
+            "SELECT comando, args, versao, posicao FROM cursores WHERE numero = ? AND expira > ?",
+            (numero, time.time())
+        ).fetchone()
+        if linha is None:
+            return None
+        return Cursor(linha[0], json.loads(linha[1]), linha[2], linha[3])
+
+    def avancar(self, numero: str, cursor: Cursor, tamanho: int) -> None:
+        cursor.posicao += tamanho
+        self.estado.conexao().execute(
+            "UPDATE cursores SET posicao = ? WHERE numero = ? AND posicao = ?",
+            (cursor.posicao, numero, cursor.posicao - tamanho)
+        )
+
+    def remover(self, numero: str) -> None:
+        self.estado.conexao().execute("DELETE FROM cursores WHERE numero = ?", (numero,))
+
+    def estatisticas(self) -> dict:
+        cursores = self.estado.conexao().execute(
+            "SELECT COUNT(*) FROM cursores WHERE expira > ?", (time.time(),)
+        ).fetchone()[0]
+        return {"cursores": cursores}
+
+
+# Instância global
+cursores_paginacao = CursoresPaginacaoCompartilhados() if WORKERS > 1 else CursoresPaginacao()
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    RESUMO_HORARIO, RESUMO_CONCORRENCIA, RESUMO_TAXA, RESUMO_TENTATIVAS, RESUMO_PRAZO
+)
+
+from .assinantes import RegistroAssinantes, assinantes_resumo
+from .despachante import BaldeTokens
+from .executor import executor_comandos
+from .whatsapp import whatsapp_client
+
+logger = logging.getLogger(__name__)
+
+
+class DisparoResumo:
+    """Envia o resumo diário aos assinantes no horário configurado.
+
+    O texto é a resposta do comando "resumo" (montada uma vez por versão dos
+    dados, pelo cache de respostas). O envio vai direto ao WhatsAppClient, fora
+    da fila das respostas: no máximo 'concorrencia' envios simultâneos, ritmo de
+    'taxa' mensagens/segundo e até 'tentativas' por número, com espera entre
+    elas fora da vaga. O que não sair em 'prazo' segundos é abandonado.
+
+    O envio do dia é reservado no registro antes de começar e só conta como
+    feito ao terminar. Se falhar (ex.: planilha indisponível), é refeito a
+    cada 'espera_falha' segundos; se o processo cair no meio, é refeito
+    quando a reserva vence. O erro fica em 'ultimo' (e no /health).
+    """
+
+    def __init__(
+        self,
+        registro: RegistroAssinantes,
+        enviar: Callable[[str, str], Awaitable[dict]],
+        horario: str = RESUMO_HORARIO,
+        concorrencia: int = RESUMO_CONCORRENCIA,
+        taxa: float = RESUMO_TAXA,
+        tentativas: int = RESUMO_TENTATIVAS,
+        prazo: float = RESUMO_PRAZO,
+        espera_retentativa: float = 5.0,
+        espera_falha: float = 300.0
+    ):
+        self.registro = registro
+        self._enviar = enviar
+        self.horario = horario.strip()
+        # Validado já na criação: um horário inválido impede o startup em vez de parar o agendamento
+        self._hora_minuto = _ler_horario(self.horario)
+        self.concorrencia = concorrencia
+        self.taxa = taxa
+        self.tentativas = tentativas
+        self.prazo = prazo
+        self.espera_retentativa = espera_retentativa
+        self.espera_falha = espera_falha
+        self._tarefa: Optional[asyncio.Task] = None
+        self.ultimo: dict = {}
+
+    async def iniciar(self) -> None:
+        """Agenda os envios (chamado no startup); RESUMO_HORARIO vazio desliga."""
+        if self._tarefa is not None or self._hora_minuto is None:
+            return
+        self._tarefa = asyncio.create_task(self._agendar())
+
+    async def parar(self) -> None:
+        if self._tarefa is None:
+            return
+        self._tarefa.cancel()
+        await asyncio.gather(self._tarefa, return_exceptions=True)
+        self._tarefa = None
+
+    async def disparar_do_dia(self) -> dict:
+        """Envia o resumo de hoje, se nenhum processo já o enviou (ou está enviando)."""
+        dia = datetime.now().date().isoformat()
+        # A reserva cobre o prazo dos envios e a montagem do texto
+        # O registro faz flock e I/O de arquivo: fora do event loop
+        if not await asyncio.to_thread(self.registro.reservar_envio, dia, self.prazo + 60):
+            return {}
+        try:
+            resultado = await self.disparar()
+        except Exception as erro:
+            descricao = f"{type(erro).__name__}: {erro}"
+            await asyncio.to_thread(self.registro.falhar_envio, dia, descricao)
+            self.ultimo = {"dia": dia, "erro": descricao, "instante": datetime.now().isoformat(timespec="seconds")}
+            return self.ultimo
+        await asyncio.to_thread(self.registro.concluir_envio, dia)
+        return resultado
+
+    async def disparar(self) -> dict:
+        """Envia o resumo atual a todos os assinantes e retorna os totais."""
+        inicio = time.monotonic()
+        numeros = await asyncio.to_thread(self.registro.listar)
+        if not numeros:
+            self.ultimo = {"assinantes": 0, "enviados": 0, "falhas": 0, "expirados": 0, "duracao": 0.0}
+            return self.ultimo
+
+        texto = await executor_comandos.executar("resumo")
+        vagas = asyncio.Semaphore(self.concorrencia)
+        balde = BaldeTokens(self.taxa, self.concorrencia)
+
+        async def enviar_para(numero: str) -> bool:
+            for tentativa in range(self.tentativas):
+                async with vagas:
+                    espera = balde.reservar()
+                    if espera:
+                        await asyncio.sleep(espera)
+                    try:
+                        resultado = await self._enviar(numero, texto)
+                    except Exception:
+                        resultado = {}
+                if resultado.get("sucesso"):
+                    return True
+                # A espera da nova tentativa libera a vaga para os outros números
+                if tentativa + 1 < self.tentativas:
+                    await asyncio.sleep(self.espera_retentativa * 2 ** tentativa)
+            return False
+
+        tarefas = [asyncio.create_task(enviar_para(numero)) for numero in numeros]
+        concluidas, pendentes = await asyncio.wait(tarefas, timeout=self.prazo)
+        for tarefa in pendentes:
+            tarefa.cancel()
+        await asyncio.gather(*pendentes, return_exceptions=True)
+
+        enviados = sum(1 for tarefa in concluidas if tarefa.result())
+        self.ultimo = {
+            "assinantes": len(numeros),
+            "enviados": enviados,
+            "falhas": len(concluidas) - enviados,
+            "expirados": len(pendentes),
+            "duracao": round(time.monotonic() - inicio, 3)
+        }
+        return self.ultimo
+
+    def estatisticas(self) -> dict:
+        return {"horario": self.horario, **self.registro.estatisticas(), "ultimo_disparo": self.ultimo}
+
+    async def _agendar(self) -> None:
+        while True:
+            espera, dia = await asyncio.to_thread(self._proximo_envio)
+            await asyncio.sleep(espera)
+            # Retomada que passou da meia-noite: o resumo de ontem não sai mais
+            if datetime.now().date().isoformat() == dia:
+                try:
+                    await self.disparar_do_dia()
+                except OSError:
+                    # Registro inacessível (disco cheio, permissão): a reserva vence e o envio é refeito
+                    logger.exception("Falha ao atualizar o registro do resumo diario")
+
+    def _proximo_envio(self) -> Tuple[float, str]:
+        """(segundos de espera, dia do envio): o horário, ou a retomada do envio de hoje."""
+        agora = datetime.now()
+        hoje = agora.date().isoformat()
+        reserva = self.registro.reserva_do_dia(hoje)
+        if reserva is None:
+            espera = self._segundos_ate_proximo(agora)
+            return espera, (agora + timedelta(seconds=espera)).date().isoformat()
+        if reserva["erro"]:
+            return self.espera_falha, hoje
+        # Outro processo está enviando, ou caiu no meio: confere quando a reserva vencer
+        return max(reserva["expira"] - time.time(), 0) + 1, hoje
+
+    def _segundos_ate_proximo(self, agora: datetime) -> float:
+        hora, minuto = self._hora_minuto
+        alvo = agora.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        if alvo <= agora:
+            alvo += timedelta(days=1)
+        return (alvo - agora).total_seconds()
+
+
+def _ler_horario(horario: str) -> Optional[Tuple[int, int]]:
+    """"HH:MM" -> (hora, minuto); vazio -> None (resumo desligado)."""
+    if not horario:
+        return None
+    partes = re.fullmatch(r"(\d{1,2}):(\d{2})", horario)
+    if not partes or int(partes[1]) > 23 or int(partes[2]) > 59:
+        raise ValueError(f"RESUMO_HORARIO invalido: {horario!r} (use HH:MM, ex.: 07:00)")
+    return int(partes[1]), int(partes[2])
+
+
+# Instância global
+disparo_resumo = DisparoResumo(assinantes_resumo, whatsapp_client.enviar_mensagem)
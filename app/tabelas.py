@@ -0,0 +1,171 @@
+import csv
+import io
+import sys
+from array import array
+from typing import Dict, Iterable, List
+
+
+class TabelaPandas:
+    """Tabela sobre um DataFrame de strings (pandas só é importado aqui, sob demanda)."""
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.colunas = list(self.df.columns)
+        self._posicao = {c: i for i, c in enumerate(self.colunas)}
+
+    @classmethod
+    def ler_csv(cls, conteudo: bytes) -> "TabelaPandas":
+        import pandas as pd
+        df = pd.read_csv(io.BytesIO(conteudo), dtype=str)
+        return cls(df.fillna(""))
+
+    @classmethod
+    def vazia(cls, colunas: List[str]) -> "TabelaPandas":
+        import pandas as pd
+        return cls(pd.DataFrame(columns=colunas))
+
+    @classmethod
+    def de_codigos(cls, colunas: List[str], valores: Dict[str, List[str]], codigos: Dict[str, array]) -> "TabelaPandas":
+        """Monta a tabela a partir de colunas codificadas (cache binário), sem parse de texto."""
+        import numpy as np
+        import pandas as pd
+        return cls(pd.DataFrame({
+            c: np.asarray(valores[c], dtype=object)[np.frombuffer(codigos[c], dtype=np.uint32)]
+            for c in colunas
+        }))
+
+    def codificar(self, nome: str):
+        """(valores distintos, array de códigos) da coluna."""
+        import pandas as pd
+        codigos, valores = pd.factorize(self.df[nome])
+        return list(valores), array("I", codigos.astype("uint32").tobytes())
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def coluna(self, nome: str) -> List[str]:
+        return self.df[nome].tolist()
+
+    def valor(self, linha: int, nome: str) -> str:
+        return self.df.iat[linha, self._posicao[nome]]
+
+    def definir(self, linha: int, nome: str, valor: str) -> None:
+        self.df.iat[linha, self._posicao[nome]] = valor
+
+    def registro(self, linha: int) -> Dict:
+        return self.df.iloc[linha].to_dict()
+
+    def registros(self, linhas: List[int]) -> List[Dict]:
+        return self.df.iloc[linhas].to_dict("records")
+
+    def ordenar(self, linhas: Iterable[int], nome: str) -> List[int]:
+        valores = self.df[nome]
+        return sorted(linhas, key=valores.iat.__getitem__)
+
+    def copia(self) -> "TabelaPandas":
+        return TabelaPandas(self.df.copy())
+
+    def para_csv(self) -> bytes:
+        return self.df.to_csv(index=False).encode("utf-8")
+
+
+class TabelaCompacta:
+    """Tabela colunar sem pandas: cada coluna é um array de códigos (uint32)
+    apontando para a lista de valores distintos (strings internadas).
+
+    Colunas repetitivas (lista, espessura, opd, datas) custam ~4 bytes por linha.
+    """
+
+    __slots__ = ("colunas", "_valores", "_codigos", "_codigo_de")
+
+    def __init__(self, colunas: List[str]):
+        self.colunas = list(colunas)
+        self._valores: Dict[str, List[str]] = {c: [] for c in self.colunas}
+        self._codigos: Dict[str, array] = {c: array("I") for c in self.colunas}
+        self._codigo_de: Dict[str, Dict[str, int]] = {c: {} for c in self.colunas}
+
+    @classmethod
+    def ler_csv(cls, conteudo: bytes) -> "TabelaCompacta":
+        leitor = csv.reader(io.StringIO(conteudo.decode("utf-8")))
+        tabela = cls(next(leitor, []))
+        n = len(tabela.colunas)
+        linhas = [(campos + [""] * n)[:n] for campos in leitor if campos]
+        # Codifica coluna a coluna: o código de um valor novo é o tamanho atual do dicionário
+        for nome, valores in zip(tabela.colunas, zip(*linhas)):
+            codigo_de = tabela._codigo_de[nome]
+            tabela._codigos[nome] = array("I", [codigo_de.setdefault(v, len(codigo_de)) for v in valores])
+            tabela._valores[nome] = [sys.intern(v) for v in codigo_de]
+        return tabela
+
+    @classmethod
+    def vazia(cls, colunas: List[str]) -> "TabelaCompacta":
+        return cls(colunas)
+
+    @classmethod
+    def de_codigos(cls, colunas: List[str], valores: Dict[str, List[str]], codigos: Dict[str, array]) -> "TabelaCompacta":
+        """Monta a tabela a partir de colunas codificadas (cache binário), sem parse de texto."""
+        tabela = cls(colunas)
+        for c in tabela.colunas:
+            tabela._valores[c] = [sys.intern(v) for v in valores[c]]
+            tabela._codigos[c] = codigos[c]
+            tabela._codigo_de[c] = {v: i for i, v in enumerate(tabela._valores[c])}
+        return tabela
+
+    def codificar(self, nome: str):
+        """(valores distintos, array de códigos) da coluna."""
+        return self._valores[nome], self._codigos[nome]
+
+    def adicionar(self, campos: List[str]) -> None:
+        for nome, valor in zip(self.colunas, campos):
+            self._codigos[nome].append(self._codificar(nome, valor))
+
+    def _codificar(self, nome: str, valor: str) -> int:
+        codigos = self._codigo_de[nome]
+        codigo = codigos.get(valor)
+        if codigo is None:
+            codigo = codigos[valor] = len(self._valores[nome])
+            self._valores[nome].append(sys.intern(valor))
+        return codigo
+
+    def __len__(self) -> int:
+        return len(self._codigos[self.colunas[0]]) if self.colunas else 0
+
+    def coluna(self, nome: str) -> List[str]:
+        valores = self._valores[nome]
+        return [valores[c] for c in self._codigos[nome]]
+
+    def valor(self, linha: int, nome: str) -> str:
+        return self._valores[nome][self._codigos[nome][linha]]
+
+    def definir(self, linha: int, nome: str, valor: str) -> None:
+        self._codigos[nome][linha] = self._codificar(nome, valor)
+
+    def registro(self, linha: int) -> Dict:
+        return {c: self._valores[c][self._codigos[c][linha]] for c in self.colunas}
+
+    def registros(self, linhas: List[int]) -> List[Dict]:
+        return [self.registro(linha) for linha in linhas]
+
+    def ordenar(self, linhas: Iterable[int], nome: str) -> List[int]:
+        valores, codigos = self._valores[nome], self._codigos[nome]
+        return sorted(linhas, key=lambda linha: valores[codigos[linha]])
+
+    def copia(self) -> "TabelaCompacta":
+        nova = TabelaCompacta(self.colunas)
+        for c in self.colunas:
+            nova._valores[c] = list(self._valores[c])
+            nova._codigos[c] = array("I", self._codigos[c])
+            nova._codigo_de[c] = dict(self._codigo_de[c])
+        return nova
+
+    def para_csv(self) -> bytes:
+        saida = io.StringIO()
+        escritor = csv.writer(saida, lineterminator="\n")
+        escritor.writerow(self.colunas)
+        colunas = [(self._valores[c], self._codigos[c]) for c in self.colunas]
+        for linha in range(len(self)):
+            escritor.writerow([valores[codigos[linha]] for valores, codigos in colunas])
+        return saida.getvalue().encode("utf-8")
+
+
+TABELAS = {"pandas": TabelaPandas, "compacta": TabelaCompacta}
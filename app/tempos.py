@@ -0,0 +1,65 @@
+import re
+from array import array
+from typing import Dict, Iterable
+
+# Valores especiais (tempos reais são >= 0 minutos)
+SEM_TEMPO = -1
+TEMPO_INVALIDO = -2
+
+_RELOGIO = re.compile(r"(\d+):(\d{1,2})")
+_PARTES = re.compile(r"(\d+(?:[.,]\d+)?)\s*([a-z]*)")
+
+
+def minutos_corte(texto: str) -> int:
+    """Minutos de um tempo_corte da planilha ("1h", "30min", "1h30", "1,5h", "2:15", "5 hvs").
+
+    Unidades que começam com "h" são horas e com "m", minutos; um número sem
+    unidade logo depois de horas são os minutos ("1h30"). Retorna SEM_TEMPO
+    para vazio e TEMPO_INVALIDO para texto que não dá para interpretar.
+    """
+    texto = str(texto).strip().lower()
+    if not texto:
+        return SEM_TEMPO
+    relogio = _RELOGIO.fullmatch(texto)
+    if relogio:
+        return int(relogio.group(1)) * 60 + int(relogio.group(2))
+
+    total = 0.0
+    unidade_anterior = ""
+    fim = 0
+    for parte in _PARTES.finditer(texto):
+        if texto[fim:parte.start()].strip():
+            return TEMPO_INVALIDO
+        numero = float(parte.group(1).replace(",", "."))
+        unidade = parte.group(2)
+        if unidade.startswith("h"):
+            total += numero * 60
+        elif unidade.startswith("m") or (not unidade and unidade_anterior.startswith("h")):
+            total += numero
+        else:
+            return TEMPO_INVALIDO
+        unidade_anterior = unidade
+        fim = parte.end()
+    if not fim or texto[fim:].strip():
+        return TEMPO_INVALIDO
+    return round(total)
+
+
+def minutos(valores: Iterable[str]) -> array:
+    """Converte a coluna tempo_corte inteira; cada valor distinto é interpretado uma vez só."""
+    convertidos: Dict[str, int] = {}
+    resultado = array("i")
+    for valor in valores:
+        convertido = convertidos.get(valor)
+        if convertido is None:
+            convertido = convertidos[valor] = minutos_corte(valor)
+        resultado.append(convertido)
+    return resultado
+
+
+def formatar_minutos(total: int) -> str:
+    """"45min", "3h", "12h30"."""
+    horas, resto = divmod(total, 60)
+    if not horas:
+        return f"{resto}min"
+    return f"{horas}h{resto:02d}" if resto else f"{horas}h"
@@ -1,9 +1,33 @@
 import httpx
+import importlib.util
+import json
 import os
+import re
 import sys
+import time
+from typing import List, Optional
+
+# orjson é opcional (pip install orjson): decodifica o corpo do webhook bem mais rápido
+try:
+    import orjson
+    _carregar_json = orjson.loads
+except ImportError:
+    _carregar_json = json.loads
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import EVOLUTION_API_URL, EVOLUTION_API_KEY, EVOLUTION_INSTANCE
+from config import (
+    EVOLUTION_API_URL, EVOLUTION_API_KEY, EVOLUTION_INSTANCE,
+    HTTP_MAX_CONEXOES, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRA, HTTP2,
+    HTTP_TIMEOUT_CONEXAO, HTTP_TIMEOUT_LEITURA
+)
+
+from . import metricas
+
+# Campos procurados direto nos bytes do corpo, antes do parse completo
+_RE_EVENTO = re.compile(rb'"event"\s*:\s*"([^"]*)"')
+_RE_REMOTE_JID = re.compile(rb'"remoteJid"\s*:\s*"([^"]*)"')
+_RE_FROM_ME = re.compile(rb'"fromMe"\s*:\s*(true|false)')
+_RE_TEXTO = re.compile(rb'"(?:conversation|extendedTextMessage)"\s*:')
 
 
 class WhatsAppClient:
@@ -15,6 +39,32 @@ class WhatsAppClient:
             "apikey": self.api_key,
             "Content-Type": "application/json"
         }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def iniciar(self) -> None:
+        """Abre o pool de conexões com a Evolution API (chamado no startup)."""
+        if self._client is not None:
+            return
+
+        # HTTP/2 depende do pacote opcional "h2" (pip install httpx[http2])
+        http2 = HTTP2 and importlib.util.find_spec("h2") is not None
+
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONEXOES,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRA
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT_LEITURA, connect=HTTP_TIMEOUT_CONEXAO)
+        )
+
+    async def fechar(self) -> None:
+        """Fecha o pool de conexões (chamado no shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def enviar_mensagem(self, numero: str, mensagem: str) -> dict:
         """Envia uma mensagem de texto via Evolution API."""
@@ -28,24 +78,35 @@ class WhatsAppClient:
             "text": mensagem
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                return {
-                    "sucesso": response.status_code == 200 or response.status_code == 201,
-                    "status_code": response.status_code,
-                    "response": response.json() if response.text else {}
-                }
-            except Exception as e:
-                return {
-                    "sucesso": False,
-                    "erro": str(e)
-                }
+        # Fallback para uso fora do FastAPI (ex.: scripts locais)
+        if self._client is None:
+            await self.iniciar()
+
+        inicio = time.perf_counter()
+        status = "erro"
+        try:
+            response = await self._client.post(url, json=payload)
+            status = str(response.status_code)
+        except Exception as e:
+            return {
+                "sucesso": False,
+                "erro": str(e)
+            }
+        finally:
+            # Uma observação por envio, com o status HTTP recebido (ou "erro" sem resposta)
+            metricas.envio_duracao.observar(time.perf_counter() - inicio)
+            metricas.envio_total.incrementar(status)
+
+        # Corpo fora do formato JSON (proxy, página de erro) não muda o resultado do envio
+        try:
+            corpo = response.json() if response.text else {}
+        except ValueError:
+            corpo = {"texto": response.text}
+        return {
+            "sucesso": response.status_code == 200 or response.status_code == 201,
+            "status_code": response.status_code,
+            "response": corpo
+        }
 
     def _formatar_numero(self, numero: str) -> str:
         """Remove caracteres especiais do número."""
@@ -58,6 +119,45 @@ class WhatsAppClient:
 
         return numero_limpo
 
+    def motivo_rejeicao_rapida(self, corpo: bytes) -> Optional[str]:
+        """Descarta pelo corpo bruto, sem montar o JSON, os eventos que nunca viram comando.
+
+        Só rejeita quando o motivo vale para todas as mensagens do corpo (em
+        caso de dúvida, o webhook segue para o parse completo).
+        """
+        evento = _RE_EVENTO.search(corpo)
+        if evento and evento.group(1).lower().replace(b"_", b".") != b"messages.upsert":
+            return "not_message_event"
+
+        from_me = _RE_FROM_ME.findall(corpo)
+        jids = _RE_REMOTE_JID.findall(corpo)
+        if from_me and len(from_me) >= len(jids) and all(valor == b"true" for valor in from_me):
+            return "own_message"
+        if jids and all(jid.endswith(b"@g.us") for jid in jids):
+            return "group_message"
+
+        # Mídia, status, reações...: nenhum campo de texto no corpo
+        if not _RE_TEXTO.search(corpo):
+            return "empty_message"
+        return None
+
+    def extrair_mensagens_corpo(self, corpo: bytes) -> List[dict]:
+        """Decodifica o corpo bruto do webhook e extrai as mensagens."""
+        return self.extrair_mensagens_webhook(_carregar_json(corpo))
+
+    def extrair_mensagens_webhook(self, payload: dict) -> List[dict]:
+        """Extrai todas as mensagens do webhook.
+
+        Em rajadas (ex.: reconexão) a Evolution API entrega várias mensagens no
+        mesmo MESSAGES_UPSERT: "data" vem como lista ou com uma lista em "messages".
+        """
+        data = payload.get("data", {})
+        if isinstance(data, dict) and isinstance(data.get("messages"), list):
+            data = data["messages"]
+        if not isinstance(data, list):
+            return [self.extrair_dados_webhook(payload)]
+        return [self.extrair_dados_webhook({**payload, "data": item}) for item in data]
+
     def extrair_dados_webhook(self, payload: dict) -> dict:
         """Extrai dados relevantes do webhook da Evolution API."""
         try:
@@ -85,17 +185,19 @@ class WhatsAppClient:
             # Verifica se é mensagem enviada por mim (para ignorar)
             from_me = key.get("fromMe", False)
 
+            # Id da mensagem (usado para descartar reentregas do webhook)
+            message_id = key.get("id", "")
+
             return {
+                "id": message_id,
                 "numero": numero,
                 "texto": texto.strip(),
                 "is_group": is_group,
-                "from_me": from_me,
-                "raw": payload
+                "from_me": from_me
             }
         except Exception as e:
             return {
-                "erro": str(e),
-                "raw": payload
+                "erro": str(e)
             }
 
 
@@ -0,0 +1,173 @@
+"""
+Benchmark do CortesManager em planilhas sintéticas.
+Execute: python benchmarks/bench_cortes_manager.py [--linhas 10000 100000 1000000]
+
+Cada combinação (armazenamento, tamanho) roda em um subprocesso separado,
+para medir o pico de memória de forma isolada. Os resultados são
+acrescentados em benchmarks/resultados.jsonl e comparados com a execução
+anterior da mesma combinação.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.gerar_dados import gerar_planilha
+
+RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados.jsonl")
+ARMAZENAMENTOS = ["csv:pandas", "csv:compacta", "sqlite"]
+
+
+def _percentis(amostras):
+    ordenadas = sorted(amostras)
+
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+
+    return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "max": ordenadas[-1] * 1000, "n": len(ordenadas)}
+
+
+def _medir(func, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        amostras.append(time.perf_counter() - inicio)
+    return _percentis(amostras)
+
+
+def executar_interno(csv_path: str, repeticoes: int) -> dict:
+    """Roda dentro do subprocesso já configurado pelas variáveis de ambiente."""
+    from app.cortes_manager import CortesManager, criar_armazenamento
+
+    rnd = random.Random(7)
+    resultados = {}
+
+    inicio = time.perf_counter()
+    manager = CortesManager(csv_path, armazenamento=criar_armazenamento(csv_path=csv_path))
+    manager.iniciar()
+    resultados["carga"] = _percentis([time.perf_counter() - inicio])
+
+    pendentes = [c["numero"] for c in manager.get_pendentes(100000) if c["numero"] != "0"]
+    amostra = [manager.get_detalhe(n) for n in rnd.sample(pendentes, min(200, len(pendentes)))]
+    listas = [c["lista_corte"] for c in amostra]
+    opds = [c["opd"] or "olfar" for c in amostra]
+    termos = [c["numero"][-3:] for c in amostra] + ["faltantes", "olfar", "6.35"]
+
+    resultados["get_status_geral"] = _medir(manager.get_status_geral, repeticoes)
+    resultados["get_pendentes"] = _medir(lambda: manager.get_pendentes(15), repeticoes)
+    resultados["get_por_lista"] = _medir(lambda: manager.get_por_lista(rnd.choice(listas)), repeticoes)
+    resultados["get_por_opd"] = _medir(lambda: manager.get_por_opd(rnd.choice(opds)), repeticoes)
+    resultados["buscar"] = _medir(lambda: manager.buscar(rnd.choice(termos)), repeticoes)
+
+    a_concluir = iter(rnd.sample(pendentes, min(repeticoes, len(pendentes))))
+    resultados["concluir_corte"] = _medir(lambda: manager.concluir_corte(next(a_concluir)), min(repeticoes, len(pendentes)))
+    resultados["recarregar"] = _medir(manager.recarregar, max(1, repeticoes // 20))
+
+    manager.fechar()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+    return {"operacoes": resultados, "pico_rss_mb": rss / 1024}
+
+
+def executar(armazenamento: str, linhas: int, repeticoes: int, pasta: str) -> dict:
+    planilha = os.path.join(pasta, f"cortes_{linhas}.csv")
+    if not os.path.exists(planilha):
+        gerar_planilha(planilha, linhas)
+
+    # Cópia limpa por execução (concluir_corte altera a planilha e cria journal/banco)
+    trabalho = tempfile.mkdtemp(dir=pasta)
+    csv_path = os.path.join(trabalho, "cortes.csv")
+    shutil.copy(planilha, csv_path)
+
+    tipo, _, tabela = armazenamento.partition(":")
+    env = dict(
+        os.environ, ARMAZENAMENTO=tipo, TABELA=tabela or "pandas", DATA_PATH=csv_path,
+        SQLITE_PATH=os.path.join(trabalho, "cortes.db"), RECARGA_INTERVALO="0",
+        HISTORICO_ARQUIVO=os.path.join(trabalho, "historico.jsonl")
+    )
+    if tipo == "sqlite":
+        # A importação inicial do CSV fica fora da medida de carga
+        subprocess.run(
+            [sys.executable, "-m", "app.armazenamento_sqlite", csv_path, env["SQLITE_PATH"]],
+            env=env, cwd=RAIZ, check=True, capture_output=True
+        )
+
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--interno", csv_path, "--repeticoes", str(repeticoes)],
+        env=env, cwd=RAIZ, capture_output=True, text=True
+    )
+    shutil.rmtree(trabalho, ignore_errors=True)
+    if saida.returncode != 0:
+        raise RuntimeError(saida.stderr)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def _ultimo_resultado(armazenamento: str, linhas: int):
+    if not os.path.exists(RESULTADOS):
+        return None
+    ultimo = None
+    with open(RESULTADOS, encoding="utf-8") as f:
+        for linha in f:
+            registro = json.loads(linha)
+            if registro["armazenamento"] == armazenamento and registro["linhas"] == linhas:
+                ultimo = registro
+    return ultimo
+
+
+def _imprimir(registro: dict, anterior) -> None:
+    print(f"\n{registro['armazenamento']} - {registro['linhas']} linhas - pico RSS {registro['pico_rss_mb']:.0f} MB")
+    print(f"{'operacao':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'vs anterior':>14}")
+    for nome, p in registro["operacoes"].items():
+        delta = ""
+        if anterior and nome in anterior["operacoes"] and anterior["operacoes"][nome]["p50"] > 0:
+            variacao = p["p50"] / anterior["operacoes"][nome]["p50"] - 1
+            delta = f"{variacao:+.0%}"
+        print(f"{nome:<18}{p['p50']:>10.3f}{p['p95']:>10.3f}{p['p99']:>10.3f}{p['max']:>10.3f}{delta:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do CortesManager")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--armazenamentos", nargs="+", default=ARMAZENAMENTOS)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--pasta", default=None, help="onde guardar as planilhas geradas")
+    parser.add_argument("--nao-salvar", action="store_true", help="não grava em resultados.jsonl")
+    parser.add_argument("--interno", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(executar_interno(args.interno, args.repeticoes)))
+        return
+
+    pasta = args.pasta or os.path.join(tempfile.gettempdir(), "bench_cortes")
+    os.makedirs(pasta, exist_ok=True)
+    for linhas in args.linhas:
+        for armazenamento in args.armazenamentos:
+            resultado = executar(armazenamento, linhas, args.repeticoes, pasta)
+            registro = {
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "armazenamento": armazenamento,
+                "linhas": linhas,
+                "repeticoes": args.repeticoes,
+                **resultado
+            }
+            _imprimir(registro, _ultimo_resultado(armazenamento, linhas))
+            if not args.nao_salvar:
+                with open(RESULTADOS, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(registro) + "\n")
+
+
+if __name__ == "__main__":
+    main()
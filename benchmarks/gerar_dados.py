@@ -0,0 +1,86 @@
+"""
+Gera planilhas sintéticas no formato de data/cortes.csv para benchmarks.
+Execute: python benchmarks/gerar_dados.py <linhas> [saida.csv] [--semente N]
+"""
+import argparse
+import csv
+import random
+
+COLUNAS = ["numero", "lista_corte", "espessura", "tempo_corte", "opd", "data_entrega", "data_corte"]
+
+ESPESSURAS = ["1.2", "2.25", "4.75", "6.35", "9.53", "12.7", "15.88"]
+TEMPOS = ["10min", "15min", "20min", "30min", "1h", "2h", "3h", "6h", "12h", "24h", "5 hvs", ""]
+MESES = ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"]
+LISTAS_TEXTO = ["pecas faltantes", "identificacao"]
+OPDS_TEXTO = ["olfar", "", "196 e 208", "opd 162", "244-245-246"]
+DATAS_CORTE_TEXTO = ["RAFA"]
+
+
+def _data_entrega(rnd: random.Random) -> str:
+    # Mistura "28/ago" e "03/10/2025", como na planilha real
+    dia = rnd.randint(1, 28)
+    mes = rnd.randint(1, 12)
+    if rnd.random() < 0.8:
+        return f"{dia:02d}/{MESES[mes - 1]}"
+    return f"{dia:02d}/{mes:02d}/2025"
+
+
+def _data_corte(rnd: random.Random) -> str:
+    # ~45% pendentes, alguns textos livres, o resto em "d/m/aa"
+    sorteio = rnd.random()
+    if sorteio < 0.45:
+        return ""
+    if sorteio < 0.46:
+        return rnd.choice(DATAS_CORTE_TEXTO)
+    return f"{rnd.randint(1, 28)}/{rnd.randint(1, 12)}/25"
+
+
+def gerar_linhas(linhas: int, semente: int = 42):
+    """Gera as linhas (listas de str) da planilha sintética."""
+    rnd = random.Random(semente)
+    numero = 4000
+    n_listas = max(10, linhas // 8)
+    n_opds = max(10, linhas // 20)
+    for _ in range(linhas):
+        # Alguns cortes sem número ("0") e números quase sempre crescentes
+        if rnd.random() < 0.005:
+            num = "0"
+        else:
+            numero += rnd.randint(1, 3)
+            num = str(numero)
+
+        if rnd.random() < 0.05:
+            lista = rnd.choice(LISTAS_TEXTO)
+        else:
+            lista = str(100 + rnd.randrange(n_listas))
+
+        if rnd.random() < 0.1:
+            opd = rnd.choice(OPDS_TEXTO)
+        else:
+            opd = str(rnd.randrange(n_opds)).zfill(3)
+
+        yield [
+            num, lista, rnd.choice(ESPESSURAS), rnd.choice(TEMPOS),
+            opd, _data_entrega(rnd), _data_corte(rnd)
+        ]
+
+
+def gerar_planilha(caminho: str, linhas: int, semente: int = 42) -> None:
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f, lineterminator="\n")
+        escritor.writerow(COLUNAS)
+        escritor.writerows(gerar_linhas(linhas, semente))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética de cortes")
+    parser.add_argument("linhas", type=int)
+    parser.add_argument("saida", nargs="?", default="cortes_sintetico.csv")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    gerar_planilha(args.saida, args.linhas, args.semente)
+    print(f"{args.linhas} linhas gravadas em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,80 @@ EVOLUTION_API_URL = os.getenv("EVOLUTION_API_URL", "http://localhost:8080")
 EVOLUTION_API_KEY = os.getenv("EVOLUTION_API_KEY", "sua-api-key-aqui")
 EVOLUTION_INSTANCE = os.getenv("EVOLUTION_INSTANCE", "whatsapp-cortes")
 
+# HTTP Client (pool de conexões com a Evolution API)
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", 20))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRA = float(os.getenv("HTTP_KEEPALIVE_EXPIRA", 30))
+HTTP2 = os.getenv("HTTP2", "false").lower() in ("1", "true", "sim")
+HTTP_TIMEOUT_CONEXAO = float(os.getenv("HTTP_TIMEOUT_CONEXAO", 5))
+HTTP_TIMEOUT_LEITURA = float(os.getenv("HTTP_TIMEOUT_LEITURA", 15))
+
+# Fila de envio (workers e limites de taxa em mensagens/segundo)
+ENVIO_WORKERS = int(os.getenv("ENVIO_WORKERS", 4))
+ENVIO_FILA_MAX = int(os.getenv("ENVIO_FILA_MAX", 1000))
+ENVIO_TAXA_GLOBAL = float(os.getenv("ENVIO_TAXA_GLOBAL", 10))
+ENVIO_RAJADA_GLOBAL = float(os.getenv("ENVIO_RAJADA_GLOBAL", 20))
+ENVIO_TAXA_NUMERO = float(os.getenv("ENVIO_TAXA_NUMERO", 1))
+ENVIO_RAJADA_NUMERO = float(os.getenv("ENVIO_RAJADA_NUMERO", 3))
+
+# Execução de comandos (threads para consultas e para escritas)
+COMANDOS_WORKERS_LEITURA = int(os.getenv("COMANDOS_WORKERS_LEITURA", 8))
+COMANDOS_WORKERS_ESCRITA = int(os.getenv("COMANDOS_WORKERS_ESCRITA", 4))
+
+# Cache de respostas montadas (entradas, invalidado a cada alteração dos dados)
+CACHE_RESPOSTAS_MAX = int(os.getenv("CACHE_RESPOSTAS_MAX", 256))
+
+# Deduplicação de webhooks (ids de mensagem já processados)
+DEDUP_TTL = float(os.getenv("DEDUP_TTL", 600))
+DEDUP_MAX = int(os.getenv("DEDUP_MAX", 10000))
+DEDUP_ARQUIVO = os.getenv("DEDUP_ARQUIVO", "")
+
+# Limite de comandos recebidos por número (token bucket) e agrupamento de repetições
+ENTRADA_TAXA = float(os.getenv("ENTRADA_TAXA", 0.5))
+ENTRADA_RAJADA = float(os.getenv("ENTRADA_RAJADA", 10))
+ENTRADA_MAX_NUMEROS = int(os.getenv("ENTRADA_MAX_NUMEROS", 10000))
+ENTRADA_JANELA_REPETICAO = float(os.getenv("ENTRADA_JANELA_REPETICAO", 5))
+
+# Paginação ("mais"): cursores por remetente
+PAGINACAO_TTL = float(os.getenv("PAGINACAO_TTL", 900))
+PAGINACAO_MAX = int(os.getenv("PAGINACAO_MAX", 1000))
+
+# Resumo diário para assinantes ("HH:MM", vazio desliga); números fixos separados por vírgula
+RESUMO_HORARIO = os.getenv("RESUMO_HORARIO", "07:00")
+RESUMO_ASSINANTES = os.getenv("RESUMO_ASSINANTES", "")
+RESUMO_ARQUIVO = os.getenv("RESUMO_ARQUIVO", os.path.join(os.path.dirname(__file__), "data", "resumo.json"))
+# Envio do resumo: envios simultâneos, mensagens/segundo, tentativas por número e prazo total (s)
+RESUMO_CONCORRENCIA = int(os.getenv("RESUMO_CONCORRENCIA", 4))
+RESUMO_TAXA = float(os.getenv("RESUMO_TAXA", 2))
+RESUMO_TENTATIVAS = int(os.getenv("RESUMO_TENTATIVAS", 3))
+RESUMO_PRAZO = float(os.getenv("RESUMO_PRAZO", 1800))
+
+# Histórico das conclusões (corte, instante e remetente), uma linha JSON por conclusão
+HISTORICO_ARQUIVO = os.getenv("HISTORICO_ARQUIVO", os.path.join(os.path.dirname(__file__), "data", "historico.jsonl"))
+
 # Paths
-DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "cortes.csv")
+DATA_PATH = os.getenv("DATA_PATH", os.path.join(os.path.dirname(__file__), "data", "cortes.csv"))
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(os.path.dirname(__file__), "data", "cortes.db"))
+
+# Armazenamento: "csv" (pandas + journal) ou "sqlite"
+ARMAZENAMENTO = os.getenv("ARMAZENAMENTO", "csv")
+# Tabela em memória do backend csv: "pandas" ou "compacta" (sem pandas, menos memória)
+TABELA = os.getenv("TABELA", "pandas")
+# Cache binário da planilha interpretada (tabela + índices) ao lado do CSV: <csv>.cache
+CACHE_PLANILHA = os.getenv("CACHE_PLANILHA", "true").lower() in ("1", "true", "sim")
+
+# Journal de alterações e compactação do CSV
+JOURNAL_JANELA_MS = float(os.getenv("JOURNAL_JANELA_MS", 5))
+COMPACTAR_INTERVALO = float(os.getenv("COMPACTAR_INTERVALO", 300))
+COMPACTAR_MAX_ENTRADAS = int(os.getenv("COMPACTAR_MAX_ENTRADAS", 500))
+
+# Recarga automática da planilha quando o CSV é editado (0 desliga)
+RECARGA_INTERVALO = float(os.getenv("RECARGA_INTERVALO", 5))
 
 # Server Configuration
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
+# Processos do uvicorn; com mais de 1, o backend csv sincroniza os workers pelo journal
+WORKERS = int(os.getenv("WORKERS", 1))
+# Com mais de 1 worker: ids vistos, limites de entrada e cursores de paginação ficam neste banco
+ESTADO_ARQUIVO = os.getenv("ESTADO_ARQUIVO", os.path.join(os.path.dirname(__file__), "data", "estado.db"))
@@ -0,0 +1,53 @@
+"""
+Mede o tempo de import do app, o tempo de carga da planilha e a memória residente.
+Execute: python medir_inicializacao.py [caminho.csv]
+"""
+import os
+import subprocess
+import sys
+
+SCRIPT = r"""
+import resource, sys, time
+inicio = time.perf_counter()
+import app.main
+t_import = time.perf_counter() - inicio
+pandas = "pandas" in sys.modules
+from app.cortes_manager import cortes_manager
+inicio = time.perf_counter()
+cortes_manager.iniciar()
+t_carga = time.perf_counter() - inicio
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(f"{t_import * 1000:.0f} {t_carga * 1000:.0f} {rss // 1024} {pandas} {'pandas' in sys.modules}")
+"""
+
+
+def medir(tabela: str, csv_path: str) -> str:
+    env = dict(os.environ, ARMAZENAMENTO="csv", TABELA=tabela, RECARGA_INTERVALO="0")
+    if csv_path:
+        env["DATA_PATH"] = csv_path
+    saida = subprocess.run(
+        [sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if saida.returncode != 0:
+        return saida.stderr.strip().splitlines()[-1]
+    t_import, t_carga, rss, pandas_import, pandas_carga = saida.stdout.split()
+    return (
+        f"import {t_import:>5} ms | carga {t_carga:>6} ms | RSS {rss:>4} MB | "
+        f"pandas no import: {pandas_import} | pandas após carga: {pandas_carga}"
+    )
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else ""
+    print("=" * 50)
+    print("INICIALIZACAO - Agente de Cortes")
+    print("=" * 50)
+    for tabela in ("pandas", "compacta"):
+        print(f"{tabela:>9}: {medir(tabela, csv_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,11 @@ import uvicorn
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
+    workers = int(os.getenv("WORKERS", 1))
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
+        workers=workers,
         reload=False
     )
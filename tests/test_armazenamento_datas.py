@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+
+from app import armazenamento_csv, armazenamento_sqlite, datas
+from app.armazenamento_csv import ArmazenamentoCSV
+from app.armazenamento_sqlite import ArmazenamentoSQLite
+
+PLANILHA = (
+    "numero,lista_corte,espessura,tempo_corte,opd,data_entrega,data_corte\n"
+    "4914,219,4.75,10min,290,05/jan,\n"
+    "4915,219,4.75,,290,20/12/2026,\n"
+)
+
+
+class _Relogio:
+    """date com today() controlado pelo teste."""
+
+    hoje = date(2026, 6, 20)
+
+    def __new__(cls, *args):
+        return date(*args)
+
+    @classmethod
+    def today(cls):
+        return cls.hoje
+
+    fromordinal = staticmethod(date.fromordinal)
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def armazenamento(request, tmp_path, monkeypatch):
+    for modulo in (datas, armazenamento_csv, armazenamento_sqlite):
+        monkeypatch.setattr(modulo, "date", _Relogio)
+    monkeypatch.setattr(_Relogio, "hoje", date(2026, 6, 20))
+    csv_path = tmp_path / "cortes.csv"
+    csv_path.write_text(PLANILHA, encoding="utf-8")
+    if request.param == "csv":
+        armazenamento = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=False)
+    else:
+        armazenamento = ArmazenamentoSQLite(str(tmp_path / "cortes.db"), csv_path=str(csv_path))
+    yield armazenamento
+    armazenamento.fechar()
+
+
+def _numeros(registros):
+    return [r["numero"] for r in registros]
+
+
+def test_data_sem_ano_acompanha_a_mudanca_de_dia(armazenamento, monkeypatch):
+    # Em junho, "05/jan" é o janeiro que passou
+    assert _numeros(armazenamento.get_por_entrega(date(2026, 1, 31), date(2026, 1, 1))) == ["4914"]
+
+    # Em dezembro é o janeiro seguinte, sem precisar recarregar
+    monkeypatch.setattr(_Relogio, "hoje", date(2026, 12, 20))
+    versao = armazenamento.versao()
+    assert _numeros(armazenamento.get_por_entrega(date(2026, 1, 31), date(2026, 1, 1))) == []
+    assert _numeros(armazenamento.get_por_entrega(date(2027, 1, 31), date(2026, 12, 1))) == ["4915", "4914"]
+    assert armazenamento.versao() != versao
@@ -0,0 +1,46 @@
+import pytest
+
+from app.armazenamento_csv import ArmazenamentoCSV
+from app.armazenamento_sqlite import ArmazenamentoSQLite
+
+# Valores com espaços e espessuras empatadas em número de pendentes
+PLANILHA = (
+    "numero,lista_corte,espessura,tempo_corte,opd,data_entrega,data_corte\n"
+    "4914, 219 ,6.35,10min,290,28/ago,\n"
+    "4915,219,4.75,,290 ,28/ago,  \n"
+    "4916,220,3.00,,291,28/ago,\n"
+    "4917,220,6.35,,291,28/ago,\n"
+    "4918,221,4.75,,292,28/ago,\n"
+    "4919,221,9.50,,292,28/ago,01/10/26\n"
+)
+
+
+@pytest.fixture
+def backends(tmp_path):
+    csv_path = tmp_path / "cortes.csv"
+    csv_path.write_text(PLANILHA, encoding="utf-8")
+    csv = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=False)
+    sqlite = ArmazenamentoSQLite(str(tmp_path / "cortes.db"), csv_path=str(csv_path))
+    yield csv, sqlite
+    csv.fechar()
+    sqlite.fechar()
+
+
+def test_importacao_guarda_os_valores_como_no_csv(backends):
+    csv, sqlite = backends
+    assert sqlite.get_detalhe("4914") == csv.get_detalhe("4914")
+    assert sqlite.get_detalhe("4914")["lista_corte"] == " 219 "
+    assert sqlite.get_detalhe("4915")["opd"] == "290 "
+
+
+def test_data_corte_so_com_espacos_e_pendente(backends):
+    csv, sqlite = backends
+    assert sqlite.get_status_geral()["pendentes"] == csv.get_status_geral()["pendentes"] == 5
+    assert sqlite.concluir_corte("4915")["sucesso"]
+
+
+def test_status_com_empates_na_mesma_ordem(backends):
+    csv, sqlite = backends
+    esperado = {"4.75": 2, "6.35": 2, "3.00": 1}
+    assert list(csv.get_status_geral()["espessuras"].items()) == list(esperado.items())
+    assert list(sqlite.get_status_geral()["espessuras"].items()) == list(esperado.items())
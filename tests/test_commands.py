@@ -0,0 +1,84 @@
+import pytest
+
+from app import commands, cortes_manager as modulo_manager
+from app.armazenamento_csv import ArmazenamentoCSV
+from app.cache_respostas import CacheRespostas
+from app.cortes_manager import CortesManager
+from app.historico import HistoricoConclusoes
+
+PLANILHA = (
+    "numero,lista_corte,espessura,tempo_corte,opd,data_entrega,data_corte\n"
+    "4914,219,4.75,10min,290,28/ago,\n"
+    "4915,219,4.75,,290,28/ago,\n"
+    "4916,2190,6.35,,1290,29/ago,\n"
+    "4917,1219,6.35,,290-A,29/ago,\n"
+)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """Comandos sobre uma planilha, um histórico e um cache de respostas temporários."""
+    csv_path = tmp_path / "cortes.csv"
+    csv_path.write_text(PLANILHA, encoding="utf-8")
+    armazenamento = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=False)
+    manager = CortesManager(str(csv_path), armazenamento=armazenamento)
+    historico = HistoricoConclusoes(str(tmp_path / "historico.jsonl"))
+    monkeypatch.setattr(commands, "cortes_manager", manager)
+    monkeypatch.setattr(commands, "historico_conclusoes", historico)
+    monkeypatch.setattr(commands, "cache_respostas", CacheRespostas())
+    monkeypatch.setattr(modulo_manager, "historico_conclusoes", historico)
+    yield manager
+    armazenamento.fechar()
+
+
+def test_detalhe_em_cache_mostra_a_conclusao_registrada_depois(manager):
+    # Entre a conclusão (nova versão) e o registro no histórico, um "detalhe" entra no cache
+    manager.armazenamento.concluir_cortes(["4914"])
+    assert "Concluido em" not in commands.processar_comando("detalhe 4914")
+
+    commands.historico_conclusoes.registrar(["4914"], ["5511"])
+    assert "Concluido em" in commands.processar_comando("detalhe 4914")
+
+
+def test_falha_no_historico_nao_desfaz_a_conclusao(manager, monkeypatch, tmp_path, caplog):
+    (tmp_path / "bloqueado").write_text("")
+    monkeypatch.setattr(modulo_manager, "historico_conclusoes", HistoricoConclusoes(str(tmp_path / "bloqueado" / "h.jsonl")))
+
+    assert manager.concluir_cortes(["4914"], ["5511"])[0]["sucesso"]
+    assert manager.get_detalhe("4914")["data_corte"]
+    assert "Falha ao registrar" in caplog.text
+
+
+@pytest.mark.parametrize("args, esperado", [
+    (["4914"], ["4914"]),
+    (["4914,4915", "4914"], ["4914", "4915"]),
+    (["4912-4915"], ["4912", "4913", "4914", "4915"]),
+    (["4915-4915"], ["4915"]),
+    (["1-3,", "7"], ["1", "2", "3", "7"]),
+])
+def test_alvos_por_numeros_e_intervalos(args, esperado):
+    assert commands._alvos_conclusao(args) == (esperado, None)
+
+
+@pytest.mark.parametrize("args", [["4915-4912"], ["49a-4915"], ["4912-"], ["-4912"], ["1-2-3"]])
+def test_intervalo_invalido(args):
+    numeros, erro = commands._alvos_conclusao(args)
+    assert numeros == [] and erro.startswith("Intervalo invalido")
+
+
+def test_limite_de_cortes_por_comando():
+    limite = commands.LIMITE_CONCLUSAO_LOTE
+    numeros, erro = commands._alvos_conclusao([f"1-{limite}"])
+    assert len(numeros) == limite and erro is None
+
+    for args in ([f"1-{limite + 1}"], [f"1-{limite}", "9999"], ["1-100000000"]):
+        assert commands._alvos_conclusao(args) == ([], f"Maximo de {limite} cortes por comando.")
+
+
+def test_lista_e_opd_so_com_valor_exato(manager):
+    # "219" também está contido em 2190 e 1219; "290" em 1290 e 290-A
+    assert commands._alvos_conclusao(["lista", "219"]) == (["4914", "4915"], None)
+    assert commands._alvos_conclusao(["opd", "290"]) == (["4914", "4915"], None)
+    assert commands._alvos_conclusao(["opd", "290-a"]) == (["4917"], None)
+    assert commands._alvos_conclusao(["lista", "21"])[1].startswith("Nenhum corte encontrado")
+    assert commands._alvos_conclusao(["lista"])[1].startswith("Informe a lista")
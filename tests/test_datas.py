@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from app.datas import DATA_INVALIDA, SEM_DATA, ordinais, ordinal_data
+
+REFERENCIA = date(2026, 10, 18)
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("28/ago", date(2026, 8, 28)),
+    ("28/AGO", date(2026, 8, 28)),
+    ("28/agosto", date(2026, 8, 28)),
+    ("28-ago.", date(2026, 8, 28)),
+    (" 5.set ", date(2026, 9, 5)),
+    ("16/12", date(2026, 12, 16)),
+    ("03/10/2025", date(2025, 10, 3)),
+    ("29/8/25", date(2025, 8, 29)),
+    ("1-1-2027", date(2027, 1, 1)),
+])
+def test_formatos_aceitos(texto, esperado):
+    assert ordinal_data(texto, REFERENCIA) == esperado.toordinal()
+
+
+def test_sem_ano_vale_o_ano_mais_perto_da_referencia():
+    # Virada de ano: janeiro perto do fim de dezembro é do ano seguinte, e vice-versa
+    assert ordinal_data("03/jan", date(2026, 12, 20)) == date(2027, 1, 3).toordinal()
+    assert ordinal_data("28/dez", date(2027, 1, 5)) == date(2026, 12, 28).toordinal()
+    assert ordinal_data("29/fev", date(2028, 1, 10)) == date(2028, 2, 29).toordinal()
+
+
+@pytest.mark.parametrize("texto", ["", "  ", " . "])
+def test_vazio(texto):
+    assert ordinal_data(texto, REFERENCIA) == SEM_DATA
+
+
+@pytest.mark.parametrize("texto", ["RAFA", "28", "1/2/3/4", "xx/ago", "28/xyz", "31/02/2025", "13/13", "0/ago", "29/fev"])
+def test_invalidas(texto):
+    assert ordinal_data(texto, REFERENCIA) == DATA_INVALIDA
+
+
+def test_ordinais_da_coluna():
+    coluna = ["28/ago", "", "RAFA", "28/ago", "03/10/2025"]
+    assert list(ordinais(coluna, REFERENCIA)) == [
+        date(2026, 8, 28).toordinal(), SEM_DATA, DATA_INVALIDA, date(2026, 8, 28).toordinal(), date(2025, 10, 3).toordinal()
+    ]
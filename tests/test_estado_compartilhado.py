@@ -0,0 +1,77 @@
+from app.armazenamento_csv import ArmazenamentoCSV
+from app.deduplicacao import CacheVistosCompartilhado
+from app.estado_compartilhado import EstadoCompartilhado
+from app.limitador import LimitadorEntradaCompartilhado
+from app.paginacao import CursoresPaginacaoCompartilhados
+
+PLANILHA = (
+    "numero,lista_corte,espessura,tempo_corte,opd,data_entrega,data_corte\n"
+    "4914,219,4.75,10min,290,28/ago,\n"
+    "4915,219,4.75,,290,28/ago,\n"
+)
+
+
+def _workers(tmp_path):
+    """Dois 'workers': instâncias separadas sobre o mesmo arquivo, como em processos diferentes."""
+    arquivo = str(tmp_path / "estado.db")
+    return EstadoCompartilhado(arquivo), EstadoCompartilhado(arquivo)
+
+
+def test_webhook_reenviado_para_outro_worker_e_duplicado(tmp_path):
+    a, b = _workers(tmp_path)
+    assert not CacheVistosCompartilhado(a).ja_visto("5511:ABC")
+    vistos_b = CacheVistosCompartilhado(b)
+    assert vistos_b.ja_visto("5511:ABC")
+    assert vistos_b.estatisticas() == {"ids": 1, "duplicados": 1}
+
+
+def test_id_expirado_volta_a_ser_aceito(tmp_path):
+    a, b = _workers(tmp_path)
+    assert not CacheVistosCompartilhado(a, ttl=-1).ja_visto("5511:ABC")
+    assert not CacheVistosCompartilhado(b).ja_visto("5511:ABC")
+
+
+def test_limite_de_entrada_vale_para_o_numero_em_todos_os_workers(tmp_path):
+    a, b = _workers(tmp_path)
+    limitador_a = LimitadorEntradaCompartilhado(a, taxa=0.001, rajada=2, janela_repeticao=0)
+    limitador_b = LimitadorEntradaCompartilhado(b, taxa=0.001, rajada=2, janela_repeticao=0)
+    assert limitador_a.verificar("5511", "status") is None
+    assert limitador_b.verificar("5511", "pendentes") is None
+    assert limitador_a.verificar("5511", "status") == "rate_limited"
+    assert limitador_b.avisar("5511")
+    assert not limitador_a.avisar("5511")
+    # Outro número tem o próprio balde
+    assert limitador_b.verificar("5522", "status") is None
+
+
+def test_repeticao_agrupada_entre_workers(tmp_path):
+    a, b = _workers(tmp_path)
+    assert LimitadorEntradaCompartilhado(a).verificar("5511", "Status") is None
+    assert LimitadorEntradaCompartilhado(b).verificar("5511", "status") == "coalesced"
+
+
+def test_mais_continua_o_cursor_aberto_em_outro_worker(tmp_path):
+    a, b = _workers(tmp_path)
+    CursoresPaginacaoCompartilhados(a).abrir("5511", "lista", ["219"], "marca", 10)
+    cursores_b = CursoresPaginacaoCompartilhados(b)
+    cursor = cursores_b.obter("5511")
+    assert (cursor.comando, cursor.args, cursor.versao, cursor.posicao) == ("lista", ["219"], "marca", 10)
+    cursores_b.avancar("5511", cursor, 10)
+    assert CursoresPaginacaoCompartilhados(a).obter("5511").posicao == 20
+    cursores_b.remover("5511")
+    assert CursoresPaginacaoCompartilhados(a).obter("5511") is None
+
+
+def test_marca_dados_igual_nos_processos_que_viram_as_mesmas_conclusoes(tmp_path):
+    csv_path = tmp_path / "cortes.csv"
+    csv_path.write_text(PLANILHA, encoding="utf-8")
+    a = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=True)
+    b = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=True)
+    antes = a.marca_dados()
+    assert b.marca_dados() == antes
+
+    assert a.concluir_cortes(["4914"])[0]["sucesso"]
+    assert a.marca_dados() != antes
+    assert b.marca_dados() == a.marca_dados()
+    a.fechar()
+    b.fechar()
@@ -0,0 +1,56 @@
+import pytest
+
+from app.indices import IndiceHash, IndiceTrigramas
+
+VALORES = ["219", "2190", "OPD-290", "opd.290", "1219", "a+b", "(x)", "[12]"]
+
+
+def _por_varredura(valores, termo):
+    """Resultado esperado: substring literal, sem diferenciar maiúsculas."""
+    return {linha for linha, valor in enumerate(valores) if termo.lower() in valor.lower()}
+
+
+@pytest.mark.parametrize("termo", ["219", "21", "9", "290", "opd", "OPD-", "d.2", ".", "+", "a+b", "(x)", "[12]", "*", "?", "^2", "1$", "", "zzz"])
+def test_contem_e_substring_literal(termo):
+    assert IndiceTrigramas(VALORES).contem(termo) == _por_varredura(VALORES, termo)
+
+
+def test_metacaracteres_de_regex_nao_viram_padrao():
+    indice = IndiceTrigramas(["opd.290", "opdx290", "a.*b", "axxb"])
+    assert indice.contem("d.2") == {0}
+    assert indice.contem(".*") == {2}
+    assert indice.contem("a.*b") == {2}
+
+
+def test_remover_tira_o_valor_e_seus_trigramas():
+    indice = IndiceTrigramas(["219", "219", "2190"])
+    indice.remover(0, "219")
+    assert indice.contem("219") == {1, 2}
+    indice.remover(1, "219")
+    assert indice.contem("219") == {2}
+    assert indice.exato("219") == set()
+    indice.remover(2, "2190")
+    assert indice.contem("219") == set()
+    assert indice._trigramas == {}
+
+
+def test_adicionar_depois_de_criado():
+    indice = IndiceTrigramas(["219"])
+    indice.adicionar(1, "X-4219")
+    assert indice.contem("421") == {1}
+    assert indice.contem("x-4") == {1}
+    assert indice.exato("x-4219") == {1}
+
+
+def test_remover_valor_ausente_nao_falha():
+    indice = IndiceTrigramas(["219"])
+    indice.remover(5, "999")
+    assert indice.contem("219") == {0}
+
+
+def test_exportar_e_importar_preservam_a_busca():
+    original = IndiceTrigramas(VALORES)
+    copia = IndiceTrigramas.importar(original.exportar())
+    for termo in ["219", "290", "opd", "+", "[12]"]:
+        assert copia.contem(termo) == original.contem(termo)
+    assert IndiceHash.importar(IndiceHash(VALORES).exportar()).contem("219") == {0, 1, 4}
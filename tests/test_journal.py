@@ -0,0 +1,97 @@
+import errno
+import os
+import threading
+
+import pytest
+
+from app import journal
+from app.armazenamento import ERRO_GRAVACAO
+from app.armazenamento_csv import ArmazenamentoCSV
+from app.journal import Journal
+
+PLANILHA = (
+    "numero,lista_corte,espessura,tempo_corte,opd,data_entrega,data_corte\n"
+    "4914,219,4.75,10min,290,28/ago,\n"
+    "4915,219,4.75,,290,28/ago,\n"
+)
+
+
+def _fsync_sem_espaco(fd):
+    raise OSError(errno.ENOSPC, "No space left on device")
+
+
+def _em_thread(funcao, *args):
+    """Executa em uma thread com prazo: um deadlock vira falha do teste, não um travamento."""
+    resultado = {}
+
+    def alvo():
+        try:
+            resultado["valor"] = funcao(*args)
+        except BaseException as erro:
+            resultado["erro"] = erro
+
+    thread = threading.Thread(target=alvo, daemon=True)
+    thread.start()
+    thread.join(3)
+    assert not thread.is_alive(), "travou esperando o journal"
+    return resultado
+
+
+def test_falha_no_fsync_levanta_erro_e_corta_o_lote(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "cortes.csv.journal")
+    j = Journal(caminho, janela=0)
+    j.aguardar(j.registrar({"op": "concluir", "numero": "1"}))
+    tamanho = os.path.getsize(caminho)
+
+    monkeypatch.setattr(journal.os, "fsync", _fsync_sem_espaco)
+    seq = j.registrar({"op": "concluir", "numero": "2"})
+    resultado = _em_thread(j.aguardar, seq)
+    assert isinstance(resultado.get("erro"), OSError)
+    assert j.falhou()
+    assert os.path.getsize(caminho) == tamanho
+    assert isinstance(_em_thread(j.rotacionar).get("erro"), OSError)
+
+    monkeypatch.undo()
+    j.recuperar()
+    j.aguardar(j.registrar({"op": "concluir", "numero": "3"}))
+    assert [e["numero"] for e in j.ler()] == ["1", "3"]
+    j.fechar()
+
+
+@pytest.mark.parametrize("multiprocesso", [False, True])
+def test_conclusao_com_falha_de_gravacao_nao_fica_concluida(tmp_path, monkeypatch, multiprocesso):
+    csv_path = tmp_path / "cortes.csv"
+    csv_path.write_text(PLANILHA, encoding="utf-8")
+    armazenamento = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=multiprocesso)
+
+    monkeypatch.setattr(journal.os, "fsync", _fsync_sem_espaco)
+    resultado = _em_thread(armazenamento.concluir_cortes, ["4914"])
+    assert resultado["valor"] == [{"sucesso": False, "erro": ERRO_GRAVACAO}]
+    assert armazenamento.get_status_geral()["concluidos"] == 0
+    assert not armazenamento.get_detalhe("4914")["data_corte"]
+
+    monkeypatch.undo()
+    assert armazenamento.concluir_cortes(["4914"])[0]["sucesso"]
+    armazenamento.fechar()
+
+    recarregado = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=multiprocesso)
+    assert recarregado.get_status_geral()["concluidos"] == 1
+    recarregado.fechar()
+
+
+
+def test_linha_incompleta_de_uma_queda_nao_perde_as_entradas_seguintes(tmp_path):
+    csv_path = tmp_path / "cortes.csv"
+    csv_path.write_text(PLANILHA, encoding="utf-8")
+    with open(str(csv_path) + ".journal", "wb") as f:
+        f.write(b'{"op": "concluir", "numero": "4914", "data_corte": "01/10/26"}\n{"op": "conc')
+
+    armazenamento = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=False)
+    assert armazenamento.get_status_geral()["concluidos"] == 1
+    assert armazenamento.concluir_cortes(["4915"])[0]["sucesso"]
+
+    # Releitura do journal, como no restart (sem compactar antes)
+    recarregado = ArmazenamentoCSV(str(csv_path), tabela="compacta", multiprocesso=False)
+    assert recarregado.get_status_geral()["concluidos"] == 2
+    assert recarregado.get_detalhe("4915")["data_corte"]
+    assert [e["numero"] for e in journal.ler_journal(str(csv_path) + ".journal")] == ["4914", "4915"]
@@ -0,0 +1,38 @@
+import asyncio
+import json
+from datetime import date
+
+from app.assinantes import RegistroAssinantes
+from app.resumo_diario import DisparoResumo
+
+
+async def _nunca_enviar(numero, texto):
+    raise AssertionError("sem assinantes, nada é enviado")
+
+
+def test_arquivo_corrompido_nao_derruba_o_registro(tmp_path, caplog):
+    arquivo = tmp_path / "resumo.json"
+    arquivo.write_text('{"assinantes": ["5511"', encoding="utf-8")
+    registro = RegistroAssinantes(str(arquivo), fixos="5599")
+
+    assert registro.listar() == ["5599"]
+    assert registro.estatisticas()["assinantes"] == 1
+    assert "corrompido" in caplog.text
+    assert (tmp_path / "resumo.json.corrompido").read_text(encoding="utf-8") == '{"assinantes": ["5511"'
+
+    # A próxima alteração grava um arquivo válido no lugar
+    assert registro.adicionar("5522")
+    assert json.loads(arquivo.read_text(encoding="utf-8"))["assinantes"] == ["5522"]
+
+
+def test_envio_do_dia_sai_uma_vez(tmp_path):
+    registro = RegistroAssinantes(str(tmp_path / "resumo.json"), fixos="")
+    disparo = DisparoResumo(registro, _nunca_enviar, horario="07:00")
+
+    async def disparar_duas_vezes():
+        return await disparo.disparar_do_dia(), await disparo.disparar_do_dia()
+
+    primeiro, segundo = asyncio.run(disparar_duas_vezes())
+    assert primeiro["assinantes"] == 0
+    assert segundo == {}
+    assert registro.estatisticas()["ultimo_envio"] == date.today().isoformat()
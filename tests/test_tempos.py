@@ -0,0 +1,36 @@
+import pytest
+
+from app.tempos import SEM_TEMPO, TEMPO_INVALIDO, formatar_minutos, minutos, minutos_corte
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("1h30", 90),
+    ("1,5h", 90),
+    ("1.5h", 90),
+    ("2:15", 135),
+    ("10min", 10),
+    ("10 min", 10),
+    ("1h", 60),
+    ("2H", 120),
+    ("1h 30min", 90),
+    ("45m", 45),
+    ("5 hvs", 300),
+    ("0:05", 5),
+])
+def test_formatos_aceitos(texto, esperado):
+    assert minutos_corte(texto) == esperado
+
+
+@pytest.mark.parametrize("texto", ["", "   "])
+def test_vazio(texto):
+    assert minutos_corte(texto) == SEM_TEMPO
+
+
+@pytest.mark.parametrize("texto", ["abc", "30", "h", "1x", "1h30x", "-5min", "10min depois", "dois h", "1:2:3"])
+def test_invalidos(texto):
+    assert minutos_corte(texto) == TEMPO_INVALIDO
+
+
+def test_coluna_e_formatacao():
+    assert list(minutos(["1h30", "", "abc", "1h30"])) == [90, SEM_TEMPO, TEMPO_INVALIDO, 90]
+    assert [formatar_minutos(n) for n in (45, 180, 750)] == ["45min", "3h", "12h30"]
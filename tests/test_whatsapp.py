@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from app import metricas
+from app.whatsapp import WhatsAppClient
+
+
+def _enviar(responder) -> dict:
+    cliente = WhatsAppClient()
+    cliente._client = httpx.AsyncClient(transport=httpx.MockTransport(responder))
+
+    async def enviar():
+        try:
+            return await cliente.enviar_mensagem("11999990000", "ok")
+        finally:
+            await cliente.fechar()
+
+    return asyncio.run(enviar())
+
+
+def _metricas_envio():
+    """(envios por status, observações de duração) registrados até agora."""
+    observacoes = sum(sum(serie.contagens) for serie in metricas.envio_duracao._series.values())
+    return dict(metricas.envio_total._valores), observacoes
+
+
+def test_resposta_2xx_sem_json_conta_um_envio_bem_sucedido():
+    totais, observacoes = _metricas_envio()
+    resultado = _enviar(lambda request: httpx.Response(201, text="<html>ok</html>"))
+
+    assert resultado["sucesso"] and resultado["status_code"] == 201
+    assert resultado["response"] == {"texto": "<html>ok</html>"}
+    novos, novas_observacoes = _metricas_envio()
+    assert novos.get("201", 0) == totais.get("201", 0) + 1
+    assert novos.get("erro", 0) == totais.get("erro", 0)
+    assert novas_observacoes == observacoes + 1
+
+
+def test_falha_de_conexao_conta_como_erro():
+    def recusar(request):
+        raise httpx.ConnectError("recusada", request=request)
+
+    totais, observacoes = _metricas_envio()
+    resultado = _enviar(recusar)
+
+    assert not resultado["sucesso"]
+    novos, novas_observacoes = _metricas_envio()
+    assert novos.get("erro", 0) == totais.get("erro", 0) + 1
+    assert novas_observacoes == observacoes + 1